@@ -0,0 +1,86 @@
+import os
+import sys
+import gc
+import argparse
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Optional, List
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from data_structures import PowerPoint, Slide, SlideContent, BulletPoint
+
+
+# 原有的数据结构：普通 dataclass，每个要点为一个字典，用于对比
+@dataclass
+class LegacySlideContent:
+    title: str
+    bullet_points: List[dict] = field(default_factory=list)
+    image_path: Optional[str] = None
+
+@dataclass
+class LegacySlide:
+    layout_id: int
+    layout_name: str
+    content: LegacySlideContent
+
+@dataclass
+class LegacyPowerPoint:
+    title: str
+    slides: List[LegacySlide] = field(default_factory=list)
+
+
+def build_legacy(num_slides, bullets_per_slide, texts):
+    slides = []
+    for i in range(num_slides):
+        content = LegacySlideContent(
+            title=texts[i % len(texts)],
+            bullet_points=[{'text': texts[j], 'level': j % 3} for j in range(bullets_per_slide)],
+            image_path="images/performance_chart.png" if i % 2 else None,
+        )
+        slides.append(LegacySlide(layout_id=2, layout_name="Title, Content 0", content=content))
+    return LegacyPowerPoint(title="Benchmark", slides=slides)
+
+
+def build_slotted(num_slides, bullets_per_slide, texts):
+    slides = []
+    for i in range(num_slides):
+        content = SlideContent(
+            title=texts[i % len(texts)],
+            bullet_points=[BulletPoint(texts[j], j % 3) for j in range(bullets_per_slide)],
+            image_path="images/performance_chart.png" if i % 2 else None,
+        )
+        slides.append(Slide(layout_id=2, layout_name="Title, Content 0", content=content))
+    return PowerPoint(title="Benchmark", slides=slides)
+
+
+def measure(build, *args):
+    """
+    返回 build 构造的对象占用的内存（字节）。文本字符串预先创建并在两种结构间共享，只统计结构本身的开销。
+    """
+    gc.collect()
+    tracemalloc.start()
+    deck = build(*args)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del deck
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比较原有数据结构与基于 __slots__ 的数据结构的内存占用。')
+    parser.add_argument('--sizes', default='100,1000,10000', help='逗号分隔的幻灯片数量')
+    parser.add_argument('--bullets', type=int, default=6, help='每张幻灯片的要点数量')
+    args = parser.parse_args()
+
+    texts = [f"要点 {j}: **加粗** 内容" for j in range(max(args.bullets, 16))]
+    for size in (int(n) for n in args.sizes.split(',')):
+        legacy = measure(build_legacy, size, args.bullets, texts)
+        slotted = measure(build_slotted, size, args.bullets, texts)
+        print(f"{size:>6} 张幻灯片: 原结构 {legacy / 1024:9.1f} KiB，__slots__ 结构 {slotted / 1024:9.1f} KiB，"
+              f"节省 {(1 - slotted / legacy) * 100:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import json
+import shutil
+import resource
+import argparse
+import tempfile
+import subprocess
+
+from docx import Document
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from docx_parser import generate_markdown_from_docx
+from logger import LOG
+
+
+def make_docx(path, num_sections):
+    """
+    构造包含 num_sections 个章节的 docx 文件，每个章节含标题、普通段落和多级列表，约 3 个章节为一页。
+    """
+    document = Document()
+    document.add_paragraph("合成基准文档", style='Title')
+    for i in range(num_sections):
+        document.add_paragraph(f"第 {i} 节", style='Heading 1')
+        document.add_paragraph("多模态大模型是指能够处理多种数据模态（如文本、图像、音频等）的人工智能模型。" * 3)
+        for j in range(6):
+            style = 'List Bullet' if j % 2 == 0 else 'List Bullet 2'
+            document.add_paragraph(f"要点 {j}：注意力机制、Transformer 架构等", style=style)
+    document.save(path)
+
+
+def peak_rss_kib():
+    """
+    返回当前进程的峰值内存（KiB）。Linux 上读取 /proc/self/status 的 VmHWM，
+    它在 exec 后重新计算，不会像 ru_maxrss 那样继承父进程的峰值。
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(path, streaming, repeat):
+    """
+    在当前进程中转换 docx 文件，返回最短耗时（秒）、进程峰值内存（KiB）和输出长度。
+    """
+    LOG.remove()  # 关闭日志输出，避免日志 I/O 干扰计时
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        markdown = generate_markdown_from_docx(path, streaming=streaming)
+        best = min(best, time.perf_counter() - start)
+    return {"elapsed": best, "max_rss": peak_rss_kib(), "length": len(markdown)}
+
+
+def measure_in_subprocess(path, streaming, repeat):
+    # 每种模式在独立的进程中运行，峰值内存互不影响
+    command = [sys.executable, __file__, '--measure', path, '--repeat', str(repeat)]
+    if streaming:
+        command.append('--streaming')
+    return json.loads(subprocess.check_output(command))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量不同规模的 docx 文件转换为 markdown 的耗时和峰值内存。')
+    parser.add_argument('--sections', default='100,300,1000,3000', help='逗号分隔的章节数量（约 3 个章节为一页）')
+    parser.add_argument('--repeat', type=int, default=3, help='每个规模重复次数，取最小值')
+    parser.add_argument('--measure', metavar='DOCX', help=argparse.SUPPRESS)
+    parser.add_argument('--streaming', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.streaming, args.repeat)))
+        return
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        for size in (int(n) for n in args.sections.split(',')):
+            basename = f"bench_docx_{size}"
+            path = os.path.join(tmp_dir, f"{basename}.docx")
+            make_docx(path, size)
+            paragraphs = size * 8 + 1
+            for streaming in (False, True):
+                result = measure_in_subprocess(path, streaming, args.repeat)
+                mode = "zip 增量解析" if streaming else "python-docx "
+                print(f"{size:>6} 个章节（{paragraphs:>6} 段）{mode}: 共 {result['elapsed'] * 1000:9.2f} ms，"
+                      f"每段 {result['elapsed'] / paragraphs * 1e6:6.2f} µs，峰值内存 {result['max_rss'] / 1024:7.1f} MiB")
+            shutil.rmtree(f"images/{basename}", ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
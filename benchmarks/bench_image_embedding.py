@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import argparse
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from data_structures import PowerPoint, Slide, SlideContent
+from template_cache import template_cache
+from ppt_generator import generate_presentation_bytes
+from image_embedder import ImageEmbedder
+from logger import LOG
+
+
+def make_deck(template_path, num_slides):
+    """
+    构造 num_slides 张图文幻灯片，轮流使用仓库中的示例图片。
+    """
+    layout_mapping = template_cache.get_layout_mapping(template_path)
+    images = ["images/performance_chart.png", "images/forecast.png", "images/chatppt_presentation_demo.jpg"]
+    layout_name = "Title, Content, Picture 2"
+    slides = [
+        Slide(
+            layout_id=layout_mapping[layout_name],
+            layout_name=layout_name,
+            content=SlideContent(title=f"Slide {i}", bullet_points=[{"text": "配图说明", "level": 0}],
+                                 image_path=images[i % len(images)]),
+        )
+        for i in range(num_slides)
+    ]
+    return PowerPoint(title="Benchmark", slides=slides)
+
+
+def run(powerpoint_data, template_path, embedder):
+    start = time.perf_counter()
+    data = generate_presentation_bytes(powerpoint_data, template_path, embedder=embedder)
+    return (time.perf_counter() - start) * 1000, len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比原图嵌入与按占位符分辨率缩放后嵌入的演示文稿大小和生成耗时。')
+    parser.add_argument('--template', default='templates/SimpleTemplate.pptx', help='模板路径')
+    parser.add_argument('--slides', type=int, default=12, help='幻灯片数量')
+    parser.add_argument('--dpi', type=int, default=150, help='缩放时使用的分辨率')
+    args = parser.parse_args()
+
+    LOG.remove()  # 关闭日志输出，避免日志 I/O 干扰计时
+    powerpoint_data = make_deck(args.template, args.slides)
+    template_cache.get_entry(args.template)
+
+    # dpi 足够大时不会缩放，等价于直接嵌入原图
+    original_ms, original_size = run(powerpoint_data, args.template, ImageEmbedder(dpi=100000))
+
+    embedder = ImageEmbedder(dpi=args.dpi)
+    cold_ms, resized_size = run(powerpoint_data, args.template, embedder)
+    warm_ms, _ = run(powerpoint_data, args.template, embedder)
+
+    print(f"原图嵌入:            {original_ms:8.2f} ms  {original_size / 1024:9.1f} KB")
+    print(f"缩放嵌入（首次处理）: {cold_ms:8.2f} ms  {resized_size / 1024:9.1f} KB")
+    print(f"缩放嵌入（命中缓存）: {warm_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import argparse
+from io import BytesIO
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from template_cache import template_cache
+from layout_manager import LayoutManager
+from input_parser import parse_input_text
+from ppt_generator import build_presentation, generate_presentation
+from slide_cache import SlideRenderCache
+from logger import LOG
+
+
+def make_markdown(num_slides, edited=False):
+    """
+    生成包含 num_slides 张幻灯片的 markdown，edited 为 True 时修改中间一张幻灯片的一个词。
+    """
+    lines = ["# 增量生成测试", ""]
+    for i in range(num_slides):
+        lines.append(f"## 第 {i} 张幻灯片")
+        word = "修改后" if edited and i == num_slides // 2 else "原始"
+        for j in range(5):
+            lines.append(f"{'  ' * (j % 2)}- 第 {j} 条**{word}**要点内容")
+        if i % 4 == 0:
+            lines.append("![配图](images/performance_chart.png)")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比全量重建与增量重建（幻灯片缓存）的耗时。')
+    parser.add_argument('--template', default='templates/SimpleTemplate.pptx', help='模板路径')
+    parser.add_argument('--slides', type=int, default=80, help='幻灯片数量')
+    args = parser.parse_args()
+
+    LOG.remove()  # 关闭日志输出，避免日志 I/O 干扰计时
+    layout_manager = LayoutManager(template_cache.get_layout_mapping(args.template))
+    layout_index = template_cache.get_layout_index(args.template)
+    original, _ = parse_input_text(make_markdown(args.slides), layout_manager)
+    edited, _ = parse_input_text(make_markdown(args.slides, edited=True), layout_manager)
+
+    slide_cache = SlideRenderCache()
+    build_presentation(template_cache.clone(args.template), original, layout_index, slide_cache)
+
+    warm_misses = slide_cache.misses
+
+    # 只统计构建幻灯片的耗时
+    start = time.perf_counter()
+    build_presentation(template_cache.clone(args.template), edited, layout_index)
+    full_build = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    build_presentation(template_cache.clone(args.template), edited, layout_index, slide_cache)
+    incremental_build = (time.perf_counter() - start) * 1000
+
+    # 统计包含保存在内的完整生成耗时
+    start = time.perf_counter()
+    generate_presentation(edited, args.template, BytesIO())
+    full_total = (time.perf_counter() - start) * 1000
+
+    total_cache = SlideRenderCache()
+    generate_presentation(original, args.template, BytesIO(), total_cache)
+    start = time.perf_counter()
+    generate_presentation(edited, args.template, BytesIO(), total_cache)
+    incremental_total = (time.perf_counter() - start) * 1000
+
+    print(f"{args.slides} 张幻灯片，修改其中一个词后重新生成：")
+    print(f"  构建幻灯片   全量 {full_build:8.2f} ms   增量 {incremental_build:8.2f} ms")
+    print(f"  含保存总耗时 全量 {full_total:8.2f} ms   增量 {incremental_total:8.2f} ms")
+    print(f"  增量构建: 复用 {slide_cache.hits} 张，重建 {slide_cache.misses - warm_misses} 张")
+
+
+if __name__ == "__main__":
+    main()
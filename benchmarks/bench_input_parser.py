@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import argparse
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from input_parser import parse_input_text
+from layout_manager import LayoutManager
+from template_cache import template_cache
+from logger import LOG
+
+
+def make_markdown(num_slides):
+    """
+    构造包含 num_slides 张幻灯片的 ChatPPT markdown，交替使用标题页、多级要点页和图文页。
+    """
+    lines = ["# Benchmark", ""]
+    for i in range(num_slides):
+        lines.append(f"## Slide {i}")
+        kind = i % 3
+        if kind == 1:
+            lines.extend(f"{'  ' * (j % 3)}- 要点 {j}: **加粗** 内容" for j in range(5))
+        elif kind == 2:
+            lines.append("- 配图说明")
+            lines.append("![业绩图表](images/performance_chart.png)")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量不同幻灯片数量下 markdown 解析的耗时，检查其是否随输入规模线性增长。')
+    parser.add_argument('--template', default='templates/SimpleTemplate.pptx', help='模板路径')
+    parser.add_argument('--sizes', default='10,100,1000,10000', help='逗号分隔的幻灯片数量')
+    parser.add_argument('--repeat', type=int, default=5, help='每个规模重复次数，取最小值')
+    args = parser.parse_args()
+
+    LOG.remove()  # 关闭日志输出，避免日志 I/O 干扰计时
+    layout_manager = LayoutManager(template_cache.get_layout_mapping(args.template))
+
+    for size in (int(n) for n in args.sizes.split(',')):
+        text = make_markdown(size)
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            parse_input_text(text, layout_manager)
+            best = min(best, time.perf_counter() - start)
+        elapsed = best * 1000
+        print(f"{size:>6} 张幻灯片（{len(text):>8} 字符）: 共 {elapsed:9.2f} ms，每张 {elapsed / size * 1000:7.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
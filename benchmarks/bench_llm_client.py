@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from langchain_openai import ChatOpenAI
+
+from llm_client import LLMClientFactory, LLMSettings
+from logger import LOG
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    本地 OpenAI 兼容接口桩：对 /chat/completions 立即返回固定回复，并统计新建的 TCP 连接数。
+    """
+    protocol_version = "HTTP/1.1"  # 支持长连接
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "# Stub\n\n## Slide\n- ok"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 不输出访问日志
+
+
+def run(label, make_model, calls, concurrency):
+    """
+    以 concurrency 个线程发起 calls 次调用，make_model 在每次调用前返回要使用的模型。
+    """
+    StubHandler.connections = 0
+
+    def call(_):
+        make_model().invoke("hello")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(calls)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}: {calls} 次调用共 {elapsed * 1000:8.1f} ms，每次 {elapsed / calls * 1000:6.2f} ms，"
+          f"新建连接 {StubHandler.connections} 个")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='在本地 OpenAI 兼容接口桩上比较共享连接池与独立客户端的调用开销。')
+    parser.add_argument('--calls', type=int, default=400, help='调用次数')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发线程数')
+    args = parser.parse_args()
+
+    LOG.remove()  # 关闭日志输出，避免日志 I/O 干扰计时
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    try:
+        # 原有方式：每个组件（每个会话、每次请求创建的组件）各自创建 ChatOpenAI 及其 HTTP 客户端
+        run("独立客户端（每次新建）",
+            lambda: ChatOpenAI(model="stub", base_url=base_url, api_key="stub", max_retries=0),
+            args.calls, args.concurrency)
+
+        # 共享工厂：组件仍各自创建模型，但共用同一连接池
+        factory = LLMClientFactory(LLMSettings(model="stub", base_url=base_url, api_key="stub",
+                                               max_connections=args.concurrency,
+                                               max_keepalive_connections=args.concurrency, max_retries=0))
+        run("共享连接池（每次新建模型）", factory.create_chat_model, args.calls, args.concurrency)
+
+        model = factory.create_chat_model()
+        run("共享连接池（复用模型）", lambda: model, args.calls, args.concurrency)
+        factory.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import argparse
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from data_structures import PowerPoint, Slide, SlideContent
+from template_cache import template_cache
+from ppt_generator import build_presentation
+from logger import LOG
+
+
+def make_deck(template_path, num_slides):
+    """
+    构造包含 num_slides 张幻灯片的演示文稿数据，交替使用标题页、要点页和图文页。
+    """
+    layout_mapping = template_cache.get_layout_mapping(template_path)
+    slides = []
+    for i in range(num_slides):
+        kind = i % 3
+        if kind == 0:
+            layout_name, content = "Title 1", SlideContent(title=f"Slide {i}")
+        elif kind == 1:
+            layout_name = "Title, Content 0"
+            content = SlideContent(title=f"Slide {i}", bullet_points=[
+                {"text": f"要点 {j}: **加粗** 内容", "level": j % 3} for j in range(5)
+            ])
+        else:
+            layout_name = "Title, Content, Picture 2"
+            content = SlideContent(title=f"Slide {i}", bullet_points=[{"text": "配图说明", "level": 0}],
+                                   image_path="images/performance_chart.png")
+        slides.append(Slide(layout_id=layout_mapping[layout_name], layout_name=layout_name, content=content))
+    return PowerPoint(title="Benchmark", slides=slides)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量不同幻灯片数量下每张幻灯片的构建耗时。')
+    parser.add_argument('--template', default='templates/SimpleTemplate.pptx', help='模板路径')
+    parser.add_argument('--sizes', default='50,200,500,1000', help='逗号分隔的幻灯片数量')
+    args = parser.parse_args()
+
+    LOG.remove()  # 关闭日志输出，避免日志 I/O 干扰计时
+    layout_index = template_cache.get_layout_index(args.template)
+
+    for size in (int(n) for n in args.sizes.split(',')):
+        powerpoint_data = make_deck(args.template, size)
+        prs = template_cache.clone(args.template)
+        start = time.perf_counter()
+        build_presentation(prs, powerpoint_data, layout_index)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{size:>6} 张幻灯片: 共 {elapsed:9.2f} ms，每张 {elapsed / size:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import argparse
+from io import BytesIO
+
+from pptx import Presentation
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from utils import remove_all_slides
+from template_cache import template_cache
+from template_manager import get_layout_mapping
+from layout_manager import LayoutManager
+from input_parser import parse_input_text
+from ppt_generator import build_presentation
+from logger import LOG
+
+
+def load_template_uncached(template_path):
+    """
+    旧的加载方式：每次都从磁盘解析模板，再清除其中的幻灯片。
+    """
+    prs = Presentation(template_path)
+    remove_all_slides(prs)
+    return prs
+
+
+def timeit(func, rounds):
+    """
+    运行 func 若干次，返回平均耗时（毫秒）。
+    """
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比模板缓存前后的模板加载与单个演示文稿生成耗时。')
+    parser.add_argument('--template', default='templates/SimpleTemplate.pptx', help='模板路径')
+    parser.add_argument('--input', default='inputs/markdown/test_input.md', help='输入 markdown 文件')
+    parser.add_argument('--rounds', type=int, default=20, help='每项测试的运行次数')
+    args = parser.parse_args()
+
+    LOG.remove()  # 关闭日志输出，避免日志 I/O 干扰计时
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        input_text = f.read()
+    layout_manager = LayoutManager(get_layout_mapping(load_template_uncached(args.template)))
+    powerpoint_data, _ = parse_input_text(input_text, layout_manager)
+
+    # 预热共享缓存
+    template_cache.get_entry(args.template)
+
+    def deck_uncached():
+        prs = build_presentation(load_template_uncached(args.template), powerpoint_data)
+        prs.save(BytesIO())
+
+    def deck_cached():
+        prs = build_presentation(template_cache.clone(args.template), powerpoint_data)
+        prs.save(BytesIO())
+
+    results = [
+        ("模板加载（无缓存）", timeit(lambda: load_template_uncached(args.template), args.rounds)),
+        ("模板加载（缓存克隆）", timeit(lambda: template_cache.clone(args.template), args.rounds)),
+        ("单个演示文稿（无缓存）", timeit(deck_uncached, args.rounds)),
+        ("单个演示文稿（缓存）", timeit(deck_cached, args.rounds)),
+    ]
+
+    for name, elapsed in results:
+        print(f"{name:<20} {elapsed:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
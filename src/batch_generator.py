@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from config import Config
+from pipeline import Pipeline, SUPPORTED_EXTENSIONS
+from build_cache import BuildCache
+from media_store import configure_media_store
+from logger import LOG  # 引入日志模块
+
+# 每个工作进程中的流水线实例，由 _init_worker 创建，模板等资源在进程内只加载一次
+_worker_pipeline: Optional[Pipeline] = None
+
+
+def unique_inputs(inputs: List[str]) -> List[str]:
+    """
+    按绝对路径去除重复的输入文件，保持原有顺序（保留第一次出现的写法）。
+    """
+    seen = set()
+    unique = []
+    for input_file in inputs:
+        path = os.path.abspath(input_file)
+        if path not in seen:
+            seen.add(path)
+            unique.append(input_file)
+    return unique
+
+
+def collect_inputs(source: str) -> List[str]:
+    """
+    收集批量生成的输入文件。
+    source 可以是目录（递归收集其中的 markdown/docx 文件），
+    也可以是清单文件：.json 为文件路径列表，其他格式为每行一个文件路径（忽略空行和 # 开头的注释）。
+    清单中重复列出的文件只保留一次。
+    """
+    if os.path.isdir(source):
+        inputs = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS and not name.startswith('~$'):
+                    inputs.append(os.path.join(root, name))
+        return sorted(inputs)
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"{source} 不存在。")
+
+    with open(source, 'r', encoding='utf-8') as f:
+        if source.lower().endswith('.json'):
+            inputs = json.load(f)
+        else:
+            inputs = [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+    # 清单中的相对路径以清单文件所在目录为基准
+    base_dir = os.path.dirname(os.path.abspath(source))
+    return unique_inputs([path if os.path.isabs(path) else os.path.join(base_dir, path) for path in inputs])
+
+
+def output_paths(inputs: List[str], output_dir: str) -> Dict[str, str]:
+    """
+    为每个输入文件确定输出路径：在 output_dir 下按输入文件相对于所有输入的公共目录的路径建立子目录，
+    避免不同目录中的同名输入（如 a/intro.md 和 b/intro.md）互相覆盖。
+    同一目录中文件名相同、扩展名不同的输入（如 x.md 和 x.docx）在输出文件名中保留扩展名（x.md.pptx、x.docx.pptx）。
+    """
+    if not inputs:
+        return {}
+    abs_inputs = [os.path.abspath(input_file) for input_file in inputs]
+    base_dir = os.path.commonpath([os.path.dirname(path) for path in abs_inputs])
+
+    stems = {}
+    for path in abs_inputs:
+        stem = os.path.splitext(path)[0]
+        stems[stem] = stems.get(stem, 0) + 1
+
+    paths = {}
+    for input_file, path in zip(inputs, abs_inputs):
+        stem = os.path.splitext(path)[0]
+        name = path if stems[stem] > 1 else stem
+        paths[input_file] = os.path.join(output_dir, os.path.relpath(name, base_dir) + ".pptx")
+    return paths
+
+
+def _init_worker(config_file: str, cache_dir: Optional[str], force: bool):
+    """
+    工作进程初始化：加载配置、模板和布局管理器，供该进程处理的所有输入文件复用。
+    cache_dir 不为 None 时启用构建缓存，跳过未变化的输入。
+    """
+    global _worker_pipeline
+    config = Config(config_file)
+    configure_media_store(config)
+    build_cache = BuildCache(cache_dir, force=force) if cache_dir else None
+    _worker_pipeline = Pipeline(config, build_cache)
+
+
+def _failed_result(input_file: str, error: BaseException, start: float, pid: Optional[int] = None) -> dict:
+    # 处理失败的输入文件的结果
+    return {
+        "input": input_file,
+        "status": "failed",
+        "error": f"{type(error).__name__}: {error}",
+        "traceback": "".join(traceback.format_exception(type(error), error, error.__traceback__)),
+        "timings": {"total": time.perf_counter() - start},
+        "pid": pid,
+    }
+
+
+def _process_input(input_file: str, output_path: str) -> dict:
+    """
+    在工作进程中处理单个输入文件，输出到 output_path，返回该文件的处理结果（不抛出异常）。
+    """
+    start = time.perf_counter()
+    try:
+        result = _worker_pipeline.run(input_file, output_path=output_path)
+        return {
+            "input": input_file,
+            "status": "skipped" if result["skipped"] else "ok",
+            "output": result["output"],
+            "title": result["title"],
+            "timings": result["timings"],
+            "pid": os.getpid(),
+        }
+    except Exception as e:
+        LOG.error(f"[批量生成错误] {input_file}: {e}")
+        return _failed_result(input_file, e, start, os.getpid())
+
+
+def generate_batch(inputs: List[str], output_dir: str = "outputs", max_workers: Optional[int] = None,
+                   config_file: str = "config.json", manifest_path: Optional[str] = None,
+                   cache_dir: Optional[str] = None, force: bool = False) -> dict:
+    """
+    使用进程池批量生成演示文稿，并将每个文件的耗时、失败信息和输出路径写入清单文件。
+    重复的输入文件（按绝对路径）只处理一次；工作进程初始化失败等导致进程池不可用时，未完成的输入记为失败，清单仍会写入。
+
+    参数:
+        inputs (List[str]): 输入文件路径列表
+        output_dir (str): 输出目录
+        max_workers (int, optional): 工作进程数量，默认为 CPU 核数
+        config_file (str): 配置文件路径，每个工作进程加载一次
+        manifest_path (str, optional): 清单文件路径，默认为 output_dir/batch_manifest.json
+        cache_dir (str, optional): 构建缓存目录，指定后跳过输入未变化的文件
+        force (bool): 为 True 时忽略构建缓存，全部重新生成
+
+    返回:
+        dict: 批量生成的清单内容
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(output_dir, "batch_manifest.json")
+
+    # 同一文件只处理一次，避免多个进程同时写入同一个输出文件
+    inputs = unique_inputs(inputs)
+    # 以输入文件的相对路径命名输出文件，避免不同输入的演示文稿标题或文件名相同时互相覆盖
+    outputs = output_paths(inputs, output_dir)
+    start = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(config_file, cache_dir, force)) as executor:
+        futures = {}
+        for input_file in inputs:
+            try:
+                futures[executor.submit(_process_input, input_file, outputs[input_file])] = input_file
+            except BrokenProcessPool as e:
+                results[input_file] = _failed_result(input_file, e, start)
+        for future in as_completed(futures):
+            input_file = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # 工作进程初始化失败或异常退出，进程池中的所有任务都无法完成
+                LOG.error(f"[批量生成错误] {input_file}: {e}")
+                result = _failed_result(input_file, e, start)
+            results[input_file] = result
+            LOG.info(f"[批量生成] {result['status']}: {result['input']} ({result['timings']['total']:.2f}s)")
+
+    # 按输入顺序整理结果，保证清单稳定
+    ordered = [results[input_file] for input_file in inputs]
+    manifest = {
+        "total": len(ordered),
+        "succeeded": sum(1 for r in ordered if r["status"] == "ok"),
+        "skipped": sum(1 for r in ordered if r["status"] == "skipped"),
+        "failed": sum(1 for r in ordered if r["status"] == "failed"),
+        "elapsed": time.perf_counter() - start,
+        "results": ordered,
+    }
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    LOG.info(f"批量生成完成: 成功 {manifest['succeeded']} 个，跳过 {manifest['skipped']} 个，失败 {manifest['failed']} 个，清单已保存到 '{manifest_path}'")
+
+    return manifest
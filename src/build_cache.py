@@ -0,0 +1,111 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from typing import Optional
+
+from logger import LOG  # 引入日志模块
+
+# 匹配 markdown 中的图片引用，用于检查缓存的中间结果所引用的图片是否仍然存在
+IMAGE_REFERENCE_PATTERN = re.compile(r'!\[.*?\]\((.*?)\)')
+
+
+def hash_bytes(*parts: bytes) -> str:
+    """
+    计算多段字节内容的组合哈希。各段之间加入长度前缀，避免拼接歧义。
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, 'big'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def hash_text(*parts: str) -> str:
+    return hash_bytes(*(part.encode('utf-8') for part in parts))
+
+
+def hash_file(path: str) -> str:
+    """
+    计算文件内容的哈希，文件不存在时返回空字符串。
+    """
+    if not path or not os.path.exists(path):
+        return ""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_referenced_images(markdown: str) -> str:
+    """
+    计算 markdown 中引用的所有图片文件的组合哈希，图片变化时渲染结果也随之失效。
+    """
+    return hash_text(*(hash_file(path.strip()) for path in IMAGE_REFERENCE_PATTERN.findall(markdown)))
+
+
+class BuildCache:
+    """
+    类似 make 的构建缓存。
+    记录每个阶段输入的内容哈希及其产出的中间 markdown，输入未变化时直接复用，不再重新解析 docx 或调用 LLM；
+    同时记录每个输入文件最近一次渲染的哈希和输出路径，输入、模板、提示和配置均未变化且输出文件存在时跳过渲染。
+
+    目录结构:
+        {cache_dir}/stages/{stage}/{key}.md    各阶段产出的中间 markdown
+        {cache_dir}/outputs/{input_key}.json   每个输入文件最近一次渲染的记录
+    每个文件单独写入并原子替换，多个进程可以同时使用同一缓存目录。
+    """
+    def __init__(self, cache_dir: str = ".chatppt_cache", force: bool = False):
+        self.cache_dir = cache_dir
+        self.force = force  # 为 True 时忽略已有缓存、全部重新生成，但仍写入新的缓存
+
+    def _write_atomic(self, path: str, content: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _stage_path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, "stages", stage, f"{key}.md")
+
+    def get_stage(self, stage: str, key: str) -> Optional[str]:
+        """
+        读取某阶段缓存的中间 markdown。若其中引用的图片已不存在，视为缓存失效。
+        """
+        path = self._stage_path(stage, key)
+        if self.force or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        for image_path in IMAGE_REFERENCE_PATTERN.findall(content):
+            if not os.path.exists(image_path.strip()):
+                LOG.debug(f"[构建缓存] {stage} 引用的图片 '{image_path}' 已不存在，重新生成")
+                return None
+        LOG.debug(f"[构建缓存] 命中 {stage}: {key[:12]}")
+        return content
+
+    def put_stage(self, stage: str, key: str, content: str):
+        self._write_atomic(self._stage_path(stage, key), content)
+
+    def _output_record_path(self, input_file: str) -> str:
+        return os.path.join(self.cache_dir, "outputs", f"{hash_text(os.path.abspath(input_file))}.json")
+
+    def get_up_to_date_output(self, input_file: str, render_key: str) -> Optional[dict]:
+        """
+        若该输入文件上次以相同的 render_key 渲染且输出文件仍存在，返回该次渲染的记录（含输出路径和标题），否则返回 None。
+        """
+        path = self._output_record_path(input_file)
+        if self.force or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        if record.get("render_key") == render_key and os.path.exists(record.get("output", "")):
+            return record
+        return None
+
+    def record_output(self, input_file: str, render_key: str, output_path: str, title: str):
+        record = {"input": os.path.abspath(input_file), "render_key": render_key, "output": output_path, "title": title}
+        self._write_atomic(self._output_record_path(input_file), json.dumps(record, ensure_ascii=False))
@@ -1,22 +1,358 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Union
+
 from langchain_core.chat_history import (
     BaseChatMessageHistory,  # 基础聊天消息历史类
     InMemoryChatMessageHistory,  # 内存中的聊天消息历史类
 )
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+from config import Config
+from logger import LOG  # 导入日志工具
+
+# SQLite 后端淘汰过期会话的最小间隔（秒）
+PURGE_INTERVAL = 60
+
+
+def messages_to_drop(types: List[str], sizes: List[int], max_messages: int, max_chars: int) -> range:
+    """
+    根据各消息的类型（"system"、"human"、"ai" 等）和字符数，返回为满足容量上限需要丢弃的最早消息的下标范围。
+    开头的系统消息（之前对话的摘要）和最新一轮对话（最后一条用户消息及其后的回复）总是保留，即使单独一轮已超出上限；
+    丢弃后剩余的对话从用户消息开始。没有用户消息时至少保留最新的一条消息。
+    """
+    start = 1 if types and types[0] == "system" else 0
+    # 最多丢弃到最新一轮对话之前
+    last_turn = next((i for i in range(len(types) - 1, start - 1, -1) if types[i] == "human"), len(types) - 1)
+    chars = sum(sizes)
+    drop = start
+    while drop < last_turn and (len(types) - drop + start > max_messages or chars > max_chars):
+        chars -= sizes[drop]
+        drop += 1
+    if drop > start:
+        while drop < last_turn and types[drop] != "human":
+            drop += 1
+    return range(start, drop)
+
+
+class BoundedChatMessageHistory(InMemoryChatMessageHistory):
+    """
+    有容量上限的内存聊天历史：消息超过 max_messages 条或总字符数超过 max_chars 时，丢弃最早的消息。
+    丢弃后历史总是从用户消息开始，不会留下没有对应提问的 AI 回复；开头的系统消息（之前对话的摘要）不会被丢弃。
+    """
+    max_messages: int = 40  # 最多保留的消息条数
+    max_chars: int = 50000  # 所有消息内容的最大总字符数
+
+    def add_message(self, message: BaseMessage) -> None:
+        self.messages.append(message)
+        self._trim()
+
+    def _trim(self):
+        messages = self.messages
+        dropped = messages_to_drop([m.type for m in messages], [len(str(m.content)) for m in messages],
+                                   self.max_messages, self.max_chars)
+        del messages[dropped.start:dropped.stop]
+
+
+class SessionHistoryStore:
+    """
+    按会话保存聊天历史的存储，避免历史记录无限增长：
+    会话数超过 max_sessions 时淘汰最近最少使用的会话，超过 ttl 秒未使用的会话也会被淘汰；
+    每个会话的历史由 factory 创建（默认为 BoundedChatMessageHistory，限制单个会话占用的内存）。
+    """
+    def __init__(self, factory: Callable[[], BaseChatMessageHistory] = BoundedChatMessageHistory,
+                 max_sessions: int = 1000, ttl: Optional[float] = 3600):
+        self.factory = factory
+        self.max_sessions = max_sessions  # 最多保存的会话数
+        self.ttl = ttl  # 会话的空闲过期时间（秒），为 0 或 None 时不过期
+        self._sessions = OrderedDict()  # 会话ID -> [聊天历史, 最近使用时间]，按最近使用时间从旧到新排列
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> BaseChatMessageHistory:
+        """
+        返回会话的聊天历史，会话不存在（或已被淘汰）时创建新的聊天历史。
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = self._sessions[session_id] = [self.factory(), now]
+                while len(self._sessions) > self.max_sessions:
+                    evicted, _ = self._sessions.popitem(last=False)
+                    LOG.debug(f"[聊天历史] 会话数超过上限，淘汰会话 {evicted}")
+            else:
+                entry[1] = now
+                self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def _evict_expired(self, now: float):
+        # 淘汰空闲超过 ttl 的会话（调用方需持有锁）；会话按最近使用时间排列，只需检查开头的会话
+        if not self.ttl:
+            return
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl:
+                break
+            del self._sessions[session_id]
+            LOG.debug(f"[聊天历史] 会话 {session_id} 已过期")
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def __contains__(self, session_id: str):
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLiteChatMessageHistory(BaseChatMessageHistory):
+    """
+    保存在 SQLiteSessionStore 中的单个会话的聊天历史。每次读取都从数据库加载，其他进程写入的消息立即可见。
+    """
+    def __init__(self, store: "SQLiteSessionStore", session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.store.read(self.session_id)
+
+    def add_message(self, message: BaseMessage) -> None:
+        self.add_messages([message])
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        # 一轮对话的用户输入和回复在同一个事务中批量写入
+        self.store.append(self.session_id, messages)
+
+    def replace(self, messages: Sequence[BaseMessage], previous: Optional[Sequence[BaseMessage]] = None) -> bool:
+        # 在同一个事务中改写聊天历史，参见 SQLiteSessionStore.replace
+        return self.store.replace(self.session_id, messages, previous)
+
+    def clear(self) -> None:
+        self.store.delete(self.session_id)
+
+
+class SQLiteSessionStore:
+    """
+    基于 SQLite（WAL 模式）的会话历史存储，供同一主机上的多个 Gradio 工作进程共享：
+    用户的后续请求落到任何一个进程都能读到完整的聊天历史。
+    WAL 模式下读写互不阻塞，写入使用 BEGIN IMMEDIATE 事务并设置忙等待超时，多个进程可以安全地并发读写。
+    每个会话的消息条数和字符数有上限（与 BoundedChatMessageHistory 相同），
+    并定期淘汰超过 ttl 秒未使用的会话以及超出 max_sessions 的最近最少使用的会话。
+    """
+    def __init__(self, path: str = ".chatppt_cache/chat_history.sqlite3", max_sessions: int = 1000,
+                 ttl: Optional[float] = 3600, max_messages: int = 40, max_chars: int = 50000):
+        self.path = path
+        self.max_sessions = max_sessions  # 最多保存的会话数
+        self.ttl = ttl  # 会话的空闲过期时间（秒），为 0 或 None 时不过期
+        self.max_messages = max_messages  # 每个会话最多保留的消息条数
+        self.max_chars = max_chars  # 每个会话所有消息内容的最大总字符数
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # WAL 模式下仍保证一致性，提交时不必每次同步到磁盘
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, type TEXT NOT NULL,"
+            " size INTEGER NOT NULL, message TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id)")
+
+    def get(self, session_id: str) -> SQLiteChatMessageHistory:
+        return SQLiteChatMessageHistory(self, session_id)
+
+    def read(self, session_id: str) -> List[BaseMessage]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT message FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+        return messages_from_dict([json.loads(row[0]) for row in rows])
+
+    @staticmethod
+    def _rows(session_id: str, messages: Sequence[BaseMessage], now: float) -> List[tuple]:
+        return [
+            (session_id, m.type, len(str(m.content)), json.dumps(message_to_dict(m), ensure_ascii=False), now)
+            for m in messages
+        ]
+
+    def append(self, session_id: str, messages: Sequence[BaseMessage]):
+        """
+        在一个事务中追加多条消息，并按容量上限丢弃该会话最早的消息。
+        """
+        now = time.time()
+        rows = self._rows(session_id, messages, now)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO messages (session_id, type, size, message, created) VALUES (?, ?, ?, ?, ?)", rows
+                )
+                self._trim(session_id)
+                if now - self._last_purge >= PURGE_INTERVAL:
+                    self._purge(now)
+                    self._last_purge = now
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def replace(self, session_id: str, messages: Sequence[BaseMessage],
+                previous: Optional[Sequence[BaseMessage]] = None) -> bool:
+        """
+        在一个 BEGIN IMMEDIATE 事务中将会话的聊天历史改写为 messages（删除后重新写入），其他进程不会读到改写了一半的历史。
+        previous 为改写前读取的消息：指定时只替换这部分消息，读取之后其他进程追加的消息保留在 messages 之后；
+        会话开头的消息已不是 previous（已被其他进程改写或淘汰）时不做修改，返回 False。
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = self._conn.execute(
+                    "SELECT session_id, type, size, message, created FROM messages WHERE session_id = ? ORDER BY id",
+                    (session_id,),
+                ).fetchall()
+                appended = []
+                if previous is not None:
+                    expected = [row[3] for row in self._rows(session_id, previous, now)]
+                    if [row[3] for row in current[:len(expected)]] != expected:
+                        self._conn.execute("ROLLBACK")
+                        return False
+                    appended = current[len(expected):]
+                self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                self._conn.executemany(
+                    "INSERT INTO messages (session_id, type, size, message, created) VALUES (?, ?, ?, ?, ?)",
+                    self._rows(session_id, messages, now) + appended,
+                )
+                self._trim(session_id)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def _trim(self, session_id: str):
+        # 按容量上限删除会话最早的消息（调用方需持有锁并处于事务中）
+        rows = self._conn.execute(
+            "SELECT id, type, size FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+        ).fetchall()
+        dropped = messages_to_drop([row[1] for row in rows], [row[2] for row in rows],
+                                   self.max_messages, self.max_chars)
+        if dropped:
+            self._conn.executemany("DELETE FROM messages WHERE id = ?", [(rows[i][0],) for i in dropped])
+
+    def _purge(self, now: float):
+        # 淘汰空闲超过 ttl 的会话和超出 max_sessions 的最近最少使用的会话（调用方需持有锁并处于事务中）
+        if self.ttl:
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id IN"
+                " (SELECT session_id FROM messages GROUP BY session_id HAVING MAX(created) < ?)",
+                (now - self.ttl,),
+            )
+        self._conn.execute(
+            "DELETE FROM messages WHERE session_id IN"
+            " (SELECT session_id FROM messages GROUP BY session_id ORDER BY MAX(id) DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    def discard(self, session_id: str):
+        self.delete(session_id)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM messages")
+
+    def __contains__(self, session_id: str):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM messages WHERE session_id = ? LIMIT 1", (session_id,)
+            ).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(DISTINCT session_id) FROM messages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_session_store(config: Config) -> Union[SessionHistoryStore, SQLiteSessionStore]:
+    """
+    根据 config.json 的 chat_history 配置创建会话历史存储。
+    backend 为 "memory"（默认）时保存在进程内存中；为 "sqlite" 时保存在 path 指定的 SQLite 数据库中，可供多个进程共享。
+    """
+    history_config = config.chat_history or {}
+    backend = history_config.get("backend", "memory")
+    max_messages = history_config.get("max_messages", 40)
+    max_chars = history_config.get("max_chars", 50000)
+    max_sessions = history_config.get("max_sessions", 1000)
+    ttl_minutes = history_config.get("ttl_minutes", 60)
+    ttl = ttl_minutes * 60 if ttl_minutes else None
+
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            history_config.get("path", ".chatppt_cache/chat_history.sqlite3"),
+            max_sessions=max_sessions, ttl=ttl, max_messages=max_messages, max_chars=max_chars,
+        )
+    if backend != "memory":
+        raise ValueError(f"不支持的聊天历史后端: {backend}")
+    return SessionHistoryStore(
+        lambda: BoundedChatMessageHistory(max_messages=max_messages, max_chars=max_chars),
+        max_sessions=max_sessions,
+        ttl=ttl,
+    )
+
+
+# 全局共享的会话历史存储，首次使用时从 config.json 加载配置
+_store: Optional[Union[SessionHistoryStore, SQLiteSessionStore]] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> Union[SessionHistoryStore, SQLiteSessionStore]:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = create_session_store(Config())
+        return _store
+
+
+def set_session_store(store: Union[SessionHistoryStore, SQLiteSessionStore]):
+    """
+    替换全局的会话历史存储，例如使用非默认配置文件时。
+    """
+    global _store
+    with _store_lock:
+        _store = store
 
-# 用于存储会话历史的字典
-store = {}
 
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
     """
     获取指定会话ID的聊天历史。如果该会话ID不存在，则创建一个新的聊天历史实例。
-    
+
     参数:
         session_id (str): 会话的唯一标识符
-    
+
     返回:
         BaseChatMessageHistory: 对应会话的聊天历史对象
     """
-    if session_id not in store:
-        # 如果会话ID不存在于存储中，创建一个新的内存聊天历史实例
-        store[session_id] = InMemoryChatMessageHistory()
-    return store[session_id]
\ No newline at end of file
+    return get_session_store().get(session_id)
@@ -1,23 +1,28 @@
 # chatbot.py
 
+import asyncio
 from abc import ABC, abstractmethod
 
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder  # 导入提示模板相关类
 from langchain_core.messages import HumanMessage  # 导入消息类
 from langchain_core.runnables.history import RunnableWithMessageHistory  # 导入带有消息历史的可运行类
 
+from llm_client import get_llm_factory
 from logger import LOG  # 导入日志工具
 from chat_history import get_session_history
+from history_policy import HistoryPolicy
 
 
 class ChatBot(ABC):
     """
     聊天机器人基类，提供聊天功能。
     """
-    def __init__(self, prompt_file="./prompts/chatbot.txt", session_id=None):
+    def __init__(self, prompt_file="./prompts/chatbot.txt", session_id=None, history_policy: HistoryPolicy = None):
         self.prompt_file = prompt_file
         self.session_id = session_id if session_id else "default_session_id"
+        # 聊天历史窗口策略：提示保持在 token 预算以内，较早的对话折叠为摘要
+        self.history_policy = history_policy if history_policy is not None else HistoryPolicy()
+        self.last_prompt_tokens = None  # 最近一轮的提示 token 数（模型返回的实际用量）
         self.prompt = self.load_prompt()
         # LOG.debug(f"[ChatBot Prompt]{self.prompt}")
         self.create_chatbot()
@@ -43,17 +48,30 @@ class ChatBot(ABC):
             MessagesPlaceholder(variable_name="messages"),  # 消息占位符
         ])
 
-        # 初始化 ChatOllama 模型，配置参数
-        self.chatbot = system_prompt | ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.5,
-            max_tokens=4096
+        # 初始化模型，使用共享的 LLM 客户端（模型和连接池配置见 config.json 的 llm 部分）
+        self.chatbot = system_prompt | get_llm_factory().create_chat_model(
+            max_tokens=4096,
+            stream_usage=True,  # 流式输出时也返回 token 用量，用于记录每轮的提示 token 数
         )
 
         # 将聊天机器人与消息历史记录关联
         self.chatbot_with_history = RunnableWithMessageHistory(self.chatbot, get_session_history)
 
 
+    def prepare_history(self, user_input, session_id):
+        """
+        发送本轮请求前，按历史窗口策略折叠会话的聊天历史，返回本轮提示的估算 token 数。
+        """
+        return self.history_policy.compact(get_session_history(session_id), self.prompt, user_input)
+
+    def report_usage(self, session_id, usage, estimated):
+        """
+        记录并输出本轮的提示 token 数（模型未返回用量时使用估算值），用于确认多轮修改后提示大小不再增长。
+        """
+        prompt_tokens = usage["input_tokens"] if usage else estimated
+        self.last_prompt_tokens = prompt_tokens
+        LOG.info(f"[ChatBot] 会话 {session_id} 本轮提示 token 数: {prompt_tokens}（估算 {estimated}）")
+
     def chat_with_history(self, user_input, session_id=None):
         """
         处理用户输入，生成包含聊天历史的回复。
@@ -67,11 +85,67 @@ class ChatBot(ABC):
         """
         if session_id is None:
             session_id = self.session_id
-    
+        estimated = self.prepare_history(user_input, session_id)
+
         response = self.chatbot_with_history.invoke(
             [HumanMessage(content=user_input)],  # 将用户输入封装为 HumanMessage
             {"configurable": {"session_id": session_id}},  # 传入配置，包括会话ID
         )
 
+        self.report_usage(session_id, response.usage_metadata, estimated)
         LOG.debug(f"[ChatBot] {response.content}")  # 记录调试日志
-        return response.content  # 返回生成的回复内容
\ No newline at end of file
+        return response.content  # 返回生成的回复内容
+
+    def stream_with_history(self, user_input, session_id=None):
+        """
+        流式处理用户输入，逐段返回 AI 生成的回复。回复完整生成后，用户输入和回复一并记入聊天历史。
+
+        参数:
+            user_input (str): 用户输入的消息
+            session_id (str, optional): 会话的唯一标识符
+
+        返回:
+            Iterator[str]: AI 回复的文本片段
+        """
+        if session_id is None:
+            session_id = self.session_id
+        estimated = self.prepare_history(user_input, session_id)
+
+        chunks = []
+        usage = None
+        for chunk in self.chatbot_with_history.stream(
+            [HumanMessage(content=user_input)],
+            {"configurable": {"session_id": session_id}},
+        ):
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata  # token 用量在最后一个片段中返回
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield chunk.content
+
+        self.report_usage(session_id, usage, estimated)
+        LOG.debug(f"[ChatBot] {''.join(chunks)}")
+
+    async def astream_with_history(self, user_input, session_id=None):
+        """
+        stream_with_history 的异步版本，在事件循环中逐段返回 AI 生成的回复。
+        """
+        if session_id is None:
+            session_id = self.session_id
+        # 折叠聊天历史需要读写历史后端（SQLite 后端的写事务可能等待其他进程释放锁），放到线程中执行，不阻塞事件循环
+        estimated = await asyncio.to_thread(self.prepare_history, user_input, session_id)
+
+        chunks = []
+        usage = None
+        async for chunk in self.chatbot_with_history.astream(
+            [HumanMessage(content=user_input)],
+            {"configurable": {"session_id": session_id}},
+        ):
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata  # token 用量在最后一个片段中返回
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield chunk.content
+
+        self.report_usage(session_id, usage, estimated)
+        LOG.debug(f"[ChatBot] {''.join(chunks)}")
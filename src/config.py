@@ -32,4 +32,35 @@ class Config:
             # 加载内容格式化提示和助手提示
             self.content_formatter_prompt = config.get('content_formatter_prompt', '')
             self.content_assistant_prompt = config.get('content_assistant_prompt', '')
-            self.image_advisor_prompt = config.get('image_advisor_prompt', '')
\ No newline at end of file
+            self.image_advisor_prompt = config.get('image_advisor_prompt', '')
+
+            # 加载图片嵌入分辨率（每英寸像素数），图片会按占位符尺寸和该分辨率缩放后再嵌入演示文稿
+            self.image_dpi = config.get('image_dpi', 150)
+
+            # 是否直接从 zip 中增量解析 docx 文件（不构建完整的文档对象模型），适合非常大的文档
+            self.docx_streaming = config.get('docx_streaming', False)
+
+            # 媒体存储（images/store）的容量上限（MB），超出后按最近最少使用淘汰图片
+            self.media_store_max_mb = config.get('media_store_max_mb', 512)
+            # 幻灯片渲染缓存（Gradio 服务中重复生成时复用未修改的幻灯片）的内存上限（MB），包括幻灯片 XML 和图片数据
+            self.slide_cache_max_mb = config.get('slide_cache_max_mb', 256)
+            # 媒体存储的淘汰保护期（秒），最近使用过的图片即使超出容量上限也不会被淘汰
+            self.media_store_grace_seconds = config.get('media_store_grace_seconds', 300)
+
+            # docx 内容格式化的分块 token 预算（为 0 时不分块）和同时请求的最大分块数，长文档分块后并发格式化，避免输出被截断
+            self.format_chunk_tokens = config.get('format_chunk_tokens', 2000)
+            self.format_max_concurrency = config.get('format_max_concurrency', 4)
+
+            # 多图幻灯片的拆分方式："rules" 在本地按规则拆分，仅规则无法处理的幻灯片调用 LLM；"llm" 整份内容交给 LLM 调整
+            self.content_assistant_mode = config.get('content_assistant_mode', "rules")
+
+            # 加载 LLM 客户端配置（模型、接口地址、超时、连接池大小、重试次数），由所有 LLM 组件共用
+            self.llm = config.get('llm', {})
+
+            # 加载 LLM 回复缓存配置，components 中列出的组件（content_formatter、content_assistant）启用缓存
+            self.llm_cache = config.get('llm_cache', {})
+
+            # 加载聊天历史配置：后端（"memory" 保存在进程内存中，"sqlite" 保存在 path 指定的数据库中，供多个工作进程共享）、
+            # 最多保存的会话数、会话空闲过期时间（分钟）、每个会话保留的消息条数和总字符数，
+            # 以及每轮提示的 token 预算和原样保留的最近对话轮数（更早的对话折叠为摘要）
+            self.chat_history = config.get('chat_history', {})
@@ -1,18 +1,27 @@
 # content_assistant.py
 from abc import ABC, abstractmethod
 
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate  # 导入提示模板相关类
 from langchain_core.messages import HumanMessage  # 导入消息类
 
+from llm_client import get_llm_factory
+from llm_cache import LLMResponseCache, invoke_with_cache, ainvoke_with_cache, batch_with_cache, abatch_with_cache
+from picture_normalizer import Section, normalize_single_picture, join_sections
+from markdown_chunker import strip_title
 from logger import LOG  # 导入日志工具
 
 class ContentAssistant(ABC):
     """
     聊天机器人基类，提供聊天功能。
     """
-    def __init__(self, prompt_file="./prompts/content_assistant.txt"):
+    def __init__(self, prompt_file="./prompts/content_assistant.txt", cache: LLMResponseCache = None,
+                 mode: str = "rules"):
+        if mode not in ("rules", "llm"):
+            raise ValueError(f"不支持的 content_assistant_mode: {mode}")
         self.prompt_file = prompt_file
+        self.cache = cache  # 可选的 LLM 回复缓存，相同的输入和提示直接返回缓存的结果
+        # "rules"：先在本地按规则拆分多图幻灯片，只有规则无法处理的幻灯片才调用 LLM；"llm"：整份内容都交给 LLM 调整
+        self.mode = mode
         self.prompt = self.load_prompt()
         # LOG.debug(f"[Formatter Prompt]{self.prompt}")
         self.create_assistant()
@@ -38,9 +47,7 @@ class ContentAssistant(ABC):
             ("human", "{input}"),  # 消息占位符
         ])
 
-        self.model = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.5,
+        self.model = get_llm_factory().create_chat_model(
             max_tokens=4096,
         )
 
@@ -56,9 +63,69 @@ class ContentAssistant(ABC):
         返回:
             str: 格式化后的 markdown 内容
         """
-        response = self.assistant.invoke({
-            "input": markdown_content,
-        })
+        if self.mode == "rules":
+            sections, inputs = self.normalize(markdown_content)
+            outputs = batch_with_cache(
+                self.cache, self.model, self.prompt, inputs,
+                lambda texts: self.assistant.batch([{"input": text} for text in texts]),
+            ) if inputs else []
+            return self.merge_sections(sections, outputs)
 
-        LOG.debug(f"[Assistant 内容重构后]\n{response.content}")  # 记录调试日志
-        return response.content  # 返回生成的回复内容
\ No newline at end of file
+        content = invoke_with_cache(
+            self.cache, self.model, self.prompt, markdown_content,
+            lambda: self.assistant.invoke({
+                "input": markdown_content,
+            }),
+        )
+
+        LOG.debug(f"[Assistant 内容重构后]\n{content}")  # 记录调试日志
+        return content  # 返回生成的回复内容
+
+    async def aadjust_single_picture(self, markdown_content):
+        """
+        adjust_single_picture 的异步版本，使用 ainvoke 调用模型，等待回复时不占用线程。
+        """
+        if self.mode == "rules":
+            sections, inputs = self.normalize(markdown_content)
+            outputs = await abatch_with_cache(
+                self.cache, self.model, self.prompt, inputs,
+                lambda texts: self.assistant.abatch([{"input": text} for text in texts]),
+            ) if inputs else []
+            return self.merge_sections(sections, outputs)
+
+        content = await ainvoke_with_cache(
+            self.cache, self.model, self.prompt, markdown_content,
+            lambda: self.assistant.ainvoke({
+                "input": markdown_content,
+            }),
+        )
+
+        LOG.debug(f"[Assistant 内容重构后]\n{content}")  # 记录调试日志
+        return content
+
+    def normalize(self, markdown_content):
+        """
+        在本地按规则拆分多图幻灯片，返回 (各部分, 需要交给 LLM 处理的输入列表)。
+        每张有歧义的幻灯片单独作为一个输入（前面加上演示文稿标题），以便把结果放回原来的位置。
+        """
+        title, sections = normalize_single_picture(markdown_content)
+        inputs = [f"# {title}\n\n{section.text}" if title else section.text
+                  for section in sections if section.ambiguous]
+        if inputs:
+            LOG.info(f"[Assistant] {len(inputs)} 张幻灯片无法按规则拆分配图，交给 LLM 调整")
+        return sections, inputs
+
+    def merge_sections(self, sections, outputs):
+        """
+        用 LLM 的调整结果（去掉演示文稿标题）按顺序替换有歧义的幻灯片，返回完整的 markdown 内容。
+        """
+        outputs = iter(outputs)
+        merged = []
+        for section in sections:
+            if section.ambiguous:
+                section = Section(strip_title(next(outputs))[1] + '\n\n', False)
+            merged.append(section)
+        content = join_sections(merged)
+
+        LOG.debug(f"[Assistant 内容重构后]\n{content}")  # 记录调试日志
+        return content
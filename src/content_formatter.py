@@ -1,19 +1,26 @@
 # content_formatter.py
 from abc import ABC, abstractmethod
 
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder  # 导入提示模板相关类
 from langchain_core.messages import HumanMessage  # 导入消息类
 from langchain_core.runnables.history import RunnableWithMessageHistory  # 导入带有消息历史的可运行类
 
+from llm_client import get_llm_factory
+from llm_cache import LLMResponseCache, invoke_with_cache, ainvoke_with_cache, batch_with_cache, abatch_with_cache
+from markdown_chunker import split_markdown_sections, merge_formatted_chunks
 from logger import LOG  # 导入日志工具
 
 class ContentFormatter(ABC):
     """
     聊天机器人基类，提供聊天功能。
     """
-    def __init__(self, prompt_file="./prompts/content_formatter.txt"):
+    def __init__(self, prompt_file="./prompts/content_formatter.txt", cache: LLMResponseCache = None,
+                 chunk_tokens: int = 0, max_concurrency: int = 4):
         self.prompt_file = prompt_file
+        self.cache = cache  # 可选的 LLM 回复缓存，相同的输入和提示直接返回缓存的结果
+        # 分块格式化：原始内容超过 chunk_tokens 时在标题处切分，最多 max_concurrency 个分块同时请求；为 0 时不切分
+        self.chunk_tokens = chunk_tokens
+        self.max_concurrency = max_concurrency
         self.prompt = self.load_prompt()
         # LOG.debug(f"[Formatter Prompt]{self.prompt}")
         self.create_formatter()
@@ -39,9 +46,7 @@ class ContentFormatter(ABC):
             ("human", "{input}"),  # 消息占位符
         ])
         
-        self.model = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.5,
+        self.model = get_llm_factory().create_chat_model(
             max_tokens=4096,
         )
         
@@ -58,9 +63,80 @@ class ContentFormatter(ABC):
         返回:
             str: 格式化后的 markdown 内容
         """
-        response = self.formatter.invoke({
-            "input": raw_content,
-        })
+        title, chunks = self.split(raw_content)
+        if len(chunks) > 1:
+            return self.format_chunks(title, chunks)
 
-        LOG.debug(f"[Formmater 格式化后]\n{response.content}")  # 记录调试日志
-        return response.content  # 返回生成的回复内容
\ No newline at end of file
+        content = invoke_with_cache(
+            self.cache, self.model, self.prompt, raw_content,
+            lambda: self.formatter.invoke({
+                "input": raw_content,
+            }),
+        )
+
+        LOG.debug(f"[Formmater 格式化后]\n{content}")  # 记录调试日志
+        return content  # 返回生成的回复内容
+
+    async def aformat(self, raw_content):
+        """
+        format 的异步版本，使用 ainvoke 调用模型，等待回复时不占用线程。
+        """
+        title, chunks = self.split(raw_content)
+        if len(chunks) > 1:
+            return await self.aformat_chunks(title, chunks)
+
+        content = await ainvoke_with_cache(
+            self.cache, self.model, self.prompt, raw_content,
+            lambda: self.formatter.ainvoke({
+                "input": raw_content,
+            }),
+        )
+
+        LOG.debug(f"[Formmater 格式化后]\n{content}")  # 记录调试日志
+        return content
+
+    def split(self, raw_content):
+        """
+        按 chunk_tokens 将原始内容切分为分块，返回 (演示文稿标题, 分块列表)。未启用分块时返回 (None, [])。
+        """
+        if not self.chunk_tokens:
+            return None, []
+        return split_markdown_sections(raw_content, self.chunk_tokens)
+
+    def chunk_inputs(self, title, chunks):
+        # 每个分块前加上演示文稿标题，使模型按同一主题格式化各部分
+        return [f"# {title}\n\n{chunk}" if title else chunk for chunk in chunks]
+
+    def format_chunks(self, title, chunks):
+        """
+        分块格式化：各分块以最多 max_concurrency 个并发请求格式化，再按原有顺序合并为一份大纲。
+        """
+        LOG.info(f"[Formmater] 原始内容较长，分为 {len(chunks)} 块格式化")
+        outputs = batch_with_cache(
+            self.cache, self.model, self.prompt, self.chunk_inputs(title, chunks),
+            lambda texts: self.formatter.batch(
+                [{"input": text} for text in texts],
+                config={"max_concurrency": self.max_concurrency},
+            ),
+        )
+        content = merge_formatted_chunks(outputs, title)
+
+        LOG.debug(f"[Formmater 格式化后]\n{content}")  # 记录调试日志
+        return content
+
+    async def aformat_chunks(self, title, chunks):
+        """
+        format_chunks 的异步版本。
+        """
+        LOG.info(f"[Formmater] 原始内容较长，分为 {len(chunks)} 块格式化")
+        outputs = await abatch_with_cache(
+            self.cache, self.model, self.prompt, self.chunk_inputs(title, chunks),
+            lambda texts: self.formatter.abatch(
+                [{"input": text} for text in texts],
+                config={"max_concurrency": self.max_concurrency},
+            ),
+        )
+        content = merge_formatted_chunks(outputs, title)
+
+        LOG.debug(f"[Formmater 格式化后]\n{content}")  # 记录调试日志
+        return content
@@ -1,21 +1,58 @@
-from typing import Optional, List
+from typing import Optional, List, Union
 from dataclasses import dataclass, field
 
+# 定义 BulletPoint 数据类，表示一个要点的文本和层级。
+# 使用 __slots__ 代替每个要点一个字典，大型演示文稿常驻内存时占用更少；
+# 同时支持 point["text"] 形式的读取，并可与 {'text': ..., 'level': ...} 字典比较，兼容原有的字典表示。
+@dataclass(slots=True, eq=False)
+class BulletPoint:
+    text: str  # 要点文本
+    level: int = 0  # 要点层级，0 为一级
+
+    @classmethod
+    def from_value(cls, value: Union["BulletPoint", dict]) -> "BulletPoint":
+        if isinstance(value, BulletPoint):
+            return value
+        return cls(text=value['text'], level=value.get('level', 0))
+
+    def __getitem__(self, key: str):
+        if key == 'text':
+            return self.text
+        if key == 'level':
+            return self.level
+        raise KeyError(key)
+
+    def to_dict(self) -> dict:
+        return {'text': self.text, 'level': self.level}
+
+    def __eq__(self, other):
+        if isinstance(other, BulletPoint):
+            return self.text == other.text and self.level == other.level
+        if isinstance(other, dict):
+            return other == self.to_dict()
+        return NotImplemented
+
 # 定义 SlideContent 数据类，表示幻灯片的内容，包括标题、要点列表（支持多级），图片路径
-@dataclass
+@dataclass(slots=True)
 class SlideContent:
     title: str  # 幻灯片的标题
-    bullet_points: List[dict] = field(default_factory=list)  # 要点列表，包含每个要点的文本和层级
+    bullet_points: List[BulletPoint] = field(default_factory=list)  # 要点列表，包含每个要点的文本和层级
     image_path: Optional[str] = None  # 图片路径，默认为 None
+
+    def __post_init__(self):
+        # 兼容以字典列表传入的要点
+        if any(not isinstance(point, BulletPoint) for point in self.bullet_points):
+            self.bullet_points = [BulletPoint.from_value(point) for point in self.bullet_points]
+
 # 定义 Slide 数据类，表示每张幻灯片，包括布局 ID、布局名称以及幻灯片内容。
-@dataclass
+@dataclass(slots=True)
 class Slide:
     layout_id: int  # 布局 ID，对应 PowerPoint 模板中的布局
     layout_name: str  # 布局名称
     content: SlideContent  # 幻灯片的内容，类型为 SlideContent
 
 # 定义 PowerPoint 数据类，表示整个 PowerPoint 演示文稿，包括标题和幻灯片列表。
-@dataclass
+@dataclass(slots=True)
 class PowerPoint:
     title: str  # PowerPoint 演示文稿的标题
     slides: List[Slide] = field(default_factory=list)  # 幻灯片列表，默认为空列表
@@ -32,10 +69,8 @@ class PowerPoint:
             if slide.content.bullet_points:
                 bullet_point_strs = []
                 for bullet_point in slide.content.bullet_points:
-                    text = bullet_point['text']  # 要点文本
-                    level = bullet_point['level']  # 要点层级
-                    indent = '  ' * level  # 根据层级设置缩进
-                    bullet_point_strs.append(f"{indent}- {text}")
+                    indent = '  ' * bullet_point.level  # 根据层级设置缩进
+                    bullet_point_strs.append(f"{indent}- {bullet_point.text}")
                 result.append("  Bullet Points:\n" + "\n".join(bullet_point_strs))  # 打印格式化后的项目符号
 
             # 打印图片路径
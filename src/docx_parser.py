@@ -1,109 +1,369 @@
 import os
+import posixpath
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from lxml import etree
 from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
 from docx.oxml.ns import qn
+from docx.oxml.parser import element_class_lookup
+from docx.styles import BabelFish
 from PIL import Image
 from io import BytesIO
 
+from media_store import MediaStore, media_store
 from logger import LOG  # 引入日志模块，用于记录调试信息
 
-def is_paragraph_list_item(paragraph):
+def is_list_style(style_name: str) -> bool:
     """
-    检查段落是否为列表项。
-    判断依据是段落的样式名称是否包含 'list bullet' 或 'list number'，
+    判断样式名称是否为列表样式：包含 'list bullet' 或 'list number'，
     分别对应项目符号列表和编号列表。
     """
-    style_name = paragraph.style.name.lower()
+    style_name = style_name.lower()
     return 'list bullet' in style_name or 'list number' in style_name
 
-def get_paragraph_list_level(paragraph):
+def get_list_style_level(style_name: str) -> int:
     """
-    获取段落的列表级别（缩进层级）。
-    首先尝试通过 XML 结构判断，如果无法获取，则通过样式名称中的数字判断。
+    通过样式名称中的数字判断列表级别，例如 'List Bullet 2' 为第 1 级（从 0 开始）。
+    """
+    for word in style_name.lower().split():
+        if word.isdigit():
+            return int(word) - 1
+    return 0
+
+def get_numbering_level(p) -> Optional[int]:
+    """
+    通过段落 XML 元素（w:p）中的编号属性（w:numPr/w:ilvl）获取列表级别，没有时返回 None。
     """
-    p = paragraph._p
     numPr = p.find(qn('w:numPr'))
     if numPr is not None:
         ilvl = numPr.find(qn('w:ilvl'))
         if ilvl is not None:
             return int(ilvl.get(qn('w:val')))
-    
-    style_name = paragraph.style.name.lower()
-    if 'list bullet' in style_name or 'list number' in style_name:
-        for word in style_name.split():
-            if word.isdigit():
-                return int(word) - 1
+    return None
+
+def is_paragraph_list_item(paragraph):
+    """
+    检查段落是否为列表项。
+    判断依据是段落的样式名称是否包含 'list bullet' 或 'list number'，
+    分别对应项目符号列表和编号列表。
+    """
+    return is_list_style(paragraph.style.name)
+
+def get_paragraph_list_level(paragraph):
+    """
+    获取段落的列表级别（缩进层级）。
+    首先尝试通过 XML 结构判断，如果无法获取，则通过样式名称中的数字判断。
+    """
+    level = get_numbering_level(paragraph._p)
+    if level is not None:
+        return level
+
+    style_name = paragraph.style.name
+    if is_list_style(style_name):
+        return get_list_style_level(style_name)
     return 0
 
-def generate_markdown_from_docx(docx_filename):
+# 段落样式信息：(标题级别或 None, 是否为列表样式, 样式名称对应的列表级别)
+StyleInfo = Tuple[Optional[int], bool, int]
+
+def get_style_info(style_name: str) -> StyleInfo:
     """
-    从指定的 docx 文件生成 Markdown 格式的内容，并将所有图像另存为文件并插入 Markdown 内容中。
-    支持标题、列表项、图像和普通段落的转换。
+    根据段落样式名称计算其 Markdown 格式信息。
     """
-    # 获取 docx 文件的基本名称，用于创建图像文件夹
-    docx_basename = os.path.splitext(os.path.basename(docx_filename))[0]
-    images_dir = f'images/{docx_basename}/'
-    if not os.path.exists(images_dir):
-        os.makedirs(images_dir)  # 如果目录不存在，则创建
+    # 确定标题级别
+    if style_name == 'Title':
+        heading_level = 1
+    elif 'Heading' in style_name:
+        heading_level = int(style_name.replace('Heading ', '')) + 1
+    else:
+        heading_level = None
 
-    document = Document(docx_filename)  # 打开 docx 文件
-    markdown_content = ''
-    image_counter = 1  # 图像编号计数器
+    is_list = is_list_style(style_name)
+    return heading_level, is_list, get_list_style_level(style_name) if is_list else 0
+
+# 浏览器和 PowerPoint 均可直接使用的图像格式及其扩展名，这些格式的图像按原始数据写入，不重新编码
+WEB_IMAGE_FORMATS = {'PNG': '.png', 'JPEG': '.jpg', 'GIF': '.gif'}
+
+# 矢量图像格式（PIL 将 WMF 和 EMF 都识别为 'WMF'）：PIL 只能读取文件头，在非 Windows 平台上无法解码，
+# 按原始数据以原扩展名（.wmf/.emf）保存，PowerPoint 可直接嵌入
+VECTOR_IMAGE_FORMATS = {'WMF'}
+
+# 图像的最大像素尺寸：16:9 幻灯片（13.33 x 7.5 英寸）按 150 dpi 计算，更大的图像在提取时缩小
+MAX_IMAGE_SIZE = (2000, 1125)
+
+# 提取图像的线程数。图像解码和编码的主要开销在 PIL 的 C 代码中，会释放 GIL
+IMAGE_WORKERS = min(4, os.cpu_count() or 1)
+
+def identify_image(image_bytes: bytes) -> Optional[Tuple[str, Tuple[int, int]]]:
+    """
+    读取图像头信息，返回 (PIL 格式名称, 像素尺寸)；无法识别时返回 None。只解析文件头，不解码像素。
+    """
+    try:
+        with Image.open(BytesIO(image_bytes)) as image:
+            return image.format, image.size
+    except Exception:
+        return None
 
-    for para in document.paragraphs:
-        style = para.style.name  # 获取段落样式名称
-        text = para.text.strip()  # 获取段落文本并去除首尾空格
+def image_extension(image_bytes: bytes, image_format: str) -> str:
+    """
+    返回图像保存时使用的扩展名：网页可用格式使用其扩展名，矢量图像保持 .wmf/.emf，其余格式转码后保存为 .png。
+    """
+    if image_format in VECTOR_IMAGE_FORMATS:
+        return '.emf' if image_bytes[40:44] == b' EMF' else '.wmf'
+    return WEB_IMAGE_FORMATS.get(image_format, '.png')
+
+def encode_image(image_bytes: bytes, image_format: str, image_size: Tuple[int, int]) -> bytes:
+    """
+    返回从 docx 中提取的图像应保存的数据。
+    PNG/JPEG/GIF 且不超过 MAX_IMAGE_SIZE 时直接使用原始数据；
+    超过尺寸时按比例缩小并以原格式重新编码；矢量图像（WMF/EMF）直接使用原始数据；其他格式（如 BMP、TIFF）转码为 PNG。
+    """
+    if image_format in VECTOR_IMAGE_FORMATS:
+        return image_bytes
+    fits = image_size[0] <= MAX_IMAGE_SIZE[0] and image_size[1] <= MAX_IMAGE_SIZE[1]
+    if image_format in WEB_IMAGE_FORMATS and fits:
+        return image_bytes
+
+    buffer = BytesIO()
+    with Image.open(BytesIO(image_bytes)) as image:
+        if image_format == 'JPEG':
+            image.draft('RGB', MAX_IMAGE_SIZE)  # JPEG 解码时直接按比例缩小，减少解码开销
+        if not fits:
+            image.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        if image_format == 'JPEG':
+            image.convert('RGB').save(buffer, 'JPEG', quality=85)
+        elif image_format == 'GIF':
+            image.save(buffer, 'GIF')
+        else:
+            if image.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P', '1'):
+                image = image.convert('RGBA')  # CMYK 等 PNG 不支持的模式先转换
+            image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+def save_image(image_bytes: bytes, image_format: str, image_size: Tuple[int, int], image_path: str, store: MediaStore):
+    """
+    将图像按 encode_image 处理后写入媒体存储中的 image_path。
+    """
+    store.write(image_path, encode_image(image_bytes, image_format, image_size))
+
+def _iter_paragraphs_markdown(paragraphs: Iterable, get_style_name: Callable[[Optional[str]], str],
+                              get_image_bytes: Callable[[str], bytes], store: MediaStore) -> Iterator[str]:
+    """
+    将段落 XML 元素（w:p）逐个转换为 Markdown 片段。
+    get_style_name 根据样式 ID 返回样式名称，get_image_bytes 根据关系 ID 返回图像数据，
+    使同一转换逻辑既可用于 python-docx 的对象模型，也可用于直接从 zip 增量解析。
+    图像以原始数据的内容哈希命名保存到媒体存储中，已存在的图像不再重复处理；
+    图像的保存在线程池中与文本转换并行进行，图像链接及其后的片段在图像保存完成后才产出，
+    保存失败的图像不产出链接，返回的 Markdown 中引用的图像文件均已存在。
+    """
+    executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix='docx-image')
+    pending = deque()  # 等待产出的片段：Markdown 文本，或 (图像路径, 写入任务，图像已存在时为 None)
+    image_counter = 1  # 图像编号计数器，只为实际产出的图像链接编号
+
+    def flush(wait: bool) -> Iterator[str]:
+        # 按顺序产出已就绪的片段，遇到未完成的图像写入任务时停止（wait 为 True 时等待其完成）
+        nonlocal image_counter
+        while pending:
+            item = pending[0]
+            if isinstance(item, tuple):
+                image_path, future = item
+                if future is not None and not wait and not future.done():
+                    return
+                error = future.exception() if future is not None else None
+                if error is None:
+                    yield f'![图片{image_counter}]({image_path})\n\n'
+                    image_counter += 1
+                else:
+                    LOG.error(f"图像 '{image_path}' 保存失败，已移除该图像链接: {error}")
+            else:
+                yield item
+            pending.popleft()
+
+    try:
+        for item in _convert_paragraphs(paragraphs, get_style_name, get_image_bytes, store, executor):
+            pending.append(item)
+            yield from flush(wait=False)
+        yield from flush(wait=True)
+    finally:
+        executor.shutdown(wait=True)
+
+def _convert_paragraphs(paragraphs, get_style_name, get_image_bytes, store, executor) -> Iterator:
+    """
+    逐段产出 Markdown 片段；遇到图像时提交保存任务到 executor，并产出 (图像路径, 写入任务) 代替图像链接。
+    """
+    submitted = {}  # 已提交保存任务的图像路径 -> 写入任务
+
+    # 样式名称需要在样式表中查找，开销较大；按样式 ID 缓存，每种样式只解析一次
+    style_cache: Dict[Optional[str], StyleInfo] = {}
+
+    for p in paragraphs:
+        runs = p.r_lst
+        text = p.text.strip()  # 获取段落文本并去除首尾空格
 
         # 如果段落为空且没有任何运行对象，则跳过
-        if not text and not para.runs:
+        if not text and not runs:
             continue
 
         # 检查段落类型：标题、列表项、普通段落
-        is_heading = 'Heading' in style
-        is_title = style == 'Title'
-        is_list = is_paragraph_list_item(para)
-        list_level = get_paragraph_list_level(para) if is_list else 0
-
-        # 确定标题级别
-        if is_title:
-            heading_level = 1
-        elif is_heading:
-            heading_level = int(style.replace('Heading ', '')) + 1
-        else:
-            heading_level = None
+        style_id = p.style
+        style_info = style_cache.get(style_id)
+        if style_info is None:
+            style_info = style_cache[style_id] = get_style_info(get_style_name(style_id))
+        heading_level, is_list, list_level = style_info
+        if is_list:
+            numbering_level = get_numbering_level(p)
+            if numbering_level is not None:
+                list_level = numbering_level
 
         # 检查段落中的每个运行，寻找并保存图像
-        for run in para.runs:
+        for run in runs:
             # 查找 w:drawing 标签中的图像
-            drawings = run.element.findall('.//w:drawing', namespaces={'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'})
-            for drawing in drawings:
+            for drawing in run.iter(qn('w:drawing')):
                 # 查找图像的关系 ID
-                blips = drawing.findall('.//a:blip', namespaces={'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
-                for blip in blips:
-                    rId = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                    image_part = document.part.related_parts[rId]
-                    image_bytes = image_part.blob  # 获取图像数据
-                    image_filename = f'{image_counter}.png'
-                    image_path = os.path.join(images_dir, image_filename)
-                    
-                    # 使用 PIL 保存图像为 PNG 格式
-                    image = Image.open(BytesIO(image_bytes))
-                    if image.mode in ('RGBA', 'P', 'LA'):
-                        image = image.convert('RGB')  # 将图像转换为 RGB 模式，以兼容 PNG 格式
-                    image.save(image_path, 'PNG')
-
-                    # 在 Markdown 中添加图像链接
-                    markdown_content += f'![图片{image_counter}]({image_path})\n\n'
-                    image_counter += 1
+                for blip in drawing.iter(qn('a:blip')):
+                    image_bytes = get_image_bytes(blip.get(qn('r:embed')))  # 获取图像数据
+                    image_info = identify_image(image_bytes)
+                    if image_info is None:
+                        LOG.warning("无法识别图像的格式，已跳过")
+                        continue
+                    image_format, image_size = image_info
+                    image_path = store.path_for(store.digest(image_bytes), image_extension(image_bytes, image_format))
+
+                    # 存储中没有该图像时，在线程池中写入和转码，文本转换继续向下处理；文档中重复的图像只处理一次
+                    future = submitted.get(image_path)
+                    if future is None and store.get(image_path) is None:
+                        future = submitted[image_path] = executor.submit(save_image, image_bytes, image_format, image_size, image_path, store)
+
+                    # 在 Markdown 中添加图像链接（图像保存成功后才产出）
+                    yield image_path, future
 
         # 根据段落类型格式化文本内容
         if heading_level:
-            markdown_content += f'{"#" * heading_level} {text}\n\n'  # 使用 Markdown 语法表示标题
+            yield f'{"#" * heading_level} {text}\n\n'  # 使用 Markdown 语法表示标题
         elif is_list:
-            markdown_content += f'{"  " * list_level}- {text}\n'  # 使用缩进和 “-” 表示列表项
+            yield f'{"  " * list_level}- {text}\n'  # 使用缩进和 “-” 表示列表项
         elif text:
-            markdown_content += f'{text}\n\n'  # 普通段落直接添加文本
+            yield f'{text}\n\n'  # 普通段落直接添加文本
+
+def iter_markdown_from_docx(docx_filename: str, store: Optional[MediaStore] = None) -> Iterator[str]:
+    """
+    使用 python-docx 打开 docx 文件，逐段产出 Markdown 片段，并将所有图像另存为文件、在相应位置插入图像链接。
+    支持标题、列表项、图像和普通段落的转换。
+    """
+    document = Document(docx_filename)  # 打开 docx 文件
+    part = document.part
+    related_parts = part.related_parts
+
+    yield from _iter_paragraphs_markdown(
+        (para._p for para in document.paragraphs),
+        lambda style_id: part.get_style(style_id, WD_STYLE_TYPE.PARAGRAPH).name,
+        lambda rId: related_parts[rId].blob,
+        store if store is not None else media_store,
+    )
+
+def _resolve_part_name(base_dir: str, target: str) -> str:
+    """
+    将关系中的目标路径转换为 zip 中的成员名称。
+    """
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(base_dir, target))
+
+def _read_relationships(docx_zip: zipfile.ZipFile, part_name: str) -> Dict[str, str]:
+    """
+    读取某个部件的关系文件，返回 {关系 ID: zip 中的成员名称}，忽略外部链接。
+    """
+    base_dir, filename = posixpath.split(part_name)
+    rels_name = posixpath.join(base_dir, '_rels', f'{filename}.rels')
+    if rels_name not in docx_zip.namelist():
+        return {}
+    root = etree.fromstring(docx_zip.read(rels_name))
+    return {
+        rel.get('Id'): _resolve_part_name(base_dir, rel.get('Target'))
+        for rel in root
+        if rel.get('TargetMode') != 'External'
+    }
+
+def _read_paragraph_style_names(docx_zip: zipfile.ZipFile, styles_part: Optional[str]) -> Tuple[Dict[str, str], str]:
+    """
+    读取样式表，返回 {段落样式 ID: 样式名称} 和默认段落样式的名称。样式名称与 python-docx 的 style.name 一致。
+    """
+    names, default_name = {}, 'Normal'
+    if styles_part is None or styles_part not in docx_zip.namelist():
+        return names, default_name
+    root = etree.fromstring(docx_zip.read(styles_part))
+    for style in root.iter(qn('w:style')):
+        if style.get(qn('w:type')) != 'paragraph':
+            continue
+        name_element = style.find(qn('w:name'))
+        name = BabelFish.internal2ui(name_element.get(qn('w:val'))) if name_element is not None else ''
+        names[style.get(qn('w:styleId'))] = name
+        if style.get(qn('w:default')) in ('1', 'true', 'on'):
+            default_name = name
+    return names, default_name
+
+def _iter_body_paragraphs(source) -> Iterator:
+    """
+    增量解析 document.xml，依次产出正文中的段落元素（w:p）。
+    每个正文元素处理完后立即释放，解析过程中只保留当前段落，内存占用不随文档大小增长。
+    表格等非段落的正文元素与 python-docx 的 document.paragraphs 一致，直接跳过。
+    """
+    body_tag = qn('w:body')
+    paragraph_tag = qn('w:p')
+    context = etree.iterparse(source, events=('end',), tag=(paragraph_tag, qn('w:tbl'), qn('w:sectPr')))
+    # 使用 python-docx 的元素类，段落元素可直接使用 .text、.style、.r_lst 等属性
+    context.set_element_class_lookup(element_class_lookup)
+
+    for _, element in context:
+        parent = element.getparent()
+        if parent is None or parent.tag != body_tag:
+            continue  # 表格、文本框中的段落随其所属的正文元素一起释放
+        if element.tag == paragraph_tag:
+            yield element
+        # 释放已处理的正文元素
+        element.clear()
+        while element.getprevious() is not None:
+            del parent[0]
+
+def iter_markdown_from_docx_zip(docx_filename: str, store: Optional[MediaStore] = None) -> Iterator[str]:
+    """
+    不构建 python-docx 对象模型，直接从 docx 的 zip 包中增量解析 word/document.xml，
+    逐段产出 Markdown 片段；图像在遇到时才从 zip 中读取。输出与 iter_markdown_from_docx 相同。
+    """
+    with zipfile.ZipFile(docx_filename) as docx_zip:
+        # 通过包关系找到主文档部件（通常为 word/document.xml）
+        package_rels = etree.fromstring(docx_zip.read('_rels/.rels'))
+        document_part = next(
+            (rel.get('Target').lstrip('/') for rel in package_rels if rel.get('Type', '').endswith('/officeDocument')),
+            'word/document.xml',
+        )
+        relationships = _read_relationships(docx_zip, document_part)
+        styles_part = next((name for name in relationships.values() if posixpath.basename(name) == 'styles.xml'), None)
+        style_names, default_style_name = _read_paragraph_style_names(docx_zip, styles_part)
+
+        with docx_zip.open(document_part) as source:
+            yield from _iter_paragraphs_markdown(
+                _iter_body_paragraphs(source),
+                lambda style_id: style_names.get(style_id, default_style_name) if style_id else default_style_name,
+                lambda rId: docx_zip.read(relationships[rId]),
+                store if store is not None else media_store,
+            )
+
+def generate_markdown_from_docx(docx_filename, streaming: bool = False, store: Optional[MediaStore] = None):
+    """
+    从指定的 docx 文件生成 Markdown 格式的内容，并将所有图像保存到媒体存储（默认为全局的 media_store）并插入 Markdown 内容中。
+    各片段逐段产出，最后一次性拼接。streaming 为 True 时直接从 zip 中增量解析，内存占用不随文档大小增长。
+    """
+    if streaming:
+        fragments = iter_markdown_from_docx_zip(docx_filename, store)
+    else:
+        fragments = iter_markdown_from_docx(docx_filename, store)
+    markdown_content = ''.join(fragments)
 
-     # 记录调试信息
+    # 记录调试信息
     LOG.debug(f"从 docx 文件解析的 markdown 内容:\n{markdown_content}")
 
     return markdown_content
@@ -1,21 +1,32 @@
 import gradio as gr
 import os
+import time
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 from gradio.data_classes import FileData
 
 from config import Config
 from chatbot import ChatBot
+from history_policy import HistoryPolicy
 from content_formatter import ContentFormatter
 from content_assistant import ContentAssistant
 from image_advisor import ImageAdvisor
 from input_parser import parse_input_text
 from ppt_generator import generate_presentation
-from template_manager import load_template, get_layout_mapping
+from slide_cache import SlideRenderCache
+from image_embedder import ImageEmbedder
+from template_cache import template_cache
 from layout_manager import LayoutManager
+from utils import sanitize_filename, remove_expired_request_dirs
 from logger import LOG
 from openai_whisper import asr, transcribe
 # from minicpm_v_model import chat_with_image
-from docx_parser import generate_markdown_from_docx
+from pipeline import Pipeline
+from build_cache import BuildCache
+from llm_cache import get_llm_cache
+from media_store import configure_media_store
 
 
 os.environ["LANGCHAIN_TRACING_V2"] = "true"
@@ -23,20 +34,44 @@ os.environ["LANGCHAIN_PROJECT"] = "ChatPPT"
 
 # 实例化 Config，加载配置文件
 config = Config()
-chatbot = ChatBot(config.chatbot_prompt)
-content_formatter = ContentFormatter(config.content_formatter_prompt)
-content_assistant = ContentAssistant(config.content_assistant_prompt)
+configure_media_store(config)  # 媒体存储（docx 图片、检索到的配图）的容量上限和淘汰保护期取自配置
+chatbot = ChatBot(config.chatbot_prompt, history_policy=HistoryPolicy.from_config(config))
+content_formatter = ContentFormatter(config.content_formatter_prompt, get_llm_cache(config, "content_formatter"),
+                                     config.format_chunk_tokens, config.format_max_concurrency)
+content_assistant = ContentAssistant(config.content_assistant_prompt, get_llm_cache(config, "content_assistant"),
+                                     config.content_assistant_mode)
 image_advisor = ImageAdvisor(config.image_advisor_prompt)
 
-# 加载 PowerPoint 模板，并获取可用布局
-ppt_template = load_template(config.ppt_template)
+# docx 转换流水线：原始 markdown 和 LLM 处理结果按 docx 内容哈希和提示哈希持久化缓存，重复上传的文件直接返回
+docx_pipeline = Pipeline(config, BuildCache(), content_formatter=content_formatter, content_assistant=content_assistant)
 
-# 初始化 LayoutManager，管理幻灯片布局
-layout_manager = LayoutManager(get_layout_mapping(ppt_template))
+# 预加载 PowerPoint 模板到模板缓存（生成演示文稿时直接复用），并初始化 LayoutManager 管理幻灯片布局
+layout_manager = LayoutManager(template_cache.get_layout_mapping(config.ppt_template))
 
+# 幻灯片渲染缓存：用户反复点击生成时，只重建内容有变化的幻灯片
+slide_cache = SlideRenderCache(max_bytes=config.slide_cache_max_mb * 1024 * 1024)
 
-# 定义生成幻灯片内容的函数
-def generate_contents(message, history):
+# 图片嵌入处理器：按占位符尺寸和配置的分辨率缩放图片，并在多次生成之间复用处理结果
+image_embedder = ImageEmbedder(dpi=config.image_dpi)
+
+# 处理函数均为异步函数，等待 LLM、图片检索时不占用线程；解析和渲染演示文稿等 CPU 密集的工作交给专用线程池，
+# 线程数固定，不随并发会话数增长
+RENDER_WORKERS = min(4, os.cpu_count() or 1)
+render_executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="render")
+
+# 每次生成请求的输出目录（outputs/<uuid>）的保留时间（秒）和清理间隔（秒）。
+# 返回给界面的文件由 Gradio 复制到它自己的缓存目录中，过期的请求目录可以直接删除
+OUTPUT_DIR = "outputs"
+OUTPUT_TTL = 3600
+OUTPUT_CLEANUP_INTERVAL = 300
+_last_output_cleanup = 0.0
+
+# 每个事件允许同时处理的请求数（Gradio 默认为 1，会使异步处理函数排队执行）
+CONCURRENCY_LIMIT = 64
+
+
+# 定义生成幻灯片内容的函数（生成器：逐步返回已生成的内容，聊天窗口随模型输出实时更新）
+async def generate_contents(message, history, request: gr.Request):
     try:
         # 初始化一个列表，用于收集用户输入的文本和音频转录
         texts = []
@@ -53,7 +88,7 @@ def generate_contents(message, history):
             file_ext = os.path.splitext(uploaded_file)[1].lower()
             if file_ext in ('.wav', '.flac', '.mp3'):
                 # 使用 OpenAI Whisper 模型进行语音识别
-                audio_text = asr(uploaded_file)
+                audio_text = await asyncio.to_thread(asr, uploaded_file)
                 texts.append(audio_text)
             # 解释说明图像文件
             # elif file_ext in ('.jpg', '.png', '.jpeg'):
@@ -64,10 +99,9 @@ def generate_contents(message, history):
             #     return image_desc
             # 使用 Docx 文件作为素材创建 PowerPoint
             elif file_ext in ('.docx', '.doc'):
-                # 调用 generate_markdown_from_docx 函数，获取 markdown 内容
-                raw_content = generate_markdown_from_docx(uploaded_file)
-                markdown_content = content_formatter.format(raw_content)
-                return content_assistant.adjust_single_picture(markdown_content)
+                # 解析 docx 并经 LLM 格式化和调整配图；重复上传相同内容的文件时直接返回缓存结果
+                yield await docx_pipeline.aconvert_docx(uploaded_file)
+                return
             else:
                 LOG.debug(f"[格式不支持]: {uploaded_file}")
 
@@ -75,22 +109,25 @@ def generate_contents(message, history):
         user_requirement = "需求如下:\n" + "\n".join(texts)
         LOG.info(user_requirement)
 
-        # 与聊天机器人进行对话，生成幻灯片内容
-        slides_content = chatbot.chat_with_history(user_requirement)
-
-        return slides_content
+        # 与聊天机器人进行对话，流式生成幻灯片内容
+        slides_content = ""
+        # 每个浏览器会话使用独立的聊天历史
+        session_id = request.session_hash if request else None
+        async for chunk in chatbot.astream_with_history(user_requirement, session_id):
+            slides_content += chunk
+            yield slides_content
     except Exception as e:
         LOG.error(f"[内容生成错误]: {e}")
         # 抛出 Gradio 错误，以便在界面上显示友好的错误信息
         raise gr.Error(f"网络问题，请重试:)")
         
 
-def handle_image_generate(history):
+async def handle_image_generate(history):
     try:
         # 获取聊天记录中的最新内容
         slides_content = history[-1]["content"]
 
-        content_with_images, image_pair = image_advisor.generate_images(slides_content)
+        content_with_images, image_pair = await image_advisor.agenerate_images(slides_content)
         
         # for k, v in image_pair.items():
         #     history.append(
@@ -108,19 +145,35 @@ def handle_image_generate(history):
         # 提示用户先输入主题内容或上传文件
         raise gr.Error(f"【提示】未找到合适配图，请重试！")
 
+def render_presentation(slides_content):
+    """
+    解析幻灯片内容并渲染演示文稿，返回输出文件路径。在 render_executor 中执行。
+    """
+    # 解析输入文本，生成幻灯片数据和演示文稿标题
+    powerpoint_data, presentation_title = parse_input_text(slides_content, layout_manager)
+    # 定期删除过期的请求输出目录，避免磁盘占用持续增长
+    global _last_output_cleanup
+    now = time.time()
+    if now - _last_output_cleanup >= OUTPUT_CLEANUP_INTERVAL:
+        _last_output_cleanup = now
+        remove_expired_request_dirs(OUTPUT_DIR, OUTPUT_TTL)
+
+    # 定义输出的 PowerPoint 文件路径：每次请求使用独立目录，避免同名演示文稿相互覆盖
+    output_dir = os.path.join(OUTPUT_DIR, uuid.uuid4().hex)
+    os.makedirs(output_dir, exist_ok=True)
+    output_pptx = os.path.join(output_dir, f"{sanitize_filename(presentation_title)}.pptx")
+
+    # 生成 PowerPoint 演示文稿
+    generate_presentation(powerpoint_data, config.ppt_template, output_pptx, slide_cache, image_embedder)
+    return output_pptx
+
 # 定义处理生成按钮点击事件的函数
-def handle_generate(history):
+async def handle_generate(history):
     try:
         # 获取聊天记录中的最新内容
         slides_content = history[-1]["content"]
-        # 解析输入文本，生成幻灯片数据和演示文稿标题
-        powerpoint_data, presentation_title = parse_input_text(slides_content, layout_manager)
-        # 定义输出的 PowerPoint 文件路径
-        output_pptx = f"outputs/{presentation_title}.pptx"
-        
-        # 生成 PowerPoint 演示文稿
-        generate_presentation(powerpoint_data, config.ppt_template, output_pptx)
-        return output_pptx
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(render_executor, render_presentation, slides_content)
     except Exception as e:
         LOG.error(f"[PPT 生成错误]: {e}")
         # 提示用户先输入主题内容或上传文件
@@ -184,7 +237,7 @@ with gr.Blocks(
 # 主程序入口
 if __name__ == "__main__":
     # 启动Gradio应用，允许队列功能，并通过 HTTPS 访问
-    demo.queue().launch(
+    demo.queue(default_concurrency_limit=CONCURRENCY_LIMIT).launch(
         share=False,
         server_name="0.0.0.0",
         # auth=("django", "qaz!@#$") # ⚠️注意：记住修改密码
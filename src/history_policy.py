@@ -0,0 +1,127 @@
+import re
+from typing import List, Optional
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from markdown_chunker import estimate_tokens
+from logger import LOG  # 导入日志工具
+
+# 摘要消息的名称，用于在聊天历史中识别之前写入的摘要
+SUMMARY_NAME = "history_summary"
+# 摘要中每条用户需求保留的最大字符数
+MAX_REQUEST_CHARS = 200
+# 演示文稿大纲中的主标题或幻灯片标题行
+OUTLINE_HEADING_PATTERN = re.compile(r'^#{1,2} ', re.MULTILINE)
+
+
+def is_outline(message: BaseMessage) -> bool:
+    """
+    判断消息是否为演示文稿大纲（包含 "# " 或 "## " 标题行的 AI 回复）。
+    """
+    return isinstance(message, AIMessage) and OUTLINE_HEADING_PATTERN.search(str(message.content)) is not None
+
+
+class HistoryPolicy:
+    """
+    聊天历史窗口策略：发送给模型的内容（系统提示、历史和本轮输入）保持在 max_tokens 以内。
+    最近 keep_turns 轮对话原样保留，更早的对话折叠为一条摘要消息（依次列出用户之前的需求），
+    最新的演示文稿大纲始终保留：仍在保留的对话中时原样保留，否则写入摘要。
+    摘要直接写回聊天历史，之后每轮只需折叠新超出窗口的对话，适用于任何 BaseChatMessageHistory 后端；
+    后端提供 replace 方法（如 SQLiteChatMessageHistory）时在一个事务中改写，不会与其他进程的写入交错。
+    """
+    def __init__(self, max_tokens: int = 6000, keep_turns: int = 4, max_requests: int = 20):
+        self.max_tokens = max_tokens  # 提示的 token 预算（按 estimate_tokens 估算）
+        self.keep_turns = keep_turns  # 原样保留的最近对话轮数
+        self.max_requests = max_requests  # 摘要中最多列出的用户需求条数
+
+    @classmethod
+    def from_config(cls, config) -> "HistoryPolicy":
+        history_config = config.chat_history or {}
+        return cls(
+            max_tokens=history_config.get("max_prompt_tokens", 6000),
+            keep_turns=history_config.get("keep_turns", 4),
+        )
+
+    @staticmethod
+    def count_tokens(messages: List[BaseMessage]) -> int:
+        return sum(estimate_tokens(str(message.content)) for message in messages)
+
+    @staticmethod
+    def split_turns(messages: List[BaseMessage]):
+        """
+        拆分出之前的摘要消息，并将其余消息按轮分组（每轮从用户消息开始）。
+        """
+        summary = None
+        if messages and isinstance(messages[0], SystemMessage) and messages[0].name == SUMMARY_NAME:
+            summary, messages = messages[0], messages[1:]
+        turns = []
+        for message in messages:
+            if isinstance(message, HumanMessage) or not turns:
+                turns.append([])
+            turns[-1].append(message)
+        return summary, turns
+
+    def make_summary(self, requests: List[str], outline: Optional[str], include_outline: bool) -> Optional[SystemMessage]:
+        """
+        由之前的用户需求和最新的大纲生成摘要消息。需求和大纲保存在 additional_kwargs 中，供下次折叠时继续累积。
+        """
+        if not requests and not outline:
+            return None
+        lines = ["以下是之前对话的摘要。"]
+        if requests:
+            lines.append("用户之前依次提出的需求：")
+            lines.extend(f"{i}. {request}" for i, request in enumerate(requests, start=1))
+        if outline and include_outline:
+            lines.append("当前最新的演示文稿大纲：")
+            lines.append(outline)
+        return SystemMessage(
+            content="\n".join(lines),
+            name=SUMMARY_NAME,
+            additional_kwargs={SUMMARY_NAME: {"requests": requests, "outline": outline}},
+        )
+
+    def compact(self, history: BaseChatMessageHistory, system_prompt: str = "", user_input: str = "") -> int:
+        """
+        按策略折叠聊天历史（必要时改写 history），返回本轮提示的估算 token 数。
+        """
+        messages = history.messages
+        summary, turns = self.split_turns(messages)
+        state = summary.additional_kwargs.get(SUMMARY_NAME, {}) if summary is not None else {}
+        requests = list(state.get("requests", []))
+        outline = state.get("outline")
+        fixed_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_input)
+
+        def build(fold):
+            folded_requests, folded_outline = list(requests), outline
+            for turn in turns[:fold]:
+                for message in turn:
+                    if isinstance(message, HumanMessage):
+                        folded_requests.append(str(message.content).strip()[:MAX_REQUEST_CHARS])
+                    elif is_outline(message):
+                        folded_outline = str(message.content)
+            folded_requests = folded_requests[-self.max_requests:]
+            kept = [message for turn in turns[fold:] for message in turn]
+            include_outline = not any(is_outline(message) for message in kept)
+            new_summary = self.make_summary(folded_requests, folded_outline, include_outline)
+            return ([new_summary] if new_summary is not None else []) + kept
+
+        # 先折叠超出 keep_turns 的对话，仍超出预算时继续折叠更早的对话（至少保留最近一轮）
+        fold = max(0, len(turns) - self.keep_turns)
+        compacted = build(fold)
+        while fold < len(turns) - 1 and self.count_tokens(compacted) + fixed_tokens > self.max_tokens:
+            fold += 1
+            compacted = build(fold)
+
+        changed = len(compacted) != len(messages) or any(a.content != b.content for a, b in zip(compacted, messages))
+        if changed:
+            LOG.debug(f"[聊天历史] 折叠 {fold} 轮对话，保留 {len(turns) - fold} 轮")
+            replace = getattr(history, "replace", None)
+            if replace is not None:
+                # 只替换本次读取的消息，读取之后其他进程追加的消息保留；历史已被其他进程改写时放弃，下一轮重新折叠
+                if not replace(compacted, messages):
+                    LOG.debug("[聊天历史] 历史已被其他进程修改，跳过本次折叠")
+            else:
+                history.clear()
+                history.add_messages(compacted)
+        return self.count_tokens(compacted) + fixed_tokens
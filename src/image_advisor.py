@@ -1,23 +1,32 @@
 import re
+import asyncio
+import httpx
 import requests
-import os
 
 from abc import ABC
 from bs4 import BeautifulSoup
 from PIL import Image
 from io import BytesIO
 
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 
+from media_store import MediaStore, media_store
+from llm_client import get_llm_factory
 from logger import LOG  # 导入日志工具
 
+# Bing 图片检索地址和请求头
+BING_IMAGE_SEARCH_URL = "https://www.bing.com/images/search?q={query}"
+BING_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36"
+}
+
 class ImageAdvisor(ABC):
     """
     聊天机器人基类，提供建议配图的功能。
     """
-    def __init__(self, prompt_file="./prompts/image_advisor.txt"):
+    def __init__(self, prompt_file="./prompts/image_advisor.txt", store: MediaStore = None):
         self.prompt_file = prompt_file
+        self.store = store if store is not None else media_store  # 检索到的图片保存到按内容寻址的媒体存储中
         self.prompt = self.load_prompt()
         self.create_advisor()
 
@@ -41,20 +50,18 @@ class ImageAdvisor(ABC):
             ("human", "**Content**:\n\n{input}"),  # 消息占位符
         ])
 
-        self.model = ChatOpenAI(
-            model="gpt-4o-mini",
+        self.model = get_llm_factory().create_chat_model(
             temperature=0.7,
             max_tokens=4096,
         )
         self.advisor = chat_prompt | self.model
 
-    def generate_images(self, markdown_content, image_directory="tmps", num_images=3):
+    def generate_images(self, markdown_content, num_images=3):
         """
         生成图片并嵌入到指定的 PowerPoint 内容中。
 
         参数:
             markdown_content (str): PowerPoint markdown 原始格式
-            image_directory (str): 本地保存图片的文件夹名称
             num_images (int): 每个幻灯片搜索的图像数量
 
         返回:
@@ -82,11 +89,9 @@ class ImageAdvisor(ABC):
 
             # 仅处理分辨率最高的图像
             img = images[0]
-            save_directory = f"images/{image_directory}"
-            os.makedirs(save_directory, exist_ok=True)
-            save_path = os.path.join(save_directory, f"{img['slide_title']}_1.jpeg")
-            self.save_image(img["obj"], save_path)
-            image_pair[img["slide_title"]] = save_path
+            save_path = self.save_image(img["obj"])
+            if save_path:
+                image_pair[img["slide_title"]] = save_path
 
         content_with_images = self.insert_images(markdown_content, image_pair)
         return content_with_images, image_pair
@@ -119,10 +124,8 @@ class ImageAdvisor(ABC):
         返回:
             sorted_images (list): 符合条件的图像数据列表
         """
-        url = f"https://www.bing.com/images/search?q={query}"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36"
-        }
+        url = BING_IMAGE_SEARCH_URL.format(query=query)
+        headers = BING_HEADERS
 
         # 尝试请求并设置重试逻辑
         for attempt in range(retries):
@@ -136,7 +139,28 @@ class ImageAdvisor(ABC):
                     LOG.error(f"Max retries reached for query '{query}'.")
                     return []
         
-        soup = BeautifulSoup(response.text, "html.parser")
+        image_links = self.extract_image_links(response.text, num_images)
+
+        image_data = []
+        for link in image_links:
+            for attempt in range(retries):
+                try:
+                    img_data = requests.get(link, headers=headers, timeout=timeout)
+                    image_data.append(self.make_image_info(slide_title, query, img_data.content))
+                    break  # 成功下载图像，跳出重试循环
+                except Exception as e:
+                    LOG.warning(f"Attempt {attempt + 1}/{retries} failed for image '{link}': {e}")
+                    if attempt == retries - 1:
+                        LOG.error(f"Max retries reached for image '{link}'. Skipping.")
+        
+        sorted_images = sorted(image_data, key=lambda x: x["resolution"], reverse=True)
+        return sorted_images
+
+    def extract_image_links(self, html, num_images):
+        """
+        从 Bing 图片检索结果页中提取最多 num_images 个原图链接。
+        """
+        soup = BeautifulSoup(html, "html.parser")
         image_elements = soup.select("a.iusc")
 
         image_links = []
@@ -148,41 +172,104 @@ class ImageAdvisor(ABC):
                     image_links.append(m_json["murl"])
             if len(image_links) >= num_images:
                 break
+        return image_links
 
-        image_data = []
-        for link in image_links:
+    def make_image_info(self, slide_title, query, content):
+        """
+        打开下载的图像数据（只读取文件头获取尺寸），返回图像信息。
+        """
+        img = Image.open(BytesIO(content))
+        return {
+            "slide_title": slide_title,
+            "query": query,
+            "width": img.width,
+            "height": img.height,
+            "resolution": img.width * img.height,
+            "obj": img,
+        }
+
+    async def agenerate_images(self, markdown_content, num_images=3):
+        """
+        generate_images 的异步版本：使用 ainvoke 获取配图建议，并发检索各幻灯片的图像，
+        图像压缩和保存在线程中执行，不阻塞事件循环。
+        """
+        response = await self.advisor.ainvoke({
+            "input": markdown_content,
+        })
+
+        LOG.debug(f"[Advisor 建议配图]\n{response.content}")
+
+        keywords = self.get_keywords(response.content)
+        image_pair = {}
+
+        async with httpx.AsyncClient(headers=BING_HEADERS, follow_redirects=True) as client:
+            results = await asyncio.gather(*(
+                self.aget_bing_images(client, slide_title, query, num_images, timeout=1, retries=3)
+                for slide_title, query in keywords.items()
+            ))
+
+        for slide_title, images in zip(keywords, results):
+            if not images:
+                LOG.warning(f"No images found for {slide_title}.")
+                continue
+
+            # 仅处理分辨率最高的图像
+            img = images[0]
+            save_path = await asyncio.to_thread(self.save_image, img["obj"])
+            if save_path:
+                image_pair[img["slide_title"]] = save_path
+
+        content_with_images = self.insert_images(markdown_content, image_pair)
+        return content_with_images, image_pair
+
+    async def aget_bing_images(self, client, slide_title, query, num_images=5, timeout=1, retries=3):
+        """
+        get_bing_images 的异步版本，使用共享的 httpx.AsyncClient 并发下载候选图像。
+        """
+        url = BING_IMAGE_SEARCH_URL.format(query=query)
+
+        for attempt in range(retries):
+            try:
+                response = await client.get(url, timeout=timeout)
+                response.raise_for_status()
+                break  # 请求成功，跳出重试循环
+            except httpx.HTTPError as e:
+                LOG.warning(f"Attempt {attempt + 1}/{retries} failed for query '{query}': {e}")
+                if attempt == retries - 1:
+                    LOG.error(f"Max retries reached for query '{query}'.")
+                    return []
+
+        async def download(link):
             for attempt in range(retries):
                 try:
-                    img_data = requests.get(link, headers=headers, timeout=timeout)
-                    img = Image.open(BytesIO(img_data.content))
-                    image_info = {
-                        "slide_title": slide_title,
-                        "query": query,
-                        "width": img.width,
-                        "height": img.height,
-                        "resolution": img.width * img.height,
-                        "obj": img,
-                    }
-                    image_data.append(image_info)
-                    break  # 成功下载图像，跳出重试循环
+                    img_data = await client.get(link, timeout=timeout)
+                    return self.make_image_info(slide_title, query, img_data.content)
                 except Exception as e:
                     LOG.warning(f"Attempt {attempt + 1}/{retries} failed for image '{link}': {e}")
                     if attempt == retries - 1:
                         LOG.error(f"Max retries reached for image '{link}'. Skipping.")
-        
+            return None
+
+        image_links = self.extract_image_links(response.text, num_images)
+        image_data = [info for info in await asyncio.gather(*(download(link) for link in image_links)) if info]
+        for image in image_data:
+            LOG.debug(f"Name: {image['slide_title']}, Query: {image['query']} 分辨率：{image['width']}x{image['height']}")
+
         sorted_images = sorted(image_data, key=lambda x: x["resolution"], reverse=True)
         return sorted_images
 
-    def save_image(self, img, save_path, format="JPEG", quality=85, max_size=1080):
+    def save_image(self, img, format="JPEG", quality=85, max_size=1080):
         """
-        保存图像到本地并压缩。
+        压缩图像并保存到媒体存储中。
 
         参数:
             img (Image): 图像对象
-            save_path (str): 保存路径
             format (str): 保存格式，默认 JPEG
             quality (int): 图像质量，默认 85
             max_size (int): 最大边长，默认 1080
+
+        返回:
+            save_path (str): 图像在媒体存储中的路径，保存失败时为 None
         """
         try:
             width, height = img.size
@@ -202,10 +289,17 @@ class ImageAdvisor(ABC):
                     "progressive": True
                 }
 
-            img.save(save_path, format=format, **save_options)
+            if format == "JPEG" and img.mode != "RGB":
+                img = img.convert("RGB")  # 调色板、CMYK 等模式需转换后才能保存为 JPEG
+
+            buffer = BytesIO()
+            img.save(buffer, format=format, **save_options)
+            save_path = self.store.put(buffer.getvalue(), ".png" if format == "PNG" else ".jpeg")
             LOG.debug(f"Image saved as {save_path} in {format} format with quality {quality}.")
+            return save_path
         except Exception as e:
             LOG.error(f"Failed to save image: {e}")
+            return None
 
     def insert_images(self, markdown_content, image_pair):
         """
@@ -0,0 +1,126 @@
+import os
+import hashlib
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from typing import Tuple
+
+from PIL import Image
+
+from logger import LOG  # 引入日志模块
+
+EMU_PER_INCH = 914400  # PowerPoint 中每英寸对应的 EMU 数
+# 矢量图像格式（WMF/EMF）：PIL 无法解码重采样，PowerPoint 可直接缩放，始终按原文件嵌入
+VECTOR_IMAGE_FORMATS = {'WMF'}
+
+
+class ImageEmbedder:
+    """
+    图片嵌入处理器。
+    在图片插入幻灯片之前，将其重采样到占位符的实际像素尺寸（按 dpi 计算）并重新编码，避免将原始大图嵌入演示文稿。
+    处理结果按 (源图片内容哈希, 目标像素尺寸) 缓存，同一图片在多张幻灯片或多个演示文稿中只处理一次。
+    """
+    def __init__(self, dpi: int = 150, jpeg_quality: int = 85, max_entries: int = 256):
+        self.dpi = dpi  # 目标分辨率（每英寸像素数）
+        self.jpeg_quality = jpeg_quality  # JPEG 重新编码的质量
+        self.max_entries = max_entries  # 最多缓存的处理结果数量和源图片信息数量，超出后按最近最少使用淘汰
+        self._sources = OrderedDict()  # 路径 -> ((修改时间, 文件大小), (内容哈希, 原始像素尺寸, PIL 格式名称))
+        self._entries = OrderedDict()  # (内容哈希, 宽, 高) -> 处理后的图片数据
+        self._lock = threading.Lock()
+
+    def _source_info(self, image_path: str) -> Tuple[str, Tuple[int, int], str]:
+        """
+        返回图片的内容哈希、原始像素尺寸和格式。文件未变化时直接使用缓存，不重复读取和解码。
+        每个路径只缓存最新的一份信息，文件变化后原有信息被替换。
+        """
+        stat = os.stat(image_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._sources.get(image_path)
+            if cached is not None and cached[0] == signature:
+                self._sources.move_to_end(image_path)
+                return cached[1]
+
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        with Image.open(BytesIO(data)) as img:
+            info = (hashlib.sha256(data).hexdigest(), img.size, img.format)
+        with self._lock:
+            self._sources[image_path] = (signature, info)
+            self._sources.move_to_end(image_path)
+            while len(self._sources) > self.max_entries:
+                self._sources.popitem(last=False)
+        return info
+
+    def get_image_size(self, image_path: str) -> Tuple[int, int]:
+        """
+        返回图片的原始像素尺寸 (宽, 高)。
+        """
+        return self._source_info(image_path)[1]
+
+    def target_pixels(self, width_emu: int, height_emu: int) -> Tuple[int, int]:
+        """
+        将幻灯片中的显示尺寸（EMU）换算为 dpi 下的像素尺寸。
+        """
+        return (
+            max(1, round(width_emu / EMU_PER_INCH * self.dpi)),
+            max(1, round(height_emu / EMU_PER_INCH * self.dpi)),
+        )
+
+    def embed(self, image_path: str, width_emu: int, height_emu: int):
+        """
+        返回用于 add_picture 的图片。图片超过目标像素尺寸时返回缩小并重新编码后的数据流，否则直接返回原始文件路径。
+        """
+        digest, (src_width, src_height), image_format = self._source_info(image_path)
+        target_width, target_height = self.target_pixels(width_emu, height_emu)
+
+        # 矢量图像或图片本身不超过目标尺寸，无需处理
+        if image_format in VECTOR_IMAGE_FORMATS or (src_width <= target_width and src_height <= target_height):
+            return image_path
+
+        key = (digest, target_width, target_height)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+
+        if data is None:
+            data = self._resample(image_path, (target_width, target_height))
+            with self._lock:
+                self._entries[key] = data
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            LOG.debug(f"图片已缩放: {image_path} {src_width}x{src_height} -> {target_width}x{target_height}（{len(data)} 字节）")
+
+        return BytesIO(data)
+
+    def _resample(self, image_path: str, size: Tuple[int, int]) -> bytes:
+        """
+        按目标尺寸重采样图片并重新编码。JPEG 保持 JPEG，其余格式保存为 PNG 以保留透明度。
+        """
+        with Image.open(image_path) as img:
+            is_jpeg = img.format == 'JPEG'
+            if is_jpeg:
+                img.draft('RGB', size)  # JPEG 解码时直接按比例缩小，减少解码开销
+            if img.mode not in ('RGB', 'RGBA', 'L'):
+                img = img.convert('RGBA')  # 调色板等模式先转换，保证高质量重采样
+            # reducing_gap 先用整数倍快速缩小再做 LANCZOS 重采样，大图处理更快且画质基本不变
+            resized = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+        buffer = BytesIO()
+        if is_jpeg:
+            if resized.mode != 'RGB':
+                resized = resized.convert('RGB')
+            resized.save(buffer, 'JPEG', quality=self.jpeg_quality, optimize=True, progressive=True)
+        else:
+            resized.save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def clear(self):
+        with self._lock:
+            self._sources.clear()
+            self._entries.clear()
+
+
+# 全局共享的图片嵌入处理器
+image_embedder = ImageEmbedder()
@@ -1,11 +1,61 @@
 import re
-from typing import Optional
+from typing import Optional, List, Iterable, Iterator, NamedTuple
 
-from data_structures import PowerPoint
+from data_structures import PowerPoint, Slide
 from slide_builder import SlideBuilder
 from layout_manager import LayoutManager
 from logger import LOG  # 引入日志模块
 
+# 单次匹配即可对一行分类的词法规则，对应 docs/ppt_input_format.md 中的格式：
+# "# 主标题"、"## 幻灯片标题"、"- 要点"（每 2 个空格缩进为一级）和 "![描述](图片路径)"
+LINE_PATTERN = re.compile(r"""
+      \#[ ](?P<title>.*)                    # 主标题
+    | \#\#[ ](?P<slide>.*)                  # 幻灯片标题
+    | (?P<indent>\s*)-\s+(?P<bullet>.*)     # 项目符号（要点）
+    | !\[.*?\]\((?P<image>.*?)\)            # 图片
+""", re.VERBOSE)
+
+# 词法单元类型
+TOKEN_TITLE = "title"
+TOKEN_SLIDE = "slide"
+TOKEN_BULLET = "bullet"
+TOKEN_IMAGE = "image"
+TOKEN_TEXT = "text"  # 不符合上述任何格式的非空行
+
+
+class Token(NamedTuple):
+    kind: str  # 词法单元类型
+    text: str  # 标题、要点文本或图片路径（已去除首尾空白）
+    level: int  # 要点的缩进层级，其他类型为 0
+    line_no: int  # 在输入文本中的行号（从 1 开始），用于报告错误
+
+
+def tokenize_line(line: str, line_no: int) -> Optional[Token]:
+    """
+    对一行文本分类，空行返回 None。每行只做一次正则匹配。
+    """
+    match = LINE_PATTERN.match(line)
+    if match is None:
+        text = line.strip()
+        return Token(TOKEN_TEXT, text, 0, line_no) if text else None
+
+    kind = match.lastgroup
+    if kind == TOKEN_BULLET:
+        # 每 2 个空格为一级缩进
+        return Token(TOKEN_BULLET, match.group(TOKEN_BULLET).strip(), len(match.group("indent")) // 2, line_no)
+    return Token(kind, match.group(kind).strip(), 0, line_no)
+
+
+def tokenize(input_text: str) -> Iterator[Token]:
+    """
+    逐行扫描输入文本，依次产出词法单元（跳过空行）。
+    """
+    for line_no, line in enumerate(input_text.split('\n'), start=1):
+        token = tokenize_line(line, line_no)
+        if token is not None:
+            yield token
+
+
 def parse_bullet_point_level(line: str) -> (int, str):
     """
     根据项目符号行解析其缩进层级，并返回项目符号的文本内容。
@@ -16,75 +66,129 @@ def parse_bullet_point_level(line: str) -> (int, str):
     # 每 2 个空格算作一个缩进级别，或者根据实际的缩进规则
     indent_level = indent_length // 2
 
-    LOG.debug(indent_level)
-    LOG.debug(line)
-
     bullet_text = line.strip().lstrip('- ').strip()  # 去除 '-' 并处理前后空格，得到项目符号内容
     return indent_level, bullet_text
 
 
-# 解析输入文本，生成 PowerPoint 数据结构
-def parse_input_text(input_text: str, layout_manager: LayoutManager) -> PowerPoint:
+class StreamingInputParser:
     """
-    解析输入的文本并转换为 PowerPoint 数据结构。自动为每张幻灯片分配适当的布局。
+    增量解析 ChatPPT markdown 的解析器。
+    可以按任意大小的文本块（例如 LLM 流式输出的 token）多次调用 feed，
+    每当下一个 "## " 标题出现或输入结束（close）时，立即返回已完成的幻灯片，
+    使前面幻灯片的渲染、配图等工作可以与后续内容的生成同时进行。
     """
-    lines = input_text.split('\n')  # 按行拆分文本
-    presentation_title = ""  # PowerPoint 的主标题
-    slides = []  # 存储所有幻灯片
-    slide_builder: Optional[SlideBuilder] = None  # 当前幻灯片的构建器
-
-    # 正则表达式，用于匹配幻灯片标题、要点和图片
-    slide_title_pattern = re.compile(r'^##\s+(.*)')
-    bullet_pattern = re.compile(r'^(\s*)-\s+(.*)')
-    image_pattern = re.compile(r'!\[.*?\]\((.*?)\)')
-
-    for line in lines:
-        if line.strip() == "":
-            continue  # 跳过空行
+    def __init__(self, layout_manager: LayoutManager):
+        self.layout_manager = layout_manager
+        self.presentation_title = ""  # PowerPoint 的主标题
+        self.slides: List[Slide] = []  # 已完成的所有幻灯片
+        self._buffer = ""  # 尚未收到换行符的不完整行
+        self._slide_builder: Optional[SlideBuilder] = None  # 当前幻灯片的构建器
+        self._line_no = 0  # 已处理的行数
+        self._closed = False
+
+    def feed(self, chunk: str) -> List[Slide]:
+        """
+        输入一段文本，返回因此而完成的幻灯片（可能为空列表）。
+        只处理以换行符结束的完整行，剩余部分留到下一次 feed 或 close。
+        """
+        if self._closed:
+            raise ValueError("解析器已关闭，不能继续输入。")
+
+        self._buffer += chunk
+        if '\n' not in chunk:
+            return []
+
+        *lines, self._buffer = self._buffer.split('\n')
+        finished = []
+        for line in lines:
+            self._parse_line(line, finished)
+        return finished
+
+    def close(self) -> List[Slide]:
+        """
+        结束输入：解析最后一行并返回剩余的幻灯片。
+        """
+        if self._closed:
+            return []
+        self._closed = True
+
+        finished = []
+        if self._buffer:
+            self._parse_line(self._buffer, finished)
+            self._buffer = ""
+
+        # 为最后一张幻灯片分配布局并添加到列表中
+        if self._slide_builder:
+            self._finish_slide(self._slide_builder.finalize(), finished)
+            self._slide_builder = None
+        return finished
+
+    def to_presentation(self) -> PowerPoint:
+        return PowerPoint(title=self.presentation_title, slides=list(self.slides))
+
+    def _finish_slide(self, slide: Slide, finished: List[Slide]):
+        self.slides.append(slide)
+        finished.append(slide)
+
+    def _parse_line(self, line: str, finished: List[Slide]):
+        self._line_no += 1
+        token = tokenize_line(line, self._line_no)
+        if token is None:
+            return  # 跳过空行
+        kind = token.kind
 
         # 主标题 (用作 PowerPoint 的标题和文件名)
-        if line.startswith('# ') and not line.startswith('##'):
-            presentation_title = line[2:].strip()
+        if kind == TOKEN_TITLE:
+            self.presentation_title = token.text
 
-            first_slide_builder = SlideBuilder(layout_manager)
-            first_slide_builder.set_title(presentation_title)
-            slides.append(first_slide_builder.finalize())
+            first_slide_builder = SlideBuilder(self.layout_manager)
+            first_slide_builder.set_title(self.presentation_title)
+            self._finish_slide(first_slide_builder.finalize(), finished)
 
         # 幻灯片标题
-        elif line.startswith('## '):
-            match = slide_title_pattern.match(line)
-            if match:
-                title = match.group(1).strip()
+        elif kind == TOKEN_SLIDE:
+            # 如果有当前幻灯片，生成并添加到幻灯片列表中
+            if self._slide_builder:
+                self._finish_slide(self._slide_builder.finalize(), finished)
 
-                # 如果有当前幻灯片，生成并添加到幻灯片列表中
-                if slide_builder:
-                    slides.append(slide_builder.finalize())
+            # 创建新的 SlideBuilder
+            self._slide_builder = SlideBuilder(self.layout_manager)
+            self._slide_builder.set_title(token.text)
 
-                # 创建新的 SlideBuilder
-                slide_builder = SlideBuilder(layout_manager)
-                slide_builder.set_title(title)
+        elif kind == TOKEN_TEXT:
+            LOG.debug(f"第 {token.line_no} 行不是 ChatPPT 格式，已忽略: {token.text}")
 
-        # 项目符号（要点）
-        elif bullet_pattern.match(line) and slide_builder:
-            match = bullet_pattern.match(line)
-            if match:
-                indent_spaces, bullet = match.groups()  # 获取缩进空格和项目符号内容
-                indent_level = len(indent_spaces) // 2  # 计算缩进层级，每 2 个空格为一级
-                bullet_text = bullet.strip()  # 获取项目符号的文本内容
+        elif self._slide_builder is None:
+            LOG.warning(f"第 {token.line_no} 行的内容出现在第一个幻灯片标题之前，已忽略: {token.text}")
 
-                # 根据层级添加要点
-                slide_builder.add_bullet_point(bullet_text, level=indent_level)
+        # 项目符号（要点）
+        elif kind == TOKEN_BULLET:
+            # 根据层级添加要点
+            self._slide_builder.add_bullet_point(token.text, level=token.level)
 
         # 图片插入
-        elif line.startswith('![') and slide_builder:
-            match = image_pattern.match(line)
-            if match:
-                image_path = match.group(1).strip()
-                slide_builder.set_image(image_path)
+        else:
+            self._slide_builder.set_image(token.text)
+
+
+def iter_slides(chunks: Iterable[str], layout_manager: LayoutManager) -> Iterator[Slide]:
+    """
+    逐块读取 markdown 文本（例如 LLM 的流式输出），每完成一张幻灯片就立即产出。
+    """
+    parser = StreamingInputParser(layout_manager)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
 
-    # 为最后一张幻灯片分配布局并添加到列表中
-    if slide_builder:
-        slides.append(slide_builder.finalize())
+
+# 解析输入文本，生成 PowerPoint 数据结构
+def parse_input_text(input_text: str, layout_manager: LayoutManager) -> PowerPoint:
+    """
+    解析输入的文本并转换为 PowerPoint 数据结构。自动为每张幻灯片分配适当的布局。
+    """
+    parser = StreamingInputParser(layout_manager)
+    parser.feed(input_text)
+    parser.close()
 
     # 返回 PowerPoint 数据结构以及演示文稿标题
-    return PowerPoint(title=presentation_title, slides=slides), presentation_title
+    return parser.to_presentation(), parser.presentation_title
@@ -0,0 +1,87 @@
+import json
+from typing import Union
+
+import msgpack
+
+from data_structures import PowerPoint, Slide, SlideContent, BulletPoint
+
+# 序列化格式的版本号。数据结构发生不兼容的变化时递增，旧版本的数据会被拒绝加载
+IR_FORMAT_VERSION = 1
+
+
+def powerpoint_to_dict(powerpoint: PowerPoint) -> dict:
+    """
+    将 PowerPoint 数据结构转换为紧凑的、可直接 JSON/msgpack 序列化的结构。
+    每张幻灯片表示为 [layout_id, layout_name, title, [[要点文本, 层级], ...], image_path]，不重复写入字段名。
+    """
+    return {
+        "version": IR_FORMAT_VERSION,
+        "title": powerpoint.title,
+        "slides": [
+            [
+                slide.layout_id,
+                slide.layout_name,
+                slide.content.title,
+                [[point.text, point.level] for point in slide.content.bullet_points],
+                slide.content.image_path,
+            ]
+            for slide in powerpoint.slides
+        ],
+    }
+
+
+def powerpoint_from_dict(data: dict) -> PowerPoint:
+    """
+    从 powerpoint_to_dict 生成的结构还原 PowerPoint 数据结构，无需重新解析和分配布局。
+    """
+    version = data.get("version") if isinstance(data, dict) else None
+    if version != IR_FORMAT_VERSION:
+        raise ValueError(f"不支持的演示文稿数据版本: {version}（当前版本为 {IR_FORMAT_VERSION}）")
+
+    slides = []
+    for layout_id, layout_name, title, bullet_points, image_path in data["slides"]:
+        content = SlideContent(
+            title=title,
+            bullet_points=[BulletPoint(text, level) for text, level in bullet_points],
+            image_path=image_path,
+        )
+        slides.append(Slide(layout_id=layout_id, layout_name=layout_name, content=content))
+    return PowerPoint(title=data["title"], slides=slides)
+
+
+def dumps_json(powerpoint: PowerPoint) -> str:
+    return json.dumps(powerpoint_to_dict(powerpoint), ensure_ascii=False, separators=(',', ':'))
+
+
+def loads_json(data: Union[str, bytes]) -> PowerPoint:
+    return powerpoint_from_dict(json.loads(data))
+
+
+def dumps_msgpack(powerpoint: PowerPoint) -> bytes:
+    return msgpack.packb(powerpoint_to_dict(powerpoint), use_bin_type=True)
+
+
+def loads_msgpack(data: bytes) -> PowerPoint:
+    return powerpoint_from_dict(msgpack.unpackb(data, raw=False))
+
+
+def dumps(powerpoint: PowerPoint, format: str = "json") -> bytes:
+    """
+    将 PowerPoint 数据结构序列化为字节串，format 为 "json" 或 "msgpack"。
+    """
+    if format == "json":
+        return dumps_json(powerpoint).encode('utf-8')
+    if format == "msgpack":
+        return dumps_msgpack(powerpoint)
+    raise ValueError(f"不支持的序列化格式: {format}")
+
+
+def loads(data: bytes, format: str = "json") -> PowerPoint:
+    """
+    从 dumps 生成的字节串还原 PowerPoint 数据结构。
+    """
+    if format == "json":
+        return loads_json(data)
+    if format == "msgpack":
+        return loads_msgpack(data)
+    raise ValueError(f"不支持的序列化格式: {format}")
@@ -1,4 +1,4 @@
-import random
+import zlib
 from typing import List, Tuple
 from data_structures import SlideContent
 from logger import LOG
@@ -53,8 +53,13 @@ class LayoutStrategy:
     def get_layout(self, slide_content: SlideContent) -> Tuple[int, str]:
         """
         根据 SlideContent 内容随机选择一个合适的布局。
+        以幻灯片标题为种子选择：不同幻灯片的布局依然多样，而同一幻灯片在重复解析（如修改要点后重新生成）时布局保持稳定，
+        便于增量生成时复用已渲染的幻灯片。
         """
-        return random.choice(self.layout_group)  # 随机选择布局
+        if not self.layout_group:
+            raise IndexError("布局组为空，无法选择布局")
+        seed = zlib.crc32(slide_content.title.encode('utf-8'))
+        return self.layout_group[seed % len(self.layout_group)]  # 按标题稳定地“随机”选择布局
 
 # 布局管理器类，负责根据 SlideContent 自动选择合适的布局策略。
 class LayoutManager:
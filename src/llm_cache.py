@@ -0,0 +1,227 @@
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from build_cache import hash_text
+from logger import LOG  # 导入日志工具
+
+
+class LLMResponseCache:
+    """
+    基于 SQLite 的 LLM 回复缓存，用于输出只取决于输入的确定性阶段（如 ContentFormatter、ContentAssistant）。
+    以 (模型, temperature, 接口地址, 系统提示哈希, 输入哈希) 为键，支持过期时间（TTL）和最大条目数（按最近使用淘汰），
+    并统计命中/未命中次数以及命中所节省的调用耗时和 token 数。
+    """
+    def __init__(self, path: str = ".chatppt_cache/llm_responses.sqlite3", ttl: float = 7 * 24 * 3600,
+                 max_entries: int = 10000):
+        self.path = path
+        self.ttl = ttl  # 条目的有效期（秒），为 0 或 None 时不过期
+        self.max_entries = max_entries  # 最多保存的条目数，超出后删除最近最少使用的条目
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0  # 命中缓存节省的调用耗时（按缓存时记录的调用耗时累计）
+        self.saved_tokens = 0  # 命中缓存节省的 token 数
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL,"
+            " elapsed REAL NOT NULL DEFAULT 0, tokens INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    @staticmethod
+    def make_key(model: str, temperature: float, system_prompt: str, input_text: str,
+                 base_url: Optional[str] = None) -> str:
+        # base_url 为 None 时按 OPENAI_BASE_URL 环境变量计入，与 Pipeline 的构建缓存键一致：
+        # 同名模型由不同服务提供时，回复不会互相命中
+        base_url = base_url or os.environ.get("OPENAI_BASE_URL")
+        return hash_text(str(model), repr(temperature), repr(base_url), hash_text(system_prompt), hash_text(input_text))
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created, elapsed, tokens FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            self.saved_seconds += row[2]
+            self.saved_tokens += row[3]
+            return row[0]
+
+    def put(self, key: str, response: str, elapsed: float = 0.0, tokens: int = 0):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, last_used, elapsed, tokens)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, now, now, elapsed, tokens),
+            )
+            self._evict()
+
+    def _evict(self):
+        # 删除过期条目，并在超过最大条目数时删除最近最少使用的条目（调用方需持有锁）
+        if self.ttl:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "saved_tokens": self.saved_tokens,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _cache_key(model, system_prompt: str, input_text: str) -> str:
+    return LLMResponseCache.make_key(getattr(model, "model_name", ""), getattr(model, "temperature", None),
+                                     system_prompt, input_text, getattr(model, "openai_api_base", None))
+
+
+def _put_response(cache: LLMResponseCache, key: str, response, elapsed: float):
+    usage = getattr(response, "usage_metadata", None) or {}
+    cache.put(key, response.content, elapsed, usage.get("total_tokens", 0))
+
+
+def invoke_with_cache(cache: Optional[LLMResponseCache], model, system_prompt: str, input_text: str,
+                      invoke: Callable[[], object]) -> str:
+    """
+    调用 invoke（返回 LangChain 的 AIMessage）并返回回复文本。cache 不为 None 时先查询缓存，未命中再调用并写入缓存。
+    """
+    if cache is None:
+        return invoke().content
+
+    key = _cache_key(model, system_prompt, input_text)
+    content = cache.get(key)
+    if content is not None:
+        LOG.debug(f"[LLM 缓存] 命中 {key[:12]}，{cache.stats()}")
+        return content
+
+    start = time.perf_counter()
+    response = invoke()
+    _put_response(cache, key, response, time.perf_counter() - start)
+    return response.content
+
+
+async def ainvoke_with_cache(cache: Optional[LLMResponseCache], model, system_prompt: str, input_text: str,
+                             ainvoke: Callable[[], Awaitable[object]]) -> str:
+    """
+    invoke_with_cache 的异步版本，ainvoke 返回可等待的 AIMessage。
+    缓存读写是 SQLite 的同步操作（写入时可能等待其他进程释放锁），放到线程中执行，不阻塞事件循环。
+    """
+    if cache is None:
+        return (await ainvoke()).content
+
+    key = _cache_key(model, system_prompt, input_text)
+    content = await asyncio.to_thread(cache.get, key)
+    if content is not None:
+        LOG.debug(f"[LLM 缓存] 命中 {key[:12]}，{cache.stats()}")
+        return content
+
+    start = time.perf_counter()
+    response = await ainvoke()
+    await asyncio.to_thread(_put_response, cache, key, response, time.perf_counter() - start)
+    return response.content
+
+
+def batch_with_cache(cache: Optional[LLMResponseCache], model, system_prompt: str, input_texts: List[str],
+                     batch: Callable[[List[str]], List[object]]) -> List[str]:
+    """
+    批量版本的 invoke_with_cache：只有未命中缓存的输入交给 batch（返回与输入一一对应的 AIMessage 列表）一次性并发调用，
+    返回与 input_texts 顺序一致的回复文本。
+    """
+    keys = [_cache_key(model, system_prompt, text) for text in input_texts] if cache is not None else None
+    contents = [cache.get(key) for key in keys] if cache is not None else [None] * len(input_texts)
+    missing = [i for i, content in enumerate(contents) if content is None]
+    if missing:
+        start = time.perf_counter()
+        responses = batch([input_texts[i] for i in missing])
+        elapsed = time.perf_counter() - start
+        for i, response in zip(missing, responses):
+            contents[i] = response.content
+            if cache is not None:
+                _put_response(cache, keys[i], response, elapsed)
+    return contents
+
+
+async def abatch_with_cache(cache: Optional[LLMResponseCache], model, system_prompt: str, input_texts: List[str],
+                            abatch: Callable[[List[str]], Awaitable[List[object]]]) -> List[str]:
+    """
+    batch_with_cache 的异步版本。缓存读写与 ainvoke_with_cache 相同，在线程中执行。
+    """
+    if cache is not None:
+        keys = [_cache_key(model, system_prompt, text) for text in input_texts]
+        contents = await asyncio.to_thread(lambda: [cache.get(key) for key in keys])
+    else:
+        keys, contents = None, [None] * len(input_texts)
+    missing = [i for i, content in enumerate(contents) if content is None]
+    if missing:
+        start = time.perf_counter()
+        responses = await abatch([input_texts[i] for i in missing])
+        elapsed = time.perf_counter() - start
+        for i, response in zip(missing, responses):
+            contents[i] = response.content
+        if cache is not None:
+            await asyncio.to_thread(lambda: [_put_response(cache, keys[i], response, elapsed)
+                                             for i, response in zip(missing, responses)])
+    return contents
+
+
+# 按数据库路径共享的缓存实例
+_caches: Dict[str, LLMResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_llm_cache(config, component: str) -> Optional[LLMResponseCache]:
+    """
+    根据 config.json 的 llm_cache 配置返回 component（如 "content_formatter"）使用的缓存；
+    该组件未在 components 中启用时返回 None。
+    """
+    cache_config = config.llm_cache or {}
+    if component not in cache_config.get("components", []):
+        return None
+
+    path = cache_config.get("path", ".chatppt_cache/llm_responses.sqlite3")
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = LLMResponseCache(
+                path,
+                ttl=cache_config.get("ttl_hours", 168) * 3600,
+                max_entries=cache_config.get("max_entries", 10000),
+            )
+        return cache
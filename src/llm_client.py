@@ -0,0 +1,131 @@
+import threading
+from dataclasses import dataclass, fields
+from typing import Optional
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from config import Config
+from logger import LOG  # 导入日志工具
+
+
+@dataclass
+class LLMSettings:
+    """
+    LLM 客户端配置，对应 config.json 中的 "llm" 部分。未配置的项使用默认值。
+    """
+    model: str = "gpt-4o-mini"  # 模型名称
+    temperature: float = 0.5  # 默认采样温度（ChatBot、ContentFormatter、ContentAssistant 使用）
+    base_url: Optional[str] = None  # OpenAI 兼容接口地址，为 None 时使用 OPENAI_BASE_URL 环境变量或官方地址
+    api_key: Optional[str] = None  # 为 None 时使用 OPENAI_API_KEY 环境变量
+    timeout: float = 60.0  # 单次请求的读写超时（秒）
+    connect_timeout: float = 10.0  # 建立连接的超时（秒）
+    max_connections: int = 20  # 连接池的最大连接数
+    max_keepalive_connections: int = 10  # 连接池中保持的空闲长连接数
+    keepalive_expiry: float = 30.0  # 空闲长连接的保持时间（秒）
+    max_retries: int = 2  # 请求失败时的最大重试次数
+
+    @classmethod
+    def from_config(cls, config: Config) -> "LLMSettings":
+        llm_config = config.llm or {}
+        known = {f.name for f in fields(cls)}
+        unknown = set(llm_config) - known
+        if unknown:
+            LOG.warning(f"config.json 的 llm 配置中包含未知的配置项，已忽略: {sorted(unknown)}")
+        return cls(**{key: value for key, value in llm_config.items() if key in known})
+
+
+class LLMClientFactory:
+    """
+    LLM 客户端工厂。
+    所有 LangChain 组件（ChatBot、ContentFormatter、ContentAssistant、ImageAdvisor）通过它创建 ChatOpenAI，
+    共用同一组同步/异步 HTTP 连接池，复用长连接，避免每个组件、每次请求各自建立连接。
+    """
+    def __init__(self, settings: Optional[LLMSettings] = None):
+        self.settings = settings or LLMSettings()
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.settings.max_connections,
+            max_keepalive_connections=self.settings.max_keepalive_connections,
+            keepalive_expiry=self.settings.keepalive_expiry,
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.settings.timeout, connect=self.settings.connect_timeout)
+
+    @property
+    def http_client(self) -> httpx.Client:
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(limits=self._limits(), timeout=self._timeout())
+            return self._http_client
+
+    @property
+    def http_async_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._http_async_client is None:
+                self._http_async_client = httpx.AsyncClient(limits=self._limits(), timeout=self._timeout())
+            return self._http_async_client
+
+    def create_chat_model(self, temperature: Optional[float] = None, max_tokens: int = 4096, **kwargs) -> ChatOpenAI:
+        """
+        创建使用共享连接池的 ChatOpenAI。temperature 为 None 时使用配置中的 temperature，kwargs 可覆盖其他 ChatOpenAI 参数。
+        """
+        settings = self.settings
+        params = dict(
+            model=settings.model,
+            temperature=settings.temperature if temperature is None else temperature,
+            max_tokens=max_tokens,
+            timeout=self._timeout(),
+            max_retries=settings.max_retries,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+        )
+        if settings.base_url:
+            params["base_url"] = settings.base_url
+        if settings.api_key:
+            params["api_key"] = settings.api_key
+        params.update(kwargs)
+        return ChatOpenAI(**params)
+
+    def close(self):
+        """
+        关闭同步连接池。异步连接池需在事件循环中调用 aclose 关闭。
+        """
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+
+    async def aclose(self):
+        with self._lock:
+            client, self._http_async_client = self._http_async_client, None
+        if client is not None:
+            await client.aclose()
+        self.close()
+
+
+# 全局共享的 LLM 客户端工厂，首次使用时从 config.json 加载配置
+_llm_factory: Optional[LLMClientFactory] = None
+_llm_factory_lock = threading.Lock()
+
+
+def get_llm_factory() -> LLMClientFactory:
+    global _llm_factory
+    with _llm_factory_lock:
+        if _llm_factory is None:
+            _llm_factory = LLMClientFactory(LLMSettings.from_config(Config()))
+        return _llm_factory
+
+
+def set_llm_factory(factory: LLMClientFactory):
+    """
+    替换全局的 LLM 客户端工厂，例如使用非默认配置文件或本地模型服务时。
+    """
+    global _llm_factory
+    with _llm_factory_lock:
+        _llm_factory = factory
@@ -1,65 +1,42 @@
-import os
 import argparse
-from input_parser import parse_input_text
-from ppt_generator import generate_presentation
-from template_manager import load_template, print_layouts, get_layout_mapping
-from layout_manager import LayoutManager
+from template_manager import print_layouts
+from template_cache import template_cache
 from config import Config
+from pipeline import Pipeline
+from build_cache import BuildCache
+from media_store import configure_media_store
+from batch_generator import collect_inputs, generate_batch
 from logger import LOG  # 引入 LOG 模块
-from content_formatter import ContentFormatter
-from content_assistant import ContentAssistant
 
-# 新增导入 docx_parser 模块中的函数
-from docx_parser import generate_markdown_from_docx
+# 构建缓存目录：记录输入、模板、提示和配置的哈希及中间 markdown，未变化的输入不再重新生成
+CACHE_DIR = ".chatppt_cache"
 
 # 定义主函数，处理输入并生成 PowerPoint 演示文稿
-def main(input_file):
+def main(input_file, force=False):
     config = Config()  # 加载配置文件
-    content_formatter = ContentFormatter()
-    content_assistant = ContentAssistant()
-
-    # 检查输入文件是否存在
-    if not os.path.exists(input_file):
-        LOG.error(f"{input_file} 不存在。")  # 如果文件不存在，记录错误日志
-        return
-
-    # 根据输入文件的扩展名判断文件类型
-    file_extension = os.path.splitext(input_file)[1].lower()
-
-    if file_extension in ['.md', '.markdown']:
-        # 处理 markdown 文件
-        with open(input_file, 'r', encoding='utf-8') as file:
-            input_text = file.read()
-    elif file_extension == '.docx':
-        # 处理 docx 文件
-        LOG.info(f"正在解析 docx 文件: {input_file}")
-        # 调用 generate_markdown_from_docx 函数，获取 markdown 内容
-        raw_content = generate_markdown_from_docx(input_file)
-        markdown_content = content_formatter.format(raw_content)
-        input_text = content_assistant.adjust_single_picture(markdown_content)
-    else:
-        # 不支持的文件类型
-        LOG.error(f"暂不支持的文件格式: {file_extension}")
-        return
+    configure_media_store(config)  # 媒体存储（docx 图片、检索到的配图）的容量上限和淘汰保护期取自配置
 
     # 加载 PowerPoint 模板，并打印模板中的可用布局
-    ppt_template = load_template(config.ppt_template)  # 加载模板文件
+    ppt_template = template_cache.clone(config.ppt_template)  # 加载模板文件（缓存后供生成时复用）
     LOG.info("可用的幻灯片布局:")  # 记录信息日志，打印可用布局
     print_layouts(ppt_template)  # 打印模板中的布局
 
-    # 初始化 LayoutManager，使用配置文件中的 layout_mapping
-    layout_manager = LayoutManager(get_layout_mapping(ppt_template))
-
-    # 调用 parse_input_text 函数，解析输入文本，生成 PowerPoint 数据结构
-    powerpoint_data, presentation_title = parse_input_text(input_text, layout_manager)
+    # 初始化流水线（LayoutManager、图片处理器等），读取输入、解析并生成 PowerPoint 演示文稿
+    pipeline = Pipeline(config, BuildCache(CACHE_DIR, force=force))
+    try:
+        pipeline.run(input_file)
+    except (FileNotFoundError, ValueError) as e:
+        # 输入文件不存在或格式不支持时，记录错误日志
+        LOG.error(str(e))
 
-    LOG.info(f"解析转换后的 ChatPPT PowerPoint 数据结构:\n{powerpoint_data}")  # 记录信息日志，打印解析后的 PowerPoint 数据
-
-    # 定义输出 PowerPoint 文件的路径
-    output_pptx = f"outputs/{presentation_title}.pptx"
-
-    # 调用 generate_presentation 函数生成 PowerPoint 演示文稿
-    generate_presentation(powerpoint_data, config.ppt_template, output_pptx)
+# 批量模式：使用进程池处理目录或清单中的所有输入文件
+def batch_main(source, output_dir, max_workers, force=False):
+    inputs = collect_inputs(source)
+    if not inputs:
+        LOG.error(f"{source} 中没有找到可处理的 markdown 或 docx 文件。")
+        return
+    LOG.info(f"批量生成 {len(inputs)} 个输入文件，输出目录: {output_dir}")
+    generate_batch(inputs, output_dir=output_dir, max_workers=max_workers, cache_dir=CACHE_DIR, force=force)
 
 # 程序入口
 if __name__ == "__main__":
@@ -71,9 +48,20 @@ if __name__ == "__main__":
         default='inputs/markdown/test_input.md',  # 默认值
         help='输入 markdown 或 docx 文件的路径（默认: inputs/markdown/test_input.md）'
     )
+    parser.add_argument(
+        '--batch',  # 批量模式
+        metavar='SOURCE',
+        help='批量生成：输入目录，或每行一个文件路径的清单文件（.json 为路径列表）'
+    )
+    parser.add_argument('--output-dir', default='outputs', help='批量模式的输出目录（默认: outputs）')
+    parser.add_argument('--workers', type=int, default=None, help='批量模式的工作进程数（默认: CPU 核数）')
+    parser.add_argument('--force', action='store_true', help='忽略构建缓存，重新解析、调用 LLM 并生成所有输入')
 
     # 解析命令行参数
     args = parser.parse_args()
 
-    # 使用解析后的输入文件参数运行主函数
-    main(args.input_file)
+    if args.batch:
+        batch_main(args.batch, args.output_dir, args.workers, args.force)
+    else:
+        # 使用解析后的输入文件参数运行主函数
+        main(args.input_file, args.force)
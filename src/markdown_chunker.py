@@ -0,0 +1,119 @@
+import re
+from typing import List, Optional, Tuple
+
+# markdown 标题行：1-6 个 # 后跟空白和标题文本
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*)$')
+# 中日韩文字（CJK 统一表意文字、假名、谚文、全角标点），每个字符大约对应一个 token
+CJK_PATTERN = re.compile(r'[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的 token 数：中日韩字符按每字 1 个 token，其余字符按每 4 个字符 1 个 token。
+    只用于切分时控制分块大小，不依赖具体模型的分词器，结果是确定的。
+    """
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _split_at_headings(lines: List[str], level: int) -> List[List[str]]:
+    # 在不低于 level 级（# 数量不超过 level）的标题处切分，标题行属于它之后的块
+    blocks, current = [], []
+    for line in lines:
+        match = HEADING_PATTERN.match(line)
+        if match and len(match.group(1)) <= level and current:
+            blocks.append(current)
+            current = []
+        current.append(line)
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def _split_pieces(lines: List[str], max_tokens: int, level: int = 1) -> List[str]:
+    # 递归地在越来越低级的标题处切分，直到每一块不超过 max_tokens；没有可用的标题时按行切分
+    text = '\n'.join(lines)
+    if estimate_tokens(text) <= max_tokens or len(lines) == 1:
+        return [text]
+    if level > 6:
+        return lines
+    blocks = _split_at_headings(lines, level)
+    if len(blocks) == 1:
+        return _split_pieces(lines, max_tokens, level + 1)
+    return [piece for block in blocks for piece in _split_pieces(block, max_tokens, level + 1)]
+
+
+def split_markdown_sections(markdown: str, max_tokens: int) -> Tuple[Optional[str], List[str]]:
+    """
+    将 docx 转换得到的原始 markdown 在标题边界处切分为不超过 max_tokens 的分块，保持原有顺序。
+
+    优先在高级标题（#、##）处切分，某一节仍然过长时再在其下级标题处切分；相邻的小节会合并到同一分块中。
+    第一个一级标题作为演示文稿标题单独返回，不计入分块。
+    单独一行超过 max_tokens 时无法再切分，会单独成为一个分块。
+
+    参数:
+        markdown (str): 原始 markdown 内容
+        max_tokens (int): 每个分块的 token 预算（按 estimate_tokens 估算）
+
+    返回:
+        title (str | None): 演示文稿标题
+        chunks (list): 按原有顺序排列的分块
+    """
+    lines = markdown.split('\n')
+    title = None
+    for i, line in enumerate(lines):
+        match = HEADING_PATTERN.match(line)
+        if match and len(match.group(1)) == 1:
+            title = match.group(2).strip()
+            del lines[i]
+            break
+
+    # 将切分出的小块按顺序合并，每个分块尽量接近但不超过预算
+    chunks, current, current_tokens = [], [], 0
+    for piece in _split_pieces(lines, max_tokens):
+        tokens = estimate_tokens(piece) + 1  # 加上连接用的换行
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append('\n'.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append('\n'.join(current))
+
+    return title, [chunk for chunk in chunks if chunk.strip()]
+
+
+def strip_title(output: str) -> Tuple[Optional[str], str]:
+    """
+    去掉模型输出中的一级标题（演示文稿标题）和包裹结果的代码块标记，返回 (第一个一级标题, 其余内容)。
+    """
+    title = None
+    lines = []
+    for line in output.strip().split('\n'):
+        if line.startswith('```'):
+            continue
+        match = HEADING_PATTERN.match(line)
+        if match and len(match.group(1)) == 1:
+            if title is None:
+                title = match.group(2).strip()
+            continue
+        lines.append(line)
+    return title, '\n'.join(lines).strip()
+
+
+def merge_formatted_chunks(outputs: List[str], title: Optional[str] = None) -> str:
+    """
+    按分块顺序合并各分块的格式化结果，得到一份完整的演示文稿大纲。
+    各分块结果中的代码块标记被去掉；一级标题（演示文稿标题）只在开头保留一个：优先使用 title，否则使用第一个分块结果中的标题。
+    """
+    body = []
+    for output in outputs:
+        output_title, section = strip_title(output)
+        if title is None:
+            title = output_title
+        if section:
+            body.append(section)
+
+    if title:
+        body.insert(0, f"# {title}")
+    return '\n\n'.join(body) + '\n'
@@ -0,0 +1,232 @@
+import os
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import fcntl  # 进程间的目录锁（仅 Unix 平台可用）
+except ImportError:
+    fcntl = None
+
+from logger import LOG  # 引入日志模块
+
+# 访问时间的更新间隔（秒）。同一文件在该间隔内的重复访问只更新内存索引，避免频繁写文件系统
+TOUCH_INTERVAL = 60
+
+# 默认的淘汰保护期（秒）：最近使用时间在该期限内的文件不会被淘汰
+GRACE_PERIOD = 300
+
+# 淘汰保护期的下限（秒）。使用中的文件最多每隔 TOUCH_INTERVAL 秒才更新一次访问时间，
+# 保护期短于该下限时，其他进程刚写入或刚返回的文件可能被本进程淘汰，配置的保护期更短时按下限处理
+MIN_GRACE_PERIOD = 2 * TOUCH_INTERVAL
+
+# 重新扫描目录的间隔（秒）。索引随本进程的写入增量更新，每隔该间隔（或总大小超出上限时）才扫描一次目录，
+# 计入其他进程写入的文件
+SCAN_INTERVAL = 60
+
+# 总大小超出上限时两次扫描之间的最小间隔（秒），期间按内存索引淘汰，避免每次写入都扫描目录
+RESCAN_INTERVAL = 10
+
+# 存储目录中的锁文件，多个进程在重新扫描目录和淘汰文件时互斥
+LOCK_FILE = ".lock"
+
+
+class MediaStore:
+    """
+    按内容寻址的媒体文件存储。
+    文件以内容的 sha256 命名（{root}/{sha256}{ext}），相同的图片只保存一份，不同用户、同名文件之间也不会互相覆盖。
+    内存中的小型索引记录每个文件的大小和最近使用时间，总大小超过 max_bytes 时按最近最少使用淘汰。
+    最近使用时间保存在文件的访问时间（atime）中，多个进程可以共用同一目录：索引随写入增量更新，
+    总大小超出上限或距上次扫描超过 SCAN_INTERVAL 秒时，在目录锁（LOCK_FILE）下重新扫描目录，按所有进程写入的文件合计大小淘汰。
+    最近 grace_period 秒（不少于 MIN_GRACE_PERIOD）内写入或使用过的文件不会被淘汰（其他进程可能刚刚引用了它），
+    此时总大小可能暂时超出上限。
+    """
+    def __init__(self, root: str = "images/store", max_bytes: int = 512 * 1024 * 1024, grace_period: float = GRACE_PERIOD):
+        self.root = root
+        self.max_bytes = max_bytes  # 存储目录的最大总大小（字节）
+        self.grace_period = grace_period  # 淘汰保护期（秒）
+        self._index: Optional[Dict[str, list]] = None  # 文件名 -> [大小, 最近使用时间]
+        self._total_bytes = 0
+        self._last_scan = 0.0  # 上次扫描目录的时间
+        self._lock = threading.Lock()
+
+    def configure(self, max_bytes: Optional[int] = None, grace_period: Optional[float] = None):
+        """
+        设置容量上限和淘汰保护期，为 None 的参数保持不变。
+        """
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if grace_period is not None:
+                self.grace_period = grace_period
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def path_for(self, digest: str, ext: str) -> str:
+        """
+        返回内容哈希为 digest、扩展名为 ext（如 ".png"）的文件在存储中的路径。
+        """
+        return os.path.join(self.root, f"{digest}{ext}")
+
+    def _load_index(self):
+        # 首次使用时扫描目录重建索引（调用方需持有锁）
+        if self._index is None:
+            self._scan()
+
+    def _scan(self):
+        # 扫描目录重建索引，包含其他进程写入的文件；本进程记录的更近的使用时间保留（调用方需持有锁）
+        os.makedirs(self.root, exist_ok=True)
+        previous = self._index or {}
+        self._last_scan = time.time()
+        self._index = {}
+        self._total_bytes = 0
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.endswith('.tmp') and not entry.name.startswith('.'):
+                    stat = entry.stat()
+                    last_used = max(stat.st_atime, stat.st_mtime)
+                    if entry.name in previous:
+                        last_used = max(last_used, previous[entry.name][1])
+                    self._index[entry.name] = [stat.st_size, last_used]
+                    self._total_bytes += stat.st_size
+
+    @contextmanager
+    def _dir_lock(self):
+        # 进程间互斥地扫描和淘汰；不支持 fcntl 的平台上只在进程内互斥
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.root, LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get(self, path: str) -> Optional[str]:
+        """
+        若 path 已在存储中，更新其最近使用时间并返回该路径，否则返回 None。
+        """
+        name = os.path.basename(path)
+        with self._lock:
+            self._load_index()
+            entry = self._index.get(name)
+            if entry is None:
+                return None
+            if not os.path.exists(path):
+                # 文件已被其他进程淘汰
+                self._total_bytes -= entry[0]
+                del self._index[name]
+                return None
+            now = time.time()
+            if now - entry[1] >= TOUCH_INTERVAL:
+                try:
+                    # 只更新访问时间，保留修改时间，避免按 (路径, 修改时间) 缓存的组件失效
+                    os.utime(path, (now, os.stat(path).st_mtime))
+                except OSError:
+                    pass
+            entry[1] = now
+        return path
+
+    def touch(self, path: str):
+        """
+        记录存储中的文件被使用（例如插入演示文稿），不在存储中的路径会被忽略。
+        """
+        if os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.root):
+            self.get(path)
+
+    def write(self, path: str, data: bytes) -> str:
+        """
+        将数据原子地写入存储中的 path（由 path_for 得到），并在超出容量时淘汰最近最少使用的文件。
+        索引增量更新；超出容量或到达扫描间隔时才在目录锁下重新扫描目录，其他进程写入的文件也计入总大小。
+        """
+        os.makedirs(self.root, exist_ok=True)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        name = os.path.basename(path)
+        with self._lock:
+            self._load_index()
+            previous = self._index.get(name)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            now = time.time()
+            self._index[name] = [len(data), now]
+            self._total_bytes += len(data)
+
+            since_scan = now - self._last_scan
+            if since_scan >= SCAN_INTERVAL or (self._total_bytes > self.max_bytes and since_scan >= RESCAN_INTERVAL):
+                with self._dir_lock():
+                    self._scan()
+                    self._evict(keep=name)
+            elif self._total_bytes > self.max_bytes:
+                with self._dir_lock():
+                    self._evict(keep=name)
+        return path
+
+    def put(self, data: bytes, ext: str) -> str:
+        """
+        保存数据并返回其在存储中的路径。相同内容只写入一次。
+        """
+        path = self.path_for(self.digest(data), ext)
+        return self.get(path) or self.write(path, data)
+
+    def _evict(self, keep: str):
+        # 总大小超过上限时，按最近使用时间从旧到新删除文件（调用方需持有锁和目录锁），
+        # 不删除刚写入的文件和保护期内使用过的文件。索引中的时间可能已过时（其他进程在扫描后写入或使用了该文件），
+        # 删除前再读取一次文件的修改和访问时间
+        if self._total_bytes <= self.max_bytes:
+            return
+        protected_since = time.time() - max(self.grace_period, MIN_GRACE_PERIOD)
+        for name, entry in sorted(self._index.items(), key=lambda item: item[1][1]):
+            size, last_used = entry
+            if self._total_bytes <= self.max_bytes or last_used >= protected_since:
+                break
+            if name == keep:
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+                disk_last_used = max(stat.st_atime, stat.st_mtime)
+                if disk_last_used >= protected_since:
+                    entry[1] = disk_last_used
+                    continue
+                os.remove(path)
+                LOG.debug(f"[媒体存储] 淘汰 {name}（{size} 字节）")
+            except FileNotFoundError:
+                pass  # 已被其他进程淘汰
+            del self._index[name]
+            self._total_bytes -= size
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._load_index()
+            return self._total_bytes
+
+    def __len__(self):
+        with self._lock:
+            self._load_index()
+            return len(self._index)
+
+
+def configure_media_store(config):
+    """
+    按 config.json 设置全局媒体存储的容量上限（media_store_max_mb）和淘汰保护期（media_store_grace_seconds）。
+    应在程序启动时（或工作进程初始化时）调用一次。
+    """
+    media_store.configure(
+        max_bytes=config.media_store_max_mb * 1024 * 1024,
+        grace_period=config.media_store_grace_seconds,
+    )
+
+
+# 全局共享的媒体存储
+media_store = MediaStore()
@@ -0,0 +1,106 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+from input_parser import tokenize_line, TOKEN_TITLE, TOKEN_SLIDE, TOKEN_BULLET, TOKEN_IMAGE, TOKEN_TEXT
+
+# 拆分后的幻灯片以第一个一级要点作为标题时，要点文本的最大长度；更长时使用 "原标题（序号）"
+MAX_CAPTION_TITLE_LENGTH = 30
+
+
+class Section(NamedTuple):
+    text: str  # markdown 文本（幻灯片以 "## " 标题行开始）
+    ambiguous: bool  # 规则无法确定如何拆分，需要交给 LLM 处理
+
+
+def _split_slides(markdown: str) -> Tuple[Optional[str], List[str], List[List[str]]]:
+    # 将 markdown 分为第一个 "## " 之前的部分和各幻灯片的行（保留行尾换行符），并提取演示文稿标题
+    title = None
+    preamble: List[str] = []
+    slides: List[List[str]] = []
+    for line_no, line in enumerate(markdown.splitlines(keepends=True), start=1):
+        token = tokenize_line(line, line_no)
+        if token is not None and token.kind == TOKEN_SLIDE:
+            slides.append([line])
+        elif slides:
+            slides[-1].append(line)
+        else:
+            preamble.append(line)
+            if token is not None and token.kind == TOKEN_TITLE and title is None:
+                title = token.text
+    return title, preamble, slides
+
+
+def _segment_title(slide_title: str, segment: List[str], index: int) -> str:
+    # 拆分出的第 index 张（从 0 开始）幻灯片的标题：第一张沿用原标题，其余使用该部分第一个一级要点，过长时使用序号
+    if index == 0:
+        return slide_title
+    for line_no, line in enumerate(segment, start=1):
+        token = tokenize_line(line, line_no)
+        if token is not None and token.kind == TOKEN_BULLET and token.level == 0:
+            caption = token.text.rstrip('：:').strip()
+            if caption and len(caption) <= MAX_CAPTION_TITLE_LENGTH:
+                return caption
+            break
+    return f"{slide_title}（{index + 1}）"
+
+
+def _normalize_slide(lines: List[str]) -> Tuple[List[str], bool]:
+    """
+    将一张幻灯片按图片拆分为多张，每张最多一张图片。返回拆分后各幻灯片的文本和是否存在歧义。
+    每张图片与它之前的要点归为一张幻灯片，最后一张图片之后的要点归入最后一张。
+    幻灯片中有无法识别的文本行，或图片位于多级要点中间（其后紧跟下级要点）时，拆分会破坏原有结构，视为歧义。
+    """
+    text = ''.join(lines)
+    tokens = [tokenize_line(line, line_no) for line_no, line in enumerate(lines, start=1)]
+    images = [i for i, token in enumerate(tokens) if token is not None and token.kind == TOKEN_IMAGE]
+    if len(images) <= 1:
+        return [text], False
+
+    if any(token is not None and token.kind == TOKEN_TEXT for token in tokens):
+        return [text], True
+    for i in images[:-1]:
+        following = next((token for token in tokens[i + 1:] if token is not None), None)
+        if following is not None and following.kind == TOKEN_BULLET and following.level > 0:
+            return [text], True
+
+    slide_title = tokens[0].text
+    boundaries = [0] + [i + 1 for i in images[:-1]] + [len(lines)]
+    segments = []
+    for index, (start, end) in enumerate(zip(boundaries, boundaries[1:])):
+        body = lines[max(start, 1):end]
+        while body and not body[-1].strip():
+            body.pop()
+        while body and not body[0].strip():
+            body.pop(0)
+        title = _segment_title(slide_title, body, index)
+        segments.append(f"## {title}\n" + ''.join(line if line.endswith('\n') else line + '\n' for line in body) + '\n')
+    return segments, False
+
+
+def normalize_single_picture(markdown: str) -> Tuple[Optional[str], List[Section]]:
+    """
+    在本地按 prompts/content_assistant.txt 的规则调整 ChatPPT markdown，使每张幻灯片最多包含一张图片：
+    包含多张图片的幻灯片按图片拆分为多张，不补充新的内容。
+    无法按规则确定拆分方式的幻灯片保留原文并标记为歧义，由调用方决定是否交给 LLM 处理。
+
+    参数:
+        markdown (str): ChatPPT markdown 内容
+
+    返回:
+        title (str | None): 演示文稿标题
+        sections (list): 依次排列的各部分（标题等前置内容、各幻灯片），按顺序拼接即为调整后的内容
+    """
+    title, preamble, slides = _split_slides(markdown)
+    sections = []
+    if preamble:
+        sections.append(Section(''.join(preamble), False))
+    for lines in slides:
+        texts, ambiguous = _normalize_slide(lines)
+        sections.extend(Section(text, ambiguous) for text in texts)
+    return title, sections
+
+
+def join_sections(sections: List[Section]) -> str:
+    """
+    按顺序拼接各部分，得到完整的 markdown。
+    """
+    return ''.join(section.text for section in sections)
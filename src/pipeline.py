@@ -0,0 +1,206 @@
+import os
+import time
+import asyncio
+from typing import Optional
+
+from config import Config
+from input_parser import parse_input_text
+from ppt_generator import generate_presentation
+from template_cache import template_cache
+from layout_manager import LayoutManager
+from image_embedder import ImageEmbedder
+from llm_cache import get_llm_cache
+from utils import sanitize_filename
+from build_cache import BuildCache, hash_file, hash_text, hash_referenced_images
+from logger import LOG  # 引入日志模块
+
+# 支持的输入文件扩展名
+MARKDOWN_EXTENSIONS = ('.md', '.markdown')
+DOCX_EXTENSIONS = ('.docx',)
+SUPPORTED_EXTENSIONS = MARKDOWN_EXTENSIONS + DOCX_EXTENSIONS
+
+
+class Pipeline:
+    """
+    演示文稿生成流水线：读取输入（markdown 或 docx）→ 解析 → 布局 → 渲染。
+    模板、布局管理器和图片处理器在创建时加载一次，可重复用于多个输入文件；
+    docx 所需的 LLM 组件（ContentFormatter、ContentAssistant）在第一次遇到 docx 时才创建。
+    提供 build_cache 时，各阶段的中间结果按内容哈希缓存，输入未变化的阶段和已是最新的输出会被跳过。
+    """
+    def __init__(self, config: Optional[Config] = None, build_cache: Optional[BuildCache] = None,
+                 content_formatter=None, content_assistant=None):
+        self.config = config or Config()
+        self.build_cache = build_cache
+        self.layout_manager = LayoutManager(template_cache.get_layout_mapping(self.config.ppt_template))
+        self.embedder = ImageEmbedder(dpi=self.config.image_dpi)
+        self._content_formatter = content_formatter
+        self._content_assistant = content_assistant
+
+    @property
+    def content_formatter(self):
+        if self._content_formatter is None:
+            from content_formatter import ContentFormatter
+            self._content_formatter = ContentFormatter(self.config.content_formatter_prompt,
+                                                       get_llm_cache(self.config, "content_formatter"),
+                                                       self.config.format_chunk_tokens,
+                                                       self.config.format_max_concurrency)
+        return self._content_formatter
+
+    @property
+    def content_assistant(self):
+        if self._content_assistant is None:
+            from content_assistant import ContentAssistant
+            self._content_assistant = ContentAssistant(self.config.content_assistant_prompt,
+                                                       get_llm_cache(self.config, "content_assistant"),
+                                                       self.config.content_assistant_mode)
+        return self._content_assistant
+
+    def _cached_stage(self, stage: str, key: str, produce) -> str:
+        """
+        执行一个产出 markdown 的阶段。启用构建缓存且键命中时直接返回缓存结果，否则执行 produce 并写入缓存。
+        """
+        if self.build_cache is None:
+            return produce()
+        content = self.build_cache.get_stage(stage, key)
+        if content is None:
+            content = produce()
+            self.build_cache.put_stage(stage, key, content)
+        return content
+
+    async def _acached_stage(self, stage: str, key: str, produce) -> str:
+        """
+        _cached_stage 的异步版本，produce 返回可等待对象。
+        """
+        if self.build_cache is None:
+            return await produce()
+        content = self.build_cache.get_stage(stage, key)
+        if content is None:
+            content = await produce()
+            self.build_cache.put_stage(stage, key, content)
+        return content
+
+    def _llm_key(self) -> str:
+        # LLM 输出取决于模型、接口地址和采样温度（config.json 的 llm 部分），更换模型或服务后缓存的结果不再命中。
+        # 直接读取配置而不创建 LLM 客户端，缓存命中时无需加载 LLM 相关模块；未配置的项按 None 计入
+        llm_config = self.config.llm or {}
+        base_url = llm_config.get("base_url") or os.environ.get("OPENAI_BASE_URL")
+        return hash_text(repr(llm_config.get("model")), repr(base_url), repr(llm_config.get("temperature")))
+
+    def _format_key(self, raw_content: str) -> str:
+        # 格式化结果取决于原始内容、提示、分块方式和 LLM 配置
+        return hash_text(raw_content, hash_file(self.config.content_formatter_prompt),
+                         str(self.config.format_chunk_tokens), self._llm_key())
+
+    def _adjust_key(self, markdown_content: str) -> str:
+        # 调整配图的结果取决于格式化后的内容、提示、拆分方式和 LLM 配置
+        return hash_text(markdown_content, hash_file(self.config.content_assistant_prompt),
+                         self.config.content_assistant_mode, self._llm_key())
+
+    def load_input_text(self, input_file: str) -> str:
+        """
+        读取输入文件并返回 ChatPPT markdown 文本。docx 文件会先转换为 markdown，再经 LLM 格式化和调整配图。
+        """
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"{input_file} 不存在。")
+
+        # 根据输入文件的扩展名判断文件类型
+        file_extension = os.path.splitext(input_file)[1].lower()
+
+        if file_extension in MARKDOWN_EXTENSIONS:
+            # 处理 markdown 文件
+            with open(input_file, 'r', encoding='utf-8') as file:
+                return file.read()
+        elif file_extension in DOCX_EXTENSIONS:
+            # 处理 docx 文件
+            return self.convert_docx(input_file)
+        else:
+            # 不支持的文件类型
+            raise ValueError(f"暂不支持的文件格式: {file_extension}")
+
+    def convert_docx(self, input_file: str) -> str:
+        """
+        将 docx 文件转换为 markdown，再经 LLM 格式化和调整配图，返回 ChatPPT markdown。
+        每个阶段以其输入内容和提示的哈希为键，重复的文件（即使文件名或路径不同）不再重新解析或调用 LLM。
+        """
+        from docx_parser import generate_markdown_from_docx
+        LOG.info(f"正在解析 docx 文件: {input_file}")
+        raw_content = self._cached_stage(
+            "docx", hash_file(input_file),
+            lambda: generate_markdown_from_docx(input_file, streaming=self.config.docx_streaming),
+        )
+        markdown_content = self._cached_stage(
+            "format", self._format_key(raw_content),
+            lambda: self.content_formatter.format(raw_content),
+        )
+        return self._cached_stage(
+            "adjust", self._adjust_key(markdown_content),
+            lambda: self.content_assistant.adjust_single_picture(markdown_content),
+        )
+
+    async def aconvert_docx(self, input_file: str) -> str:
+        """
+        convert_docx 的异步版本：docx 解析和哈希计算在线程中执行，LLM 阶段使用 ainvoke，不阻塞事件循环。
+        """
+        from docx_parser import generate_markdown_from_docx
+        LOG.info(f"正在解析 docx 文件: {input_file}")
+        docx_hash = await asyncio.to_thread(hash_file, input_file)
+        raw_content = await self._acached_stage(
+            "docx", docx_hash,
+            lambda: asyncio.to_thread(generate_markdown_from_docx, input_file, streaming=self.config.docx_streaming),
+        )
+        markdown_content = await self._acached_stage(
+            "format", self._format_key(raw_content),
+            lambda: self.content_formatter.aformat(raw_content),
+        )
+        return await self._acached_stage(
+            "adjust", self._adjust_key(markdown_content),
+            lambda: self.content_assistant.aadjust_single_picture(markdown_content),
+        )
+
+    def run(self, input_file: str, output_path: Optional[str] = None, output_dir: str = "outputs") -> dict:
+        """
+        处理单个输入文件并生成演示文稿，返回输出路径和各阶段耗时（秒）。
+        output_path 未指定时使用 output_dir/{演示文稿标题}.pptx。
+        """
+        timings = {}
+        start = time.perf_counter()
+
+        input_text = self.load_input_text(input_file)
+        timings["load"] = time.perf_counter() - start
+
+        # 输入内容、引用的图片、模板和配置均未变化且输出文件仍存在时，跳过解析和渲染
+        render_key = None
+        if self.build_cache is not None:
+            render_key = hash_text(
+                input_text,
+                hash_referenced_images(input_text),
+                hash_file(self.config.ppt_template),
+                hash_file(self.config.config_file),
+                output_path or output_dir,
+            )
+            record = self.build_cache.get_up_to_date_output(input_file, render_key)
+            if record is not None:
+                LOG.info(f"{input_file} 未变化，跳过生成: '{record['output']}'")
+                timings["total"] = time.perf_counter() - start
+                return {"output": record["output"], "title": record["title"], "timings": timings, "skipped": True}
+
+        # 解析输入文本，生成 PowerPoint 数据结构
+        stage_start = time.perf_counter()
+        powerpoint_data, presentation_title = parse_input_text(input_text, self.layout_manager)
+        timings["parse"] = time.perf_counter() - stage_start
+        LOG.info(f"解析转换后的 ChatPPT PowerPoint 数据结构:\n{powerpoint_data}")
+
+        if output_path is None:
+            output_path = os.path.join(output_dir, f"{sanitize_filename(presentation_title)}.pptx")
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+        # 渲染并保存演示文稿
+        stage_start = time.perf_counter()
+        generate_presentation(powerpoint_data, self.config.ppt_template, output_path, embedder=self.embedder)
+        timings["render"] = time.perf_counter() - stage_start
+        timings["total"] = time.perf_counter() - start
+
+        if self.build_cache is not None:
+            self.build_cache.record_output(input_file, render_key, output_path, presentation_title)
+
+        return {"output": output_path, "title": presentation_title, "timings": timings, "skipped": False}
@@ -1,8 +1,12 @@
 import os
-from pptx import Presentation
+from io import BytesIO
+from typing import IO, Union
 from pptx.util import Inches
-from PIL import Image
-from utils import remove_all_slides
+from template_cache import template_cache
+from template_manager import get_layout_placeholder_index
+from slide_cache import capture_slide, restore_slide
+from image_embedder import image_embedder
+from media_store import media_store
 from logger import LOG  # 引入日志模块
 
 def format_text(paragraph, text):
@@ -34,12 +38,15 @@ def format_text(paragraph, text):
         run = paragraph.add_run()
         run.text = text
 
-def insert_image_centered_in_placeholder(new_slide, image_path):
+def insert_image_centered_in_placeholder(new_slide, image_path, placeholder=None, geometry=None, embedder=None):
     """
     将图片插入到 Slide 中，使其中心与 placeholder 的中心对齐。
     如果图片尺寸超过 placeholder，则进行缩小适配。
     在插入成功后删除 placeholder。
+    placeholder 和 geometry 可由布局占位符索引直接给出，未提供时遍历 placeholders 查找图片占位符。
+    embedder 为 ImageEmbedder，负责将图片缩放到占位符的实际分辨率后再嵌入，未提供时使用全局共享实例。
     """
+    embedder = embedder or image_embedder
     # 构建图片的绝对路径
     image_full_path = os.path.join(os.getcwd(), image_path)
     
@@ -47,97 +54,156 @@ def insert_image_centered_in_placeholder(new_slide, image_path):
     if not os.path.exists(image_full_path):
         LOG.warning(f"图片路径 '{image_full_path}' 不存在，跳过此图片。")
         return
+    media_store.touch(image_full_path)  # 媒体存储中的图片被使用时更新其最近使用时间，避免被淘汰
 
-    # 打开图片并获取其大小（以像素为单位）
-    with Image.open(image_full_path) as img:
-        img_width_px, img_height_px = img.size
-
-    # 遍历找到图片的 placeholder（type 18 表示图片 placeholder）
-    for shape in new_slide.placeholders:
-        if shape.placeholder_format.type == 18:
-            placeholder_width = shape.width
-            placeholder_height = shape.height
-            placeholder_left = shape.left
-            placeholder_top = shape.top
-
-            # 计算 placeholder 的中心点
-            placeholder_center_x = placeholder_left + placeholder_width / 2
-            placeholder_center_y = placeholder_top + placeholder_height / 2
-
-            # 图片的宽度和高度转换为 PowerPoint 的单位 (Inches)
-            img_width = Inches(img_width_px / 96)  # 假设图片 DPI 为 96
-            img_height = Inches(img_height_px / 96)
-
-            # 如果图片的宽度或高度超过 placeholder，按比例缩放图片
-            if img_width > placeholder_width or img_height > placeholder_height:
-                scale = min(placeholder_width / img_width, placeholder_height / img_height)
-                img_width *= scale
-                img_height *= scale
-
-            # 计算图片左上角位置，使其中心对准 placeholder 中心
-            left = placeholder_center_x - img_width / 2
-            top = placeholder_center_y - img_height / 2
-
-            # 插入图片到指定位置并设定缩放后的大小
-            new_slide.shapes.add_picture(image_full_path, left, top, width=img_width, height=img_height)
-            LOG.debug(f"图片已插入，并以 placeholder 中心对齐，路径: {image_full_path}")
-
-            # 移除占位符
-            sp = shape._element  # 获取占位符的 XML 元素
-            sp.getparent().remove(sp)  # 从父元素中删除
-            LOG.debug("已删除图片的 placeholder")
-            break
-
-# 生成 PowerPoint 演示文稿
-def generate_presentation(powerpoint_data, template_path: str, output_path: str):
-    # 检查模板文件是否存在
-    if not os.path.exists(template_path):
-        LOG.error(f"模板文件 '{template_path}' 不存在。")  # 记录错误日志
-        raise FileNotFoundError(f"模板文件 '{template_path}' 不存在。")
-
-    prs = Presentation(template_path)  # 加载 PowerPoint 模板
-    remove_all_slides(prs)  # 清除模板中的所有幻灯片
+    # 未指定 placeholder 时，遍历找到图片的 placeholder（type 18 表示图片 placeholder）
+    if placeholder is None:
+        for shape in new_slide.placeholders:
+            if shape.placeholder_format.type == 18:
+                placeholder = shape
+                break
+        else:
+            return
+
+    # 优先使用布局索引中缓存的几何信息，避免每张幻灯片都沿布局继承链读取位置和大小
+    if geometry is not None:
+        placeholder_left, placeholder_top = geometry.left, geometry.top
+        placeholder_width, placeholder_height = geometry.width, geometry.height
+    else:
+        placeholder_left, placeholder_top = placeholder.left, placeholder.top
+        placeholder_width, placeholder_height = placeholder.width, placeholder.height
+
+    # 获取图片的大小（以像素为单位），同一图片只解码一次
+    img_width_px, img_height_px = embedder.get_image_size(image_full_path)
+
+    # 计算 placeholder 的中心点
+    placeholder_center_x = placeholder_left + placeholder_width / 2
+    placeholder_center_y = placeholder_top + placeholder_height / 2
+
+    # 图片的宽度和高度转换为 PowerPoint 的单位 (Inches)
+    img_width = Inches(img_width_px / 96)  # 假设图片 DPI 为 96
+    img_height = Inches(img_height_px / 96)
+
+    # 如果图片的宽度或高度超过 placeholder，按比例缩放图片
+    if img_width > placeholder_width or img_height > placeholder_height:
+        scale = min(placeholder_width / img_width, placeholder_height / img_height)
+        img_width *= scale
+        img_height *= scale
+
+    # 计算图片左上角位置，使其中心对准 placeholder 中心
+    left = placeholder_center_x - img_width / 2
+    top = placeholder_center_y - img_height / 2
+
+    # 按显示尺寸重采样图片后插入到指定位置，并设定缩放后的大小
+    image_file = embedder.embed(image_full_path, int(img_width), int(img_height))
+    new_slide.shapes.add_picture(image_file, left, top, width=img_width, height=img_height)
+    LOG.debug(f"图片已插入，并以 placeholder 中心对齐，路径: {image_full_path}")
+
+    # 移除占位符
+    sp = placeholder._element  # 获取占位符的 XML 元素
+    sp.getparent().remove(sp)  # 从父元素中删除
+    LOG.debug("已删除图片的 placeholder")
+
+# 按布局占位符索引渲染一张新的幻灯片
+def render_slide(prs, slide_layout, placeholder_info, slide, embedder=None):
+    new_slide = prs.slides.add_slide(slide_layout)  # 添加新的幻灯片
+
+    # 一次遍历新幻灯片的占位符，按 idx 建立查找表
+    placeholders = {shape.placeholder_format.idx: shape for shape in new_slide.placeholders}
+
+    # 设置幻灯片标题
+    title_shape = placeholders.get(placeholder_info.title_idx)
+    if title_shape is not None:
+        title_shape.text = slide.content.title
+        LOG.debug(f"设置幻灯片标题: {slide.content.title}")
+
+    # 添加文本内容
+    body_shape = placeholders.get(placeholder_info.body_idx)
+    if body_shape is not None:
+        text_frame = body_shape.text_frame
+        text_frame.clear()  # 清除原有内容
+
+        # 直接使用第一个段落，不添加新的段落，避免额外空行
+        first_paragraph = text_frame.paragraphs[0]
+
+        # 将要点内容作为项目符号列表添加到文本框中
+        for i, point in enumerate(slide.content.bullet_points):
+            # 第一个要点覆盖初始段落，其他要点添加新段落
+            paragraph = first_paragraph if i == 0 else text_frame.add_paragraph()
+            paragraph.level = point.level  # 设置项目符号的级别
+            format_text(paragraph, point.text)  # 调用 format_text 方法来处理加粗文本
+            LOG.debug(f"添加列表项: {paragraph.text}，级别: {paragraph.level}")
+
+    # 插入图片
+    if slide.content.image_path and placeholder_info.picture is not None:
+        picture_shape = placeholders.get(placeholder_info.picture.idx)
+        if picture_shape is not None:
+            insert_image_centered_in_placeholder(
+                new_slide, slide.content.image_path, picture_shape, placeholder_info.picture, embedder
+            )
+
+    return new_slide
+
+# 将 PowerPoint 数据结构中的幻灯片逐一添加到已清除幻灯片的模板中
+def build_presentation(prs, powerpoint_data, layout_index=None, slide_cache=None, template_key="", embedder=None):
+    """
+    layout_index 为模板的布局占位符索引（见 template_manager.get_layout_placeholder_index），
+    未提供时根据 prs 现场构建。
+    slide_cache 为可选的 SlideRenderCache，内容未变化的幻灯片直接复用缓存，template_key 用于区分不同模板。
+    embedder 为可选的 ImageEmbedder，用于按占位符分辨率处理图片。
+    """
     prs.core_properties.title = powerpoint_data.title  # 设置 PowerPoint 的核心标题
 
+    slide_layouts = list(prs.slide_layouts)
+    if layout_index is None:
+        layout_index = get_layout_placeholder_index(prs)
+
     # 遍历所有幻灯片数据，生成对应的 PowerPoint 幻灯片
     for slide in powerpoint_data.slides:
         # 确保布局索引不超出范围，超出则使用默认布局
-        if slide.layout_id >= len(prs.slide_layouts):
-            slide_layout = prs.slide_layouts[0]
+        layout_id = slide.layout_id if slide.layout_id < len(slide_layouts) else 0
+        slide_layout = slide_layouts[layout_id]
+
+        if slide_cache is None:
+            render_slide(prs, slide_layout, layout_index[layout_id], slide, embedder)
+            continue
+
+        # 内容未变化的幻灯片直接复用缓存，其余幻灯片重新渲染后写入缓存
+        key = slide_cache.make_key(template_key, layout_id, slide)
+        rendered = slide_cache.get(key)
+        if rendered is not None:
+            restore_slide(prs, slide_layout, rendered)
         else:
-            slide_layout = prs.slide_layouts[slide.layout_id]
-
-        new_slide = prs.slides.add_slide(slide_layout)  # 添加新的幻灯片
-
-        # 设置幻灯片标题
-        if new_slide.shapes.title:
-            new_slide.shapes.title.text = slide.content.title
-            LOG.debug(f"设置幻灯片标题: {slide.content.title}")
-
-        # 添加文本内容
-        for shape in new_slide.shapes:
-            # 只处理非标题的文本框
-            if shape.has_text_frame and not shape == new_slide.shapes.title:
-                text_frame = shape.text_frame
-                text_frame.clear()  # 清除原有内容
-
-                # 直接使用第一个段落，不添加新的段落，避免额外空行
-                first_paragraph = text_frame.paragraphs[0]
-                
-                # 将要点内容作为项目符号列表添加到文本框中
-                for point in slide.content.bullet_points:
-                    # 第一个要点覆盖初始段落，其他要点添加新段落
-                    paragraph = first_paragraph if point == slide.content.bullet_points[0] else text_frame.add_paragraph()
-                    paragraph.level = point["level"]  # 设置项目符号的级别
-                    format_text(paragraph, point["text"])  # 调用 format_text 方法来处理加粗文本
-                    LOG.debug(f"添加列表项: {paragraph.text}，级别: {paragraph.level}")
+            new_slide = render_slide(prs, slide_layout, layout_index[layout_id], slide, embedder)
+            slide_cache.put(key, capture_slide(new_slide))
 
-                break
+    if slide_cache is not None:
+        LOG.debug(f"幻灯片缓存: 命中 {slide_cache.hits} 次，未命中 {slide_cache.misses} 次")
+
+    return prs
 
-        # 插入图片
-        if slide.content.image_path:
-            insert_image_centered_in_placeholder(new_slide, slide.content.image_path)
+# 生成 PowerPoint 演示文稿
+def generate_presentation(powerpoint_data, template_path: str, output_path: Union[str, IO[bytes]], slide_cache=None, embedder=None):
+    """
+    output_path 可以是文件路径，也可以是调用方提供的可写二进制流（如 BytesIO、HTTP 响应体）。
+    slide_cache 为可选的 SlideRenderCache，用于在重复生成同一演示文稿时只重建修改过的幻灯片。
+    embedder 为可选的 ImageEmbedder，用于按占位符分辨率缩放图片，未提供时使用全局共享实例。
+    """
+    # 从模板缓存中克隆已清除幻灯片的模板（模板不存在时抛出 FileNotFoundError）
+    entry = template_cache.get_entry(template_path)
+    prs = template_cache.clone(template_path)
+    template_key = f"{os.path.abspath(template_path)}:{entry.mtime}"
+    build_presentation(prs, powerpoint_data, entry.layout_index, slide_cache, template_key, embedder)
 
-    # 保存生成的 PowerPoint 文件
+    # 保存生成的 PowerPoint 文件（或写入二进制流）
     prs.save(output_path)
-    LOG.info(f"演示文稿已保存到 '{output_path}'")
+    if isinstance(output_path, str):
+        LOG.info(f"演示文稿已保存到 '{output_path}'")
+    else:
+        LOG.info(f"演示文稿 '{powerpoint_data.title}' 已写入输出流")
+
+# 生成 PowerPoint 演示文稿，并以字节形式返回，不经过磁盘
+def generate_presentation_bytes(powerpoint_data, template_path: str, slide_cache=None, embedder=None) -> bytes:
+    buffer = BytesIO()
+    generate_presentation(powerpoint_data, template_path, buffer, slide_cache, embedder)
+    return buffer.getvalue()
@@ -1,4 +1,4 @@
-from data_structures import SlideContent, Slide
+from data_structures import SlideContent, Slide, BulletPoint
 from layout_manager import LayoutManager
 
 # SlideBuilder 类用于构建单张幻灯片并通过 LayoutManager 自动分配布局
@@ -20,7 +20,7 @@ class SlideBuilder:
         :param bullet: 要点文本
         :param level: 项目符号的层级，默认为 0（一级）
         """
-        self.bullet_points.append({'text': bullet, 'level': level})  # 添加要点和层级
+        self.bullet_points.append(BulletPoint(bullet, level))  # 添加要点和层级
 
     def set_image(self, image_path: str):
         self.image_path = image_path  # 设置图片路径
@@ -29,7 +29,7 @@ class SlideBuilder:
         """
         组装并返回最终的 Slide 对象，调用 LayoutManager 自动分配布局。
         """
-        # 创建 SlideContent 对象，注意 bullet_points 现在是字典列表，包含 text 和 level 信息
+        # 创建 SlideContent 对象，bullet_points 为 BulletPoint 列表，包含 text 和 level 信息
         content = SlideContent(
             title=self.title,
             bullet_points=self.bullet_points,
@@ -0,0 +1,136 @@
+import os
+import json
+import hashlib
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from lxml import etree
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+
+from logger import LOG  # 引入日志模块
+
+# 定义 RenderedSlide 数据类，表示一张已渲染幻灯片的快照
+@dataclass
+class RenderedSlide:
+    xml: bytes  # 幻灯片 <p:cSld> 元素的 XML
+    images: List[Tuple[str, bytes]] = field(default_factory=list)  # 幻灯片引用的图片 (rId, 图片数据)
+    size: int = 0  # XML 和图片数据的总字节数，用于控制缓存的内存占用
+
+
+class SlideRenderCache:
+    """
+    幻灯片级渲染缓存，用于增量生成演示文稿。
+    以幻灯片内容（模板、布局、标题、要点、图片）的哈希为键，缓存已渲染幻灯片的 XML 和图片数据；
+    重新生成时，内容未变化的幻灯片直接复用缓存，只有修改过的幻灯片才重新构建。
+    缓存的条目数和总字节数（XML 与图片数据）都有上限，超出任一上限时按最近最少使用淘汰。
+    """
+    def __init__(self, max_entries: int = 2000, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries  # 最多缓存的幻灯片数量，超出后按最近最少使用淘汰
+        self.max_bytes = max_bytes  # 缓存的最大总字节数，超出后按最近最少使用淘汰
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中次数
+
+    @staticmethod
+    def make_key(template_key: str, layout_id: int, slide) -> str:
+        """
+        根据模板标识、布局和幻灯片内容计算缓存键。图片的修改时间和大小也计入键中，图片文件变化后会重新渲染。
+        """
+        content = slide.content
+        image_stat = None
+        if content.image_path:
+            image_full_path = os.path.join(os.getcwd(), content.image_path)
+            if os.path.exists(image_full_path):
+                stat = os.stat(image_full_path)
+                image_stat = [stat.st_mtime_ns, stat.st_size]
+
+        payload = json.dumps([
+            template_key,
+            layout_id,
+            content.title,
+            [[point.text, point.level] for point in content.bullet_points],
+            content.image_path,
+            image_stat,
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[RenderedSlide]:
+        with self._lock:
+            rendered = self._entries.get(key)
+            if rendered is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return rendered
+
+    def put(self, key: str, rendered: RenderedSlide):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous.size
+            if rendered.size > self.max_bytes:
+                return  # 单张幻灯片超过整个缓存的上限，不缓存
+            self._entries[key] = rendered
+            self._total_bytes += rendered.size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def capture_slide(slide) -> RenderedSlide:
+    """
+    记录一张已渲染幻灯片的 XML 及其引用的图片数据。
+    """
+    cSld = slide._element.cSld
+    images = []
+    for rId in dict.fromkeys(cSld.xpath(".//a:blip/@r:embed")):
+        images.append((rId, slide.part.related_part(rId).blob))
+    xml = etree.tostring(cSld)
+    return RenderedSlide(xml=xml, images=images, size=len(xml) + sum(len(blob) for _, blob in images))
+
+
+def restore_slide(prs, slide_layout, rendered: RenderedSlide):
+    """
+    根据缓存的快照向演示文稿中添加一张幻灯片，跳过占位符克隆、文本格式化和图片处理。
+    """
+    # 与 prs.slides.add_slide 相同，但不克隆布局占位符（将被缓存的内容整体替换）
+    rId, new_slide = prs.part.add_slide(slide_layout)
+    prs.slides._sldIdLst.add_sldId(rId)
+
+    cSld = parse_xml(rendered.xml)
+
+    # 重新关联图片，并将 XML 中的关系 ID 替换为新幻灯片中的关系 ID
+    rId_mapping = {}
+    for old_rId, blob in rendered.images:
+        _, new_rId = new_slide.part.get_or_add_image_part(BytesIO(blob))
+        rId_mapping[old_rId] = new_rId
+    if rId_mapping:
+        embed = qn("r:embed")
+        for blip in cSld.iter(qn("a:blip")):
+            old_rId = blip.get(embed)
+            if old_rId in rId_mapping:
+                blip.set(embed, rId_mapping[old_rId])
+
+    old_cSld = new_slide._element.cSld
+    old_cSld.getparent().replace(old_cSld, cSld)
+    LOG.debug("已从缓存中复用幻灯片")
+    return new_slide
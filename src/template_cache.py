@@ -0,0 +1,109 @@
+import os
+import copy
+import threading
+from io import BytesIO
+from typing import List
+from dataclasses import dataclass, field
+
+from pptx import Presentation
+
+from utils import remove_all_slides
+from template_manager import get_layout_mapping, get_layout_placeholder_index, LayoutPlaceholders
+from logger import LOG  # 引入日志模块
+
+# 定义 TemplateEntry 数据类，表示一个已缓存的模板
+@dataclass
+class TemplateEntry:
+    mtime: float  # 模板文件的修改时间，用于判断缓存是否失效
+    blob: bytes  # 已清除幻灯片的模板 zip 字节
+    prototype: Presentation  # 由 blob 解析得到的模板原型，只读，供克隆使用
+    layout_mapping: dict = field(default_factory=dict)  # 布局名称与索引的映射
+    layout_index: List[LayoutPlaceholders] = field(default_factory=list)  # 每个布局的占位符索引
+
+
+class TemplateCache:
+    """
+    PowerPoint 模板缓存。
+    按 (模板路径, 修改时间) 缓存已清除幻灯片的模板 zip 字节、解析后的模板原型、布局映射和占位符索引，
+    每次生成演示文稿时直接克隆原型，避免重复解压和解析模板文件。
+    """
+    def __init__(self):
+        self._entries = {}  # 绝对路径 -> TemplateEntry
+        self._lock = threading.Lock()
+
+    def _load_entry(self, template_path: str, mtime: float) -> TemplateEntry:
+        """
+        读取模板文件，清除其中的幻灯片，并生成新的缓存条目。
+        """
+        prs = Presentation(template_path)
+        remove_all_slides(prs)  # 清除模板中的所有幻灯片
+
+        # 保存清除幻灯片后的模板字节，并以此为准重新解析出原型
+        buffer = BytesIO()
+        prs.save(buffer)
+        blob = buffer.getvalue()
+        # 原型解析后不再访问，避免 python-pptx 的惰性属性缓存在原型上，增加每次克隆的开销
+        prototype = Presentation(BytesIO(blob))
+
+        LOG.debug(f"模板已缓存: {template_path}（{len(blob)} 字节）")
+        return TemplateEntry(
+            mtime=mtime,
+            blob=blob,
+            prototype=prototype,
+            layout_mapping=get_layout_mapping(prs),
+            layout_index=get_layout_placeholder_index(prs),
+        )
+
+    def get_entry(self, template_path: str) -> TemplateEntry:
+        """
+        获取模板的缓存条目。模板文件被修改后会自动重新加载。
+        """
+        # 检查模板文件是否存在
+        if not os.path.exists(template_path):
+            LOG.error(f"模板文件 '{template_path}' 不存在。")
+            raise FileNotFoundError(f"模板文件 '{template_path}' 不存在。")
+
+        key = os.path.abspath(template_path)
+        mtime = os.path.getmtime(key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.mtime != mtime:
+                entry = self._load_entry(key, mtime)
+                self._entries[key] = entry
+        return entry
+
+    def clone(self, template_path: str) -> Presentation:
+        """
+        返回一个已清除幻灯片的模板副本，调用方可以自由修改。
+        """
+        return copy.deepcopy(self.get_entry(template_path).prototype)
+
+    def get_blob(self, template_path: str) -> bytes:
+        """
+        返回已清除幻灯片的模板 zip 字节。
+        """
+        return self.get_entry(template_path).blob
+
+    def get_layout_mapping(self, template_path: str) -> dict:
+        """
+        返回模板的布局映射（布局名称 -> 索引）。
+        """
+        return dict(self.get_entry(template_path).layout_mapping)
+
+    def get_layout_index(self, template_path: str) -> List[LayoutPlaceholders]:
+        """
+        返回模板每个布局的占位符索引（标题、正文、图片占位符），与 slide_layouts 顺序一致。
+        """
+        return self.get_entry(template_path).layout_index
+
+    def clear(self):
+        """
+        清空所有缓存的模板。
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+# 全局共享的模板缓存实例
+template_cache = TemplateCache()
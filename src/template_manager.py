@@ -1,4 +1,40 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
 from pptx import Presentation
+from pptx.enum.shapes import PP_PLACEHOLDER
+
+# 新建幻灯片时会带有文本框的占位符类型（与 python-pptx 克隆占位符的规则一致）
+TEXT_PLACEHOLDER_TYPES = (
+    PP_PLACEHOLDER.TITLE,
+    PP_PLACEHOLDER.CENTER_TITLE,
+    PP_PLACEHOLDER.SUBTITLE,
+    PP_PLACEHOLDER.BODY,
+    PP_PLACEHOLDER.OBJECT,
+)
+
+# 新建幻灯片时不会被克隆的占位符类型
+LATENT_PLACEHOLDER_TYPES = (
+    PP_PLACEHOLDER.DATE,
+    PP_PLACEHOLDER.FOOTER,
+    PP_PLACEHOLDER.SLIDE_NUMBER,
+)
+
+# 定义 PictureGeometry 数据类，表示图片占位符的 idx 及其位置和大小（EMU）
+@dataclass
+class PictureGeometry:
+    idx: int  # 图片占位符的 idx
+    left: int
+    top: int
+    width: int
+    height: int
+
+# 定义 LayoutPlaceholders 数据类，记录布局中标题、正文和图片占位符的位置，供生成幻灯片时直接定位
+@dataclass
+class LayoutPlaceholders:
+    title_idx: Optional[int] = None  # 标题占位符的 idx，没有则为 None
+    body_idx: Optional[int] = None  # 正文（要点）占位符的 idx，没有则为 None
+    picture: Optional[PictureGeometry] = None  # 图片占位符的 idx 和几何信息，没有则为 None
 
 # 加载 PowerPoint 模板
 def load_template(template_path: str) -> Presentation:
@@ -12,6 +48,27 @@ def get_layout_mapping(prs: Presentation) -> dict:
         layout_mapping[layout.name] = idx
     return layout_mapping
 
+# 获取布局占位符索引，返回与 prs.slide_layouts 顺序一致的 LayoutPlaceholders 列表
+def get_layout_placeholder_index(prs: Presentation) -> List[LayoutPlaceholders]:
+    layout_index = []
+    for layout in prs.slide_layouts:
+        info = LayoutPlaceholders()
+        # 按新幻灯片中占位符的克隆顺序遍历
+        for ph in layout.placeholders:
+            ph_type = ph.placeholder_format.type
+            if ph_type in LATENT_PLACEHOLDER_TYPES:
+                continue
+            ph_idx = ph.placeholder_format.idx
+
+            if ph_idx == 0:
+                info.title_idx = ph_idx  # 与 slide.shapes.title 一致，idx 为 0 的占位符即标题
+            elif info.body_idx is None and ph_type in TEXT_PLACEHOLDER_TYPES:
+                info.body_idx = ph_idx  # 第一个非标题的文本占位符用于要点
+            elif info.picture is None and ph_type == PP_PLACEHOLDER.PICTURE:
+                info.picture = PictureGeometry(ph_idx, ph.left, ph.top, ph.width, ph.height)
+        layout_index.append(info)
+    return layout_index
+
 # 打印模板中的所有布局名称及其索引
 def print_layouts(prs: Presentation):
     for idx, layout in enumerate(prs.slide_layouts):
@@ -1,10 +1,45 @@
+import os
+import re
+import time
+import shutil
 from pptx import Presentation
 from logger import LOG
 
+# 每次请求使用的独立输出目录的名称（uuid4().hex）
+REQUEST_DIR_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
 # 删除 PowerPoint 模板中的所有幻灯片
 def remove_all_slides(prs: Presentation):
     xml_slides = prs.slides._sldIdLst  # 获取幻灯片列表
     slides = list(xml_slides)  # 转换为列表
     for slide in slides:
         xml_slides.remove(slide)  # 从幻灯片列表中移除每一张幻灯片
+        prs.part.drop_rel(slide.rId)  # 同时删除幻灯片的关系，避免保存时仍写入孤立的幻灯片
     LOG.debug("模板中的幻灯片已被移除。")
+
+# 将演示文稿标题转换为安全的文件名，去除路径分隔符等非法字符
+def sanitize_filename(name: str, default: str = "presentation") -> str:
+    cleaned = "".join("_" if ch in '<>:"/\\|?*' or ord(ch) < 32 else ch for ch in name).strip().strip(".")
+    return cleaned or default
+
+# 删除 parent 下名称符合 REQUEST_DIR_PATTERN、最后修改时间早于 max_age 秒之前的请求输出目录，返回删除的目录数。
+# 其他文件和目录（如命令行模式生成的演示文稿）不受影响
+def remove_expired_request_dirs(parent: str, max_age: float) -> int:
+    if not os.path.isdir(parent):
+        return 0
+    expire_before = time.time() - max_age
+    removed = 0
+    with os.scandir(parent) as entries:
+        for entry in entries:
+            if not (REQUEST_DIR_PATTERN.match(entry.name) and entry.is_dir(follow_symlinks=False)):
+                continue
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime >= expire_before:
+                    continue
+                shutil.rmtree(entry.path)
+                removed += 1
+            except OSError as e:
+                LOG.warning(f"删除过期的输出目录 '{entry.path}' 失败: {e}")
+    if removed:
+        LOG.debug(f"已删除 {removed} 个过期的输出目录")
+    return removed
@@ -0,0 +1,116 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from batch_generator import collect_inputs, generate_batch, output_paths
+
+class TestBatchGenerator(unittest.TestCase):
+    """
+    测试批量生成：收集输入文件、进程池生成演示文稿以及清单文件内容。
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.input_dir = os.path.join(self.tmp_dir, "inputs")
+        self.output_dir = os.path.join(self.tmp_dir, "outputs")
+        os.makedirs(os.path.join(self.input_dir, "sub"))
+
+        shutil.copy('inputs/markdown/test_input.md', os.path.join(self.input_dir, "a.md"))
+        with open(os.path.join(self.input_dir, "sub", "b.markdown"), 'w', encoding='utf-8') as f:
+            f.write("# 第二个演示文稿\n\n## 要点\n- 第一条\n")
+        with open(os.path.join(self.input_dir, "notes.txt"), 'w', encoding='utf-8') as f:
+            f.write("not an input")
+
+    def test_collect_inputs_from_directory(self):
+        inputs = collect_inputs(self.input_dir)
+        self.assertEqual(inputs, [os.path.join(self.input_dir, "a.md"), os.path.join(self.input_dir, "sub", "b.markdown")])
+
+    def test_collect_inputs_from_manifest(self):
+        manifest = os.path.join(self.tmp_dir, "inputs.txt")
+        with open(manifest, 'w', encoding='utf-8') as f:
+            f.write("# 注释\ninputs/a.md\n\ninputs/sub/b.markdown\n")
+        inputs = collect_inputs(manifest)
+        self.assertEqual(inputs, [os.path.join(self.tmp_dir, "inputs/a.md"), os.path.join(self.tmp_dir, "inputs/sub/b.markdown")])
+
+    def test_generate_batch(self):
+        inputs = collect_inputs(self.input_dir) + [os.path.join(self.input_dir, "notes.txt")]
+        manifest = generate_batch(inputs, output_dir=self.output_dir, max_workers=2)
+
+        self.assertEqual(manifest["total"], 3)
+        self.assertEqual(manifest["succeeded"], 2)
+        self.assertEqual(manifest["failed"], 1)
+
+        # 结果按输入顺序排列，成功的输出文件存在
+        results = manifest["results"]
+        self.assertEqual([r["input"] for r in results], inputs)
+        for result in results[:2]:
+            self.assertEqual(result["status"], "ok")
+            self.assertTrue(os.path.exists(result["output"]))
+            self.assertIn("render", result["timings"])
+        self.assertEqual(results[2]["status"], "failed")
+        self.assertIn("暂不支持的文件格式", results[2]["error"])
+
+        # 清单文件已写入输出目录
+        with open(os.path.join(self.output_dir, "batch_manifest.json"), 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["succeeded"], 2)
+
+    def test_output_paths(self):
+        inputs = [os.path.join(self.tmp_dir, "a", "intro.md"), os.path.join(self.tmp_dir, "b", "intro.md"),
+                  os.path.join(self.tmp_dir, "b", "x.md"), os.path.join(self.tmp_dir, "b", "x.docx")]
+        self.assertEqual(output_paths(inputs, "out"), {
+            inputs[0]: os.path.join("out", "a", "intro.pptx"),
+            inputs[1]: os.path.join("out", "b", "intro.pptx"),
+            inputs[2]: os.path.join("out", "b", "x.md.pptx"),
+            inputs[3]: os.path.join("out", "b", "x.docx.pptx"),
+        })
+
+    def test_same_stem_inputs_do_not_collide(self):
+        # 不同子目录中的同名输入各自生成输出文件
+        for sub in ("a", "b"):
+            os.makedirs(os.path.join(self.input_dir, sub))
+            with open(os.path.join(self.input_dir, sub, "intro.md"), 'w', encoding='utf-8') as f:
+                f.write(f"# 演示文稿 {sub}\n\n## 要点\n- {sub}\n")
+        inputs = [os.path.join(self.input_dir, "a", "intro.md"), os.path.join(self.input_dir, "b", "intro.md")]
+        manifest = generate_batch(inputs, output_dir=self.output_dir, max_workers=2)
+
+        self.assertEqual(manifest["succeeded"], 2)
+        outputs = [result["output"] for result in manifest["results"]]
+        self.assertEqual(outputs, [os.path.join(self.output_dir, "a", "intro.pptx"), os.path.join(self.output_dir, "b", "intro.pptx")])
+        for output in outputs:
+            self.assertTrue(os.path.exists(output))
+
+    def test_duplicate_inputs_are_processed_once(self):
+        # 清单重复列出同一文件，或目录收集结果与显式路径重复时，只处理一次
+        manifest_file = os.path.join(self.tmp_dir, "inputs.txt")
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            f.write("inputs/a.md\ninputs/./a.md\n")
+        self.assertEqual(collect_inputs(manifest_file), [os.path.join(self.tmp_dir, "inputs/a.md")])
+
+        a_path = os.path.join(self.input_dir, "a.md")
+        inputs = collect_inputs(self.input_dir) + [a_path, os.path.relpath(a_path)]
+        manifest = generate_batch(inputs, output_dir=self.output_dir, max_workers=2)
+        self.assertEqual(manifest["total"], 2)
+        self.assertEqual([r["input"] for r in manifest["results"]], collect_inputs(self.input_dir))
+
+    def test_worker_initializer_failure_writes_manifest(self):
+        # 工作进程初始化失败（配置文件不存在）时，每个输入都记为失败，清单仍然写入
+        inputs = collect_inputs(self.input_dir)
+        manifest = generate_batch(inputs, output_dir=self.output_dir, max_workers=2,
+                                  config_file=os.path.join(self.tmp_dir, "missing.json"))
+        self.assertEqual((manifest["total"], manifest["failed"]), (2, 2))
+        for result in manifest["results"]:
+            self.assertIn("BrokenProcessPool", result["error"])
+        with open(os.path.join(self.output_dir, "batch_manifest.json"), 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["failed"], 2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+if __name__ == "__main__":
+    unittest.main()
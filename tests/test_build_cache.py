@@ -0,0 +1,123 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Config
+from build_cache import BuildCache
+from pipeline import Pipeline
+from media_store import MediaStore
+
+class FakeLLMStage:
+    """
+    模拟 ContentFormatter / ContentAssistant，记录调用次数，不访问网络。
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def format(self, content):
+        self.calls += 1
+        return content
+
+    def adjust_single_picture(self, content):
+        self.calls += 1
+        return content
+
+class TestBuildCache(unittest.TestCase):
+    """
+    测试构建缓存：未变化的输入被跳过，模板变化时只重新执行渲染阶段。
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+        self.output_path = os.path.join(self.tmp_dir, "out.pptx")
+
+        # docx 中的图像保存到临时的媒体存储中
+        self.store_patcher = patch('docx_parser.media_store', MediaStore(os.path.join(self.tmp_dir, "media")))
+        self.store_patcher.start()
+
+    def make_pipeline(self, template="templates/SimpleTemplate.pptx", **llm):
+        config_file = os.path.join(self.tmp_dir, f"config_{os.path.basename(template)}.json")
+        with open('config.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        config["ppt_template"] = template
+        config["llm"].update(llm)
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+
+        pipeline = Pipeline(Config(config_file), BuildCache(self.cache_dir))
+        pipeline._content_formatter = FakeLLMStage()
+        pipeline._content_assistant = FakeLLMStage()
+        return pipeline
+
+    def test_unchanged_markdown_is_skipped(self):
+        input_file = os.path.join(self.tmp_dir, "input.md")
+        shutil.copy('inputs/markdown/test_input.md', input_file)
+
+        pipeline = self.make_pipeline()
+        self.assertFalse(pipeline.run(input_file, output_path=self.output_path)["skipped"])
+        self.assertTrue(pipeline.run(input_file, output_path=self.output_path)["skipped"])
+
+        # 输入变化后重新生成
+        with open(input_file, 'a', encoding='utf-8') as f:
+            f.write("\n## 新增幻灯片\n- 新要点\n")
+        self.assertFalse(pipeline.run(input_file, output_path=self.output_path)["skipped"])
+
+        # 输出文件被删除后重新生成
+        os.remove(self.output_path)
+        self.assertFalse(pipeline.run(input_file, output_path=self.output_path)["skipped"])
+
+    def test_template_change_only_reruns_render(self):
+        input_file = 'inputs/docx/multimodal_llm_overview.docx'
+
+        pipeline = self.make_pipeline()
+        self.assertFalse(pipeline.run(input_file, output_path=self.output_path)["skipped"])
+        self.assertEqual(pipeline._content_formatter.calls, 1)
+        self.assertEqual(pipeline._content_assistant.calls, 1)
+        self.assertTrue(pipeline.run(input_file, output_path=self.output_path)["skipped"])
+
+        # 更换模板：中间 markdown 全部命中缓存，不再调用 LLM，只重新渲染
+        pipeline = self.make_pipeline("templates/MasterTemplate.pptx")
+        result = pipeline.run(input_file, output_path=self.output_path)
+        self.assertFalse(result["skipped"])
+        self.assertEqual(pipeline._content_formatter.calls, 0)
+        self.assertEqual(pipeline._content_assistant.calls, 0)
+
+    def test_reuploaded_docx_uses_cache(self):
+        # 同一 docx 以不同文件名再次上传（如 gradio 的临时文件），直接返回缓存的 LLM 处理结果
+        pipeline = self.make_pipeline()
+        first = pipeline.convert_docx('inputs/docx/multimodal_llm_overview.docx')
+        reuploaded = os.path.join(self.tmp_dir, "毕业总结.docx")
+        shutil.copy('inputs/docx/multimodal_llm_overview.docx', reuploaded)
+        self.assertEqual(pipeline.convert_docx(reuploaded), first)
+        self.assertEqual(pipeline._content_formatter.calls, 1)
+        self.assertEqual(pipeline._content_assistant.calls, 1)
+
+    def test_llm_change_reruns_llm_stages(self):
+        # 更换模型、接口地址或采样温度后，LLM 处理结果不再命中缓存
+        input_file = 'inputs/docx/multimodal_llm_overview.docx'
+        self.make_pipeline().convert_docx(input_file)
+        for llm in ({"model": "gpt-4o"}, {"base_url": "http://localhost:8000/v1"}, {"temperature": 0.2}):
+            pipeline = self.make_pipeline(**llm)
+            pipeline.convert_docx(input_file)
+            self.assertEqual(pipeline._content_formatter.calls, 1, llm)
+            self.assertEqual(pipeline._content_assistant.calls, 1, llm)
+
+        # 配置相同时命中缓存
+        pipeline = self.make_pipeline(temperature=0.2)
+        pipeline.convert_docx(input_file)
+        self.assertEqual(pipeline._content_formatter.calls, 0)
+
+    def tearDown(self):
+        self.store_patcher.stop()
+        shutil.rmtree(self.tmp_dir)
+
+if __name__ == "__main__":
+    unittest.main()
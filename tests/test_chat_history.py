@@ -0,0 +1,189 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from chat_history import BoundedChatMessageHistory, SessionHistoryStore, SQLiteSessionStore
+from history_policy import HistoryPolicy, SUMMARY_NAME
+
+
+def append_turns(path, session_id, turns):
+    # 在独立进程中向共享数据库追加对话，模拟多个工作进程
+    store = SQLiteSessionStore(path, max_messages=1000)
+    history = store.get(session_id)
+    for turn in range(turns):
+        history.add_messages([HumanMessage(content=f"{session_id} 需求 {turn}"), AIMessage(content=f"回复 {turn}")])
+    store.close()
+
+class TestChatHistory(unittest.TestCase):
+    """
+    测试按会话保存的聊天历史：会话数、空闲时间和单个会话的消息量都有上限，大量会话下内存保持有界。
+    """
+
+    def chat(self, history, turn):
+        history.add_messages([HumanMessage(content=f"需求 {turn}" * 20), AIMessage(content=f"# 大纲 {turn}\n" * 50)])
+
+    def test_session_history_is_bounded(self):
+        history = BoundedChatMessageHistory(max_messages=6, max_chars=100000)
+        for turn in range(10):
+            self.chat(history, turn)
+        self.assertEqual(len(history.messages), 6)
+        self.assertIsInstance(history.messages[0], HumanMessage)
+        self.assertEqual(history.messages[-1].content, "# 大纲 9\n" * 50)
+
+        # 按字符数限制时，至少保留最新的一条消息
+        history = BoundedChatMessageHistory(max_messages=40, max_chars=1000)
+        for turn in range(10):
+            self.chat(history, turn)
+        self.assertLessEqual(sum(len(m.content) for m in history.messages), 1000)
+        self.assertEqual(history.messages[-1].content, "# 大纲 9\n" * 50)
+
+    def test_oversized_turn_is_kept_whole(self):
+        # 单独一轮对话超出字符上限时，保留完整的一轮（用户消息和回复），不会只剩下 AI 回复
+        history = BoundedChatMessageHistory(max_messages=40, max_chars=100)
+        history.add_message(SystemMessage(content="摘要"))
+        self.chat(history, 0)
+        self.chat(history, 1)
+        self.assertEqual([m.type for m in history.messages], ["system", "human", "ai"])
+        self.assertEqual(history.messages[1].content, "需求 1" * 20)
+
+    def test_lru_and_ttl_eviction(self):
+        store = SessionHistoryStore(max_sessions=2, ttl=None)
+        first = store.get("a")
+        store.get("b")
+        self.assertIs(store.get("a"), first)  # a 成为最近使用
+        store.get("c")
+        self.assertEqual(("a" in store, "b" in store, "c" in store), (True, False, True))
+
+        store = SessionHistoryStore(max_sessions=100, ttl=0.05)
+        store.get("a")
+        time.sleep(0.1)
+        store.get("b")
+        self.assertEqual(("a" in store, len(store)), (False, 1))
+
+    def test_memory_bounded_under_many_sessions(self):
+        store = SessionHistoryStore(lambda: BoundedChatMessageHistory(max_messages=4), max_sessions=200, ttl=None)
+
+        def simulate(sessions):
+            for i in range(sessions):
+                history = store.get(f"session-{i}")
+                for turn in range(3):
+                    self.chat(history, turn)
+
+        tracemalloc.start()
+        try:
+            simulate(300)
+            warm, _ = tracemalloc.get_traced_memory()
+            simulate(3000)
+            current, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(len(store), 200)
+        # 会话数增加 10 倍后，占用的内存基本不变
+        self.assertLess(current, warm * 1.5)
+
+class TestSQLiteSessionStore(unittest.TestCase):
+    """
+    测试 SQLite 聊天历史后端：多个进程共享会话历史，并发写入不丢失消息，容量有上限。
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "chat_history.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_shared_between_stores(self):
+        worker_a = SQLiteSessionStore(self.path)
+        worker_b = SQLiteSessionStore(self.path)
+        summary = SystemMessage(content="摘要", name="history_summary", additional_kwargs={"history_summary": {"requests": ["a"]}})
+        worker_a.get("s1").add_messages([summary, HumanMessage(content="需求"), AIMessage(content="# 大纲")])
+
+        # 另一个工作进程读到相同的历史，消息类型和附加信息保持不变
+        messages = worker_b.get("s1").messages
+        self.assertEqual(messages, [summary, HumanMessage(content="需求"), AIMessage(content="# 大纲")])
+        self.assertEqual(messages[0].additional_kwargs, {"history_summary": {"requests": ["a"]}})
+        self.assertEqual((len(worker_b), "s1" in worker_b, "s2" in worker_b), (1, True, False))
+
+        worker_b.get("s1").clear()
+        self.assertEqual(worker_a.get("s1").messages, [])
+
+    def test_bounded(self):
+        store = SQLiteSessionStore(self.path, max_sessions=3, max_messages=4)
+        store.get("s0").add_message(SystemMessage(content="摘要"))
+        for turn in range(5):
+            store.get("s0").add_messages([HumanMessage(content=f"需求 {turn}"), AIMessage(content=f"回复 {turn}")])
+        # 开头的摘要保留，其余只保留最近的对话
+        self.assertEqual([m.content for m in store.get("s0").messages], ["摘要", "需求 4", "回复 4"])
+
+        for i in range(1, 6):
+            store._last_purge = 0  # 每次写入都检查会话数上限
+            store.get(f"s{i}").add_message(HumanMessage(content="需求"))
+        self.assertEqual(len(store), 3)
+        self.assertNotIn("s0", store)
+
+    def test_concurrent_processes(self):
+        SQLiteSessionStore(self.path).close()  # 先创建数据库和表
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(append_turns, [self.path] * 4, [f"s{i % 2}" for i in range(4)], [25] * 4))
+
+        store = SQLiteSessionStore(self.path, max_messages=1000)
+        for session_id in ("s0", "s1"):
+            messages = store.get(session_id).messages
+            self.assertEqual(len(messages), 100)
+            # 每轮的用户输入和回复在同一事务中写入，不会被其他进程的写入隔开
+            for human, ai in zip(messages[::2], messages[1::2]):
+                self.assertEqual((human.type, ai.type), ("human", "ai"))
+
+    def test_replace(self):
+        store = SQLiteSessionStore(self.path)
+        history = store.get("s1")
+        history.add_messages([HumanMessage(content="需求 1"), AIMessage(content="回复 1")])
+        previous = history.messages
+        # 读取之后追加的消息保留在改写结果之后
+        history.add_messages([HumanMessage(content="需求 2")])
+        self.assertTrue(history.replace([SystemMessage(content="摘要")], previous))
+        self.assertEqual([m.content for m in history.messages], ["摘要", "需求 2"])
+
+        # 历史已被改写时不修改
+        self.assertFalse(history.replace([SystemMessage(content="新摘要")], previous))
+        self.assertEqual([m.content for m in history.messages], ["摘要", "需求 2"])
+
+    def test_concurrent_compact_and_append(self):
+        SQLiteSessionStore(self.path).close()  # 先创建数据库和表
+        store = SQLiteSessionStore(self.path, max_messages=1000)
+        history = store.get("s0")
+        policy = HistoryPolicy(max_tokens=100000, keep_turns=2, max_requests=1000)
+
+        # 其他进程追加对话的同时反复折叠历史
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(append_turns, self.path, "s0", 25) for _ in range(2)]
+            while not all(future.done() for future in futures):
+                policy.compact(history)
+            for future in futures:
+                future.result()
+        policy.compact(history)
+
+        # 追加的消息都保留在历史中或已折叠进摘要，没有被折叠覆盖丢失
+        messages = history.messages
+        summary = messages[0]
+        self.assertEqual(summary.name, SUMMARY_NAME)
+        requests = summary.additional_kwargs[SUMMARY_NAME]["requests"]
+        requests += [m.content for m in messages[1:] if isinstance(m, HumanMessage)]
+        self.assertEqual(sorted(requests), sorted(f"s0 需求 {turn}" for turn in range(25) for _ in range(2)))
+        for human, ai in zip(messages[1::2], messages[2::2]):
+            self.assertEqual((human.type, ai.type), ("human", "ai"))
+
+if __name__ == "__main__":
+    unittest.main()
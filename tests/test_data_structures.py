@@ -5,7 +5,7 @@ import sys
 # 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
-from data_structures import PowerPoint, Slide, SlideContent
+from data_structures import PowerPoint, Slide, SlideContent, BulletPoint
 
 class TestDataStructures(unittest.TestCase):
     """
@@ -37,5 +37,21 @@ class TestDataStructures(unittest.TestCase):
         self.assertEqual(ppt.slides[0].content.title, "Slide 1")
         self.assertEqual(ppt.slides[1].content.title, "Slide 2")
 
+    def test_bullet_point(self):
+        # 以字典传入的要点会转换为 BulletPoint，并保留字典形式的读取和比较
+        slide_content = SlideContent(title="Test Slide", bullet_points=[{'text': "Bullet 1", 'level': 1}])
+        point = slide_content.bullet_points[0]
+        self.assertIsInstance(point, BulletPoint)
+        self.assertEqual((point.text, point.level), ("Bullet 1", 1))
+        self.assertEqual((point['text'], point['level']), ("Bullet 1", 1))
+        self.assertEqual(point, BulletPoint("Bullet 1", 1))
+        self.assertNotEqual(point, {'text': "Bullet 1", 'level': 0})
+        with self.assertRaises(KeyError):
+            point['image']
+
+        # 使用 __slots__，实例没有 __dict__
+        self.assertFalse(hasattr(point, '__dict__'))
+        self.assertFalse(hasattr(slide_content, '__dict__'))
+
 if __name__ == "__main__":
     unittest.main()
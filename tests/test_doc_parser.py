@@ -5,7 +5,17 @@ import sys
 # 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
-from docx_parser import generate_markdown_from_docx
+import re
+import struct
+import tempfile
+import shutil
+import zipfile
+from io import BytesIO
+from PIL import Image
+from docx import Document
+
+from docx_parser import generate_markdown_from_docx, identify_image, encode_image, MAX_IMAGE_SIZE
+from media_store import MediaStore
 
 class TestGenerateMarkdownFromDocx(unittest.TestCase):
     """
@@ -19,8 +29,13 @@ class TestGenerateMarkdownFromDocx(unittest.TestCase):
         # 定义测试 docx 文件的路径
         self.test_docx_filename = 'inputs/docx/multimodal_llm_overview.docx'
 
+        # 图像保存到临时的媒体存储中
+        self.store_dir = tempfile.mkdtemp()
+        self.store = MediaStore(self.store_dir)
+
         # 生成 Markdown 内容
-        self.generated_markdown = generate_markdown_from_docx(self.test_docx_filename)
+        self.generated_markdown = generate_markdown_from_docx(self.test_docx_filename, store=self.store)
+        self.image_paths = re.findall(r'!\[.*?\]\((.*?)\)', self.generated_markdown)
 
     def test_generated_markdown_content(self):
         """
@@ -45,11 +60,11 @@ class TestGenerateMarkdownFromDocx(unittest.TestCase):
 
 以下是多模态模型的典型架构示意图：
 
-![图片1](images/multimodal_llm_overview/1.png)
+![图片1]({image1})
 
 TransFormer 架构图：
 
-![图片2](images/multimodal_llm_overview/2.png)
+![图片2]({image2})
 
 ### 2.1 模态融合技术
 
@@ -67,22 +82,102 @@ TransFormer 架构图：
 多模态大模型将在人工智能领域持续发挥重要作用，推动技术创新。
 """
 
+        # 图像以内容哈希命名，保存在媒体存储中
+        self.assertEqual(len(self.image_paths), 2)
+        for image_path in self.image_paths:
+            self.assertEqual(os.path.dirname(image_path), self.store_dir)
+            self.assertRegex(os.path.basename(image_path), r'^[0-9a-f]{64}\.png$')
+            self.assertTrue(os.path.exists(image_path))
+        expected_markdown = expected_markdown.format(image1=self.image_paths[0], image2=self.image_paths[1])
+
         # 比较生成的 Markdown 内容与预期内容
         self.assertEqual(self.generated_markdown.strip(), expected_markdown.strip(), "生成的 Markdown 内容与预期不匹配")
 
+        # 再次转换同一文档时复用已保存的图像
+        self.assertEqual(generate_markdown_from_docx(self.test_docx_filename, store=self.store), self.generated_markdown)
+        self.assertEqual(len(self.store), 2)
+
+    def test_streaming_mode_matches(self):
+        """
+        测试直接从 zip 增量解析的模式与 python-docx 对象模型模式生成的 Markdown 内容一致。
+        """
+        streaming_markdown = generate_markdown_from_docx(self.test_docx_filename, streaming=True, store=self.store)
+        self.assertEqual(streaming_markdown, self.generated_markdown)
+
+    def test_encode_image(self):
+        """
+        测试图像处理：网页可用格式使用原始数据，其他格式转码为 PNG，超过尺寸上限的图像按比例缩小。
+        """
+        def encode(size, fmt):
+            buffer = BytesIO()
+            Image.new('RGB', size, (200, 100, 50)).save(buffer, fmt)
+            return buffer.getvalue()
+
+        # 尺寸未超限的 JPEG 原样使用
+        jpeg_bytes = encode((320, 240), 'JPEG')
+        self.assertIs(encode_image(jpeg_bytes, *identify_image(jpeg_bytes)), jpeg_bytes)
+
+        # BMP 转码为 PNG
+        bmp_bytes = encode((64, 64), 'BMP')
+        with Image.open(BytesIO(encode_image(bmp_bytes, *identify_image(bmp_bytes)))) as image:
+            self.assertEqual((image.format, image.size), ('PNG', (64, 64)))
+
+        # 超过尺寸上限的 PNG 按比例缩小
+        large_bytes = encode((MAX_IMAGE_SIZE[0] * 2, MAX_IMAGE_SIZE[1] * 2), 'PNG')
+        with Image.open(BytesIO(encode_image(large_bytes, *identify_image(large_bytes)))) as image:
+            self.assertEqual(image.size, MAX_IMAGE_SIZE)
+
+        self.assertIsNone(identify_image(b'not an image'))
+
+    def test_undecodable_images(self):
+        """
+        测试 PIL 无法解码的图像：EMF 按原始数据以 .emf 保存；保存失败的图像不产出链接，Markdown 中不引用不存在的文件。
+        """
+        # EMF 文件头：PIL 可识别为 'WMF'，但在非 Windows 平台上无法解码
+        emf_bytes = struct.pack('<II4i4i4sIIIHHII', 1, 88, 0, 0, 399, 299, 0, 0, 10400, 7800, b' EMF', 0x10000, 88, 1, 1, 0, 0, 0)
+        emf_bytes += struct.pack('<4i', 1920, 1080, 508, 286)
+        self.assertEqual(identify_image(emf_bytes)[0], 'WMF')
+
+        # 只有文件头、缺少像素数据的超大 PNG：可以识别尺寸，但缩小时解码失败
+        buffer = BytesIO()
+        Image.new('RGB', (MAX_IMAGE_SIZE[0] * 2, MAX_IMAGE_SIZE[1] * 2)).save(buffer, 'PNG')
+        broken_bytes = buffer.getvalue()[:100]
+        self.assertIsNotNone(identify_image(broken_bytes))
+
+        # 先插入两张普通 PNG 图像，再替换 docx 中的图像数据
+        docx_filename = os.path.join(self.store_dir, 'images.docx')
+        document = Document()
+        for color in ((255, 0, 0), (0, 0, 255)):
+            buffer = BytesIO()
+            Image.new('RGB', (32, 32), color).save(buffer, 'PNG')
+            document.add_picture(BytesIO(buffer.getvalue()))
+            document.add_paragraph('说明文字')
+        document.save(docx_filename)
+
+        replacements = {'word/media/image1.png': emf_bytes, 'word/media/image2.png': broken_bytes}
+        with zipfile.ZipFile(docx_filename) as source:
+            members = [(info, replacements.get(info.filename, source.read(info))) for info in source.infolist()]
+        with zipfile.ZipFile(docx_filename, 'w') as target:
+            for info, data in members:
+                target.writestr(info, data)
+
+        store = MediaStore(os.path.join(self.store_dir, 'undecodable'))
+        for streaming in (False, True):
+            markdown = generate_markdown_from_docx(docx_filename, streaming=streaming, store=store)
+            image_paths = re.findall(r'!\[图片1\]\((.*?)\)', markdown)
+            self.assertEqual(len(image_paths), 1)
+            self.assertTrue(image_paths[0].endswith('.emf'))
+            with open(image_paths[0], 'rb') as f:
+                self.assertEqual(f.read(), emf_bytes)
+            self.assertNotIn('图片2', markdown)
+            self.assertEqual(markdown.count('说明文字'), 2)
+            self.assertEqual(len(store), 1)
+
     def tearDown(self):
         """
         在每个测试方法执行后运行。用于清理测试产生的文件和目录。
         """
-        # 获取图像目录路径
-        images_dir = 'images/multimodal_llm_overview'
-        # 删除生成的图像文件和目录
-        if os.path.exists(images_dir):
-            for filename in os.listdir(images_dir):
-                file_path = os.path.join(images_dir, filename)
-                if os.path.isfile(file_path):
-                    os.unlink(file_path)  # 删除文件
-            os.rmdir(images_dir)  # 删除目录
+        shutil.rmtree(self.store_dir)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import os
+import sys
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from chat_history import BoundedChatMessageHistory
+from history_policy import HistoryPolicy, SUMMARY_NAME
+
+class TestHistoryPolicy(unittest.TestCase):
+    """
+    测试聊天历史窗口策略：多轮修改后提示 token 数趋于平稳，较早的需求折叠进摘要，最新的大纲始终保留。
+    """
+
+    def outline(self, turn):
+        return f"# 演示文稿 {turn}\n" + "".join(f"## 第 {i} 页\n- 要点 {turn}-{i}\n" for i in range(10))
+
+    def test_prompt_tokens_plateau(self):
+        policy = HistoryPolicy(max_tokens=1500, keep_turns=3, max_requests=10)
+        history = BoundedChatMessageHistory()
+        tokens = []
+        for turn in range(30):
+            user_input = f"请修改第 {turn % 10} 页的内容"
+            tokens.append(policy.compact(history, "系统提示", user_input))
+            history.add_messages([HumanMessage(content=user_input), AIMessage(content=self.outline(turn))])
+
+        self.assertTrue(all(count <= 1500 for count in tokens), tokens)
+        # 摘要中的需求条数达到上限后，每轮的提示 token 数不再增长
+        self.assertEqual(len(set(tokens[-5:])), 1, tokens)
+
+        summary = history.messages[0]
+        self.assertIsInstance(summary, SystemMessage)
+        self.assertEqual(summary.name, SUMMARY_NAME)
+        self.assertIn("请修改第 0 页的内容", summary.content)
+        self.assertEqual(history.messages[-1].content, self.outline(29))
+
+    def test_latest_outline_kept_in_summary(self):
+        policy = HistoryPolicy(max_tokens=100000, keep_turns=2)
+        history = BoundedChatMessageHistory()
+        history.add_messages([HumanMessage(content="生成大纲"), AIMessage(content=self.outline(0))])
+        for turn in range(3):
+            history.add_messages([HumanMessage(content=f"问题 {turn}"), AIMessage(content=f"回答 {turn}")])
+        policy.compact(history, "系统提示", "继续")
+
+        # 大纲所在的对话已被折叠，大纲写入摘要
+        messages = history.messages
+        self.assertEqual(len(messages), 5)
+        self.assertIn(self.outline(0), messages[0].content)
+        self.assertIn("1. 生成大纲\n2. 问题 0", messages[0].content)
+        self.assertEqual(messages[1].content, "问题 1")
+
+        # 没有需要折叠的对话时历史不变
+        policy.compact(history, "系统提示", "继续")
+        self.assertEqual(history.messages, messages)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import os
+import sys
+import shutil
+import struct
+import tempfile
+from unittest.mock import patch
+from PIL import Image
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from image_embedder import ImageEmbedder, EMU_PER_INCH
+
+class TestImageEmbedder(unittest.TestCase):
+    """
+    测试 ImageEmbedder 类，验证图片按占位符分辨率缩放、重新编码以及缓存逻辑。
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.embedder = ImageEmbedder(dpi=100)
+
+        # 生成一张 3000x2000 的 JPEG 图片和一张 200x100 的 PNG 图片
+        self.large_jpeg = os.path.join(self.tmp_dir, "large.jpg")
+        Image.new("RGB", (3000, 2000), (200, 30, 30)).save(self.large_jpeg, "JPEG")
+        self.small_png = os.path.join(self.tmp_dir, "small.png")
+        Image.new("RGBA", (200, 100), (0, 0, 255, 128)).save(self.small_png, "PNG")
+
+    def test_large_image_is_downsampled(self):
+        # 在 6x4 英寸的区域内显示，100 dpi 下目标尺寸为 600x400
+        image_file = self.embedder.embed(self.large_jpeg, 6 * EMU_PER_INCH, 4 * EMU_PER_INCH)
+        with Image.open(image_file) as img:
+            self.assertEqual(img.size, (600, 400))
+            self.assertEqual(img.format, "JPEG")
+
+    def test_small_image_is_embedded_as_is(self):
+        image_file = self.embedder.embed(self.small_png, 6 * EMU_PER_INCH, 4 * EMU_PER_INCH)
+        self.assertEqual(image_file, self.small_png)
+
+    def test_resampled_image_is_cached(self):
+        with patch.object(self.embedder, "_resample", wraps=self.embedder._resample) as resample:
+            first = self.embedder.embed(self.large_jpeg, 6 * EMU_PER_INCH, 4 * EMU_PER_INCH)
+
+            # 内容相同的图片（不同路径）复用同一处理结果
+            copy_path = os.path.join(self.tmp_dir, "copy.jpg")
+            shutil.copy(self.large_jpeg, copy_path)
+            second = self.embedder.embed(copy_path, 6 * EMU_PER_INCH, 4 * EMU_PER_INCH)
+            self.assertEqual(first.getvalue(), second.getvalue())
+            self.assertEqual(resample.call_count, 1)
+
+            # 目标尺寸不同时重新处理
+            self.embedder.embed(self.large_jpeg, 3 * EMU_PER_INCH, 2 * EMU_PER_INCH)
+            self.assertEqual(resample.call_count, 2)
+
+    def test_vector_image_is_embedded_as_is(self):
+        # EMF 图像无法用 PIL 解码，即使超过目标尺寸也按原文件嵌入
+        emf_path = os.path.join(self.tmp_dir, "vector.emf")
+        with open(emf_path, "wb") as f:
+            f.write(struct.pack('<II4i4i4sIIIHHII', 1, 88, 0, 0, 2999, 1999, 0, 0, 78000, 52000, b' EMF', 0x10000, 88, 1, 1, 0, 0, 0))
+            f.write(struct.pack('<4i', 1920, 1080, 508, 286))
+        image_file = self.embedder.embed(emf_path, 2 * EMU_PER_INCH, 1 * EMU_PER_INCH)
+        self.assertEqual(image_file, emf_path)
+
+    def test_source_info_is_bounded(self):
+        embedder = ImageEmbedder(dpi=100, max_entries=3)
+        for i in range(10):
+            path = os.path.join(self.tmp_dir, f"image_{i}.png")
+            Image.new("RGB", (10 + i, 10), (i, 0, 0)).save(path, "PNG")
+            self.assertEqual(embedder.get_image_size(path), (10 + i, 10))
+        self.assertEqual(len(embedder._sources), 3)
+
+        # 文件变化后替换原有信息，不新增条目
+        path = os.path.join(self.tmp_dir, "image_9.png")
+        Image.new("RGB", (50, 40)).save(path, "PNG")
+        os.utime(path, ns=(0, 1))
+        self.assertEqual(embedder.get_image_size(path), (50, 40))
+        self.assertEqual(len(embedder._sources), 3)
+
+    def test_get_image_size(self):
+        self.assertEqual(self.embedder.get_image_size(self.large_jpeg), (3000, 2000))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+if __name__ == "__main__":
+    unittest.main()
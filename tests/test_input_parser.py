@@ -7,7 +7,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../s
 
 from layout_manager import LayoutManager
 from data_structures import PowerPoint
-from input_parser import parse_input_text
+from input_parser import parse_input_text, StreamingInputParser, tokenize, Token
 
 class TestInputParser(unittest.TestCase):
     """
@@ -106,5 +106,49 @@ class TestInputParser(unittest.TestCase):
             # 检查图片路径是否符合预期
             self.assertEqual(slide.content.image_path, expected["image_path"])
 
+    def test_streaming_parser(self):
+        """
+        测试 StreamingInputParser 按小块输入时，每张幻灯片在下一个标题到达时即完成，且结果与一次性解析一致。
+        """
+        parser = StreamingInputParser(self.layout_manager)
+
+        # 逐字符输入，模拟 LLM 的流式输出
+        finished_titles = []
+        for char in "# ChatPPT Demo\n\n## 第一页\n- 要点":
+            finished_titles.extend(slide.content.title for slide in parser.feed(char))
+        # 主标题幻灯片立即完成；第一页尚未结束
+        self.assertEqual(finished_titles, ["ChatPPT Demo"])
+
+        finished = parser.feed("\n## 第二页\n")
+        self.assertEqual([slide.content.title for slide in finished], ["第一页"])
+        self.assertEqual(finished[0].content.bullet_points, [{"text": "要点", "level": 0}])
+
+        finished = parser.close()
+        self.assertEqual([slide.content.title for slide in finished], ["第二页"])
+        self.assertEqual(parser.presentation_title, "ChatPPT Demo")
+
+        # 按固定大小切块输入完整文件，结果与 parse_input_text 相同
+        presentation, _ = parse_input_text(self.input_text, self.layout_manager)
+        parser = StreamingInputParser(self.layout_manager)
+        for i in range(0, len(self.input_text), 7):
+            parser.feed(self.input_text[i:i + 7])
+        parser.close()
+        self.assertEqual(parser.to_presentation(), presentation)
+
+    def test_tokenize(self):
+        """
+        测试 tokenize 对每一行的分类、要点层级和行号。
+        """
+        text = "# 主标题\n\n## 幻灯片\n- 要点\n    - 二级要点\n![图](images/a.png)\n普通段落\n### 三级标题"
+        self.assertEqual(list(tokenize(text)), [
+            Token("title", "主标题", 0, 1),
+            Token("slide", "幻灯片", 0, 3),
+            Token("bullet", "要点", 0, 4),
+            Token("bullet", "二级要点", 2, 5),
+            Token("image", "images/a.png", 0, 6),
+            Token("text", "普通段落", 0, 7),
+            Token("text", "### 三级标题", 0, 8),
+        ])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,46 @@
+import unittest
+import os
+import sys
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from ir_serializer import dumps, loads, powerpoint_to_dict, powerpoint_from_dict, IR_FORMAT_VERSION
+from input_parser import parse_input_text
+from layout_manager import LayoutManager
+
+class TestIRSerializer(unittest.TestCase):
+    """
+    测试 PowerPoint 数据结构的 JSON 和 msgpack 序列化往返。
+    """
+
+    def setUp(self):
+        layout_mapping = {"Title 1": 1, "Title, Content 0": 2, "Title, Content, Picture 2": 8}
+        with open('inputs/markdown/test_input.md', 'r', encoding='utf-8') as f:
+            self.powerpoint, _ = parse_input_text(f.read(), LayoutManager(layout_mapping))
+
+    def test_json_round_trip(self):
+        data = dumps(self.powerpoint, "json")
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(loads(data, "json"), self.powerpoint)
+        # 中文内容不转义
+        self.assertIn("业绩图表".encode('utf-8'), data)
+
+    def test_msgpack_round_trip(self):
+        data = dumps(self.powerpoint, "msgpack")
+        self.assertEqual(loads(data, "msgpack"), self.powerpoint)
+        self.assertLess(len(data), len(dumps(self.powerpoint, "json")))
+
+    def test_version_mismatch(self):
+        data = powerpoint_to_dict(self.powerpoint)
+        self.assertEqual(data["version"], IR_FORMAT_VERSION)
+        data["version"] = IR_FORMAT_VERSION + 1
+        with self.assertRaises(ValueError):
+            powerpoint_from_dict(data)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            dumps(self.powerpoint, "xml")
+
+if __name__ == "__main__":
+    unittest.main()
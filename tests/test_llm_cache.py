@@ -0,0 +1,117 @@
+import unittest
+import os
+import sys
+import time
+import asyncio
+import threading
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from llm_cache import LLMResponseCache, invoke_with_cache, ainvoke_with_cache, abatch_with_cache, get_llm_cache
+
+class TestLLMResponseCache(unittest.TestCase):
+    """
+    测试 LLM 回复缓存：命中/未命中统计、过期和按最近使用淘汰。
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "llm.sqlite3")
+        self.model = SimpleNamespace(model_name="gpt-4o-mini", temperature=0.5)
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def invoke(self):
+        self.calls += 1
+        return SimpleNamespace(content=f"回复 {self.calls}", usage_metadata={"total_tokens": 100})
+
+    def test_invoke_with_cache(self):
+        cache = LLMResponseCache(self.path)
+        first = invoke_with_cache(cache, self.model, "系统提示", "输入", self.invoke)
+        second = invoke_with_cache(cache, self.model, "系统提示", "输入", self.invoke)
+        self.assertEqual((first, second, self.calls), ("回复 1", "回复 1", 1))
+
+        # 提示、输入、temperature 或接口地址不同时不命中
+        invoke_with_cache(cache, self.model, "另一个提示", "输入", self.invoke)
+        invoke_with_cache(cache, SimpleNamespace(model_name="gpt-4o-mini", temperature=0.7), "系统提示", "输入", self.invoke)
+        other_provider = SimpleNamespace(model_name="gpt-4o-mini", temperature=0.5, openai_api_base="http://localhost:8000/v1")
+        invoke_with_cache(cache, other_provider, "系统提示", "输入", self.invoke)
+        self.assertEqual(self.calls, 4)
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["saved_tokens"]), (1, 4, 100))
+
+        # 缓存持久化到磁盘，新实例仍可命中
+        cache.close()
+        reopened = LLMResponseCache(self.path)
+        self.assertEqual(invoke_with_cache(reopened, self.model, "系统提示", "输入", self.invoke), "回复 1")
+        self.assertEqual(self.calls, 4)
+
+        # 未启用缓存时直接调用
+        self.assertEqual(invoke_with_cache(None, self.model, "系统提示", "输入", self.invoke), "回复 5")
+
+    def test_ainvoke_with_cache(self):
+        cache = LLMResponseCache(self.path)
+
+        async def ainvoke():
+            return self.invoke()
+
+        async def run():
+            first = await ainvoke_with_cache(cache, self.model, "系统提示", "输入", ainvoke)
+            second = await ainvoke_with_cache(cache, self.model, "系统提示", "输入", ainvoke)
+            return first, second
+
+        self.assertEqual(asyncio.run(run()), ("回复 1", "回复 1"))
+        # 同步和异步调用共用缓存条目
+        self.assertEqual(invoke_with_cache(cache, self.model, "系统提示", "输入", self.invoke), "回复 1")
+        self.assertEqual(self.calls, 1)
+
+    def test_async_cache_access_off_event_loop(self):
+        # 异步版本的缓存读写在线程中执行，不阻塞事件循环所在的线程
+        cache = LLMResponseCache(self.path)
+        threads = set()
+        get, put = cache.get, cache.put
+        cache.get = lambda *args: threads.add(threading.get_ident()) or get(*args)
+        cache.put = lambda *args: threads.add(threading.get_ident()) or put(*args)
+
+        async def abatch(texts):
+            return [self.invoke() for _ in texts]
+
+        async def run():
+            first = await abatch_with_cache(cache, self.model, "系统提示", ["a", "b"], abatch)
+            second = await abatch_with_cache(cache, self.model, "系统提示", ["a", "b", "c"], abatch)
+            return first, second, threading.get_ident()
+
+        first, second, loop_thread = asyncio.run(run())
+        self.assertEqual(first, ["回复 1", "回复 2"])
+        self.assertEqual(second, ["回复 1", "回复 2", "回复 3"])
+        self.assertTrue(threads)
+        self.assertNotIn(loop_thread, threads)
+
+    def test_ttl_and_eviction(self):
+        cache = LLMResponseCache(self.path, ttl=60, max_entries=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        self.assertEqual(cache.get("a"), "A")  # a 成为最近使用
+        cache.put("c", "C")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+
+        cache.ttl = 0.01
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+
+    def test_opt_in_per_component(self):
+        config = SimpleNamespace(llm_cache={"components": ["content_formatter"], "path": self.path})
+        self.assertIsInstance(get_llm_cache(config, "content_formatter"), LLMResponseCache)
+        self.assertIsNone(get_llm_cache(config, "content_assistant"))
+        self.assertIsNone(get_llm_cache(SimpleNamespace(llm_cache={}), "content_formatter"))
+
+if __name__ == "__main__":
+    unittest.main()
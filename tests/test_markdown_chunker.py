@@ -0,0 +1,55 @@
+import unittest
+import os
+import sys
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from markdown_chunker import estimate_tokens, split_markdown_sections, merge_formatted_chunks
+
+class TestMarkdownChunker(unittest.TestCase):
+    """
+    测试长文档分块格式化的切分与合并：分块不超过预算、在标题处切分、合并后保持原有顺序。
+    """
+
+    def setUp(self):
+        sections = []
+        for i in range(1, 7):
+            sections.append(f"## {i}. 第 {i} 章")
+            sections.append("")
+            for j in range(1, 4):
+                sections.append(f"### {i}.{j} 第 {j} 节")
+                sections.append("多模态大模型能够同时处理文本、图像、音频等多种类型的数据。" * 3)
+                sections.append(f"![图片{i}{j}](images/{i}_{j}.png)")
+        self.raw_content = "# 多模态大模型概述\n\n概述段落。\n\n" + "\n".join(sections)
+
+    def test_split_within_budget_and_order(self):
+        title, chunks = split_markdown_sections(self.raw_content, 400)
+        self.assertEqual(title, "多模态大模型概述")
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(estimate_tokens(chunk), 400)
+            # 除第一个分块（包含概述段落）外，每个分块都从标题开始
+            if chunk is not chunks[0]:
+                self.assertTrue(chunk.startswith("#"), chunk[:20])
+
+        # 按顺序拼接各分块即为去掉标题后的原文
+        self.assertEqual("\n".join(chunks), self.raw_content.replace("# 多模态大模型概述\n", "", 1))
+
+    def test_small_content_single_chunk(self):
+        title, chunks = split_markdown_sections("# 标题\n\n## 第一页\n- 要点", 2000)
+        self.assertEqual((title, chunks), ("标题", ["\n## 第一页\n- 要点"]))
+
+    def test_merge_formatted_chunks(self):
+        outputs = [
+            "```\n# 多模态大模型概述\n\n## 第一页\n- 要点 1\n```",
+            "# 多模态大模型概述\n\n## 第二页\n- 要点 2\n![图片](images/1.png)",
+        ]
+        self.assertEqual(
+            merge_formatted_chunks(outputs),
+            "# 多模态大模型概述\n\n## 第一页\n- 要点 1\n\n## 第二页\n- 要点 2\n![图片](images/1.png)\n",
+        )
+        self.assertTrue(merge_formatted_chunks(outputs, "原始标题").startswith("# 原始标题\n\n## 第一页"))
+
+if __name__ == "__main__":
+    unittest.main()
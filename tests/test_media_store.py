@@ -0,0 +1,125 @@
+import unittest
+import os
+import sys
+import shutil
+import time
+import tempfile
+from unittest.mock import patch
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import media_store as media_store_module
+from media_store import MediaStore, configure_media_store, media_store
+
+class TestMediaStore(unittest.TestCase):
+    """
+    测试按内容寻址的媒体存储：相同内容只保存一份，超过容量时按最近最少使用淘汰。
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_put_deduplicates(self):
+        store = MediaStore(self.root)
+        path = store.put(b"image-a", ".png")
+        self.assertEqual(os.path.basename(path), f"{MediaStore.digest(b'image-a')}.png")
+        self.assertEqual(store.put(b"image-a", ".png"), path)
+        self.assertEqual(len(store), 1)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b"image-a")
+
+        # 新实例从目录内容重建索引
+        self.assertEqual(MediaStore(self.root).get(path), path)
+        self.assertIsNone(MediaStore(self.root).get(store.path_for("0" * 64, ".png")))
+
+    @patch.object(media_store_module, "MIN_GRACE_PERIOD", 0)
+    def test_lru_eviction(self):
+        store = MediaStore(self.root, max_bytes=25, grace_period=0)
+        path_a = store.put(b"a" * 10, ".png")
+        path_b = store.put(b"b" * 10, ".png")
+
+        # 使用 a 之后，b 成为最近最少使用的文件
+        store.touch(path_a)
+
+        path_c = store.put(b"c" * 10, ".png")
+        self.assertTrue(os.path.exists(path_a))
+        self.assertFalse(os.path.exists(path_b))
+        self.assertTrue(os.path.exists(path_c))
+        self.assertEqual(store.total_bytes, 20)
+
+        # 超过容量的单个文件也会保留刚写入的文件
+        path_d = store.put(b"d" * 30, ".png")
+        self.assertEqual([name for name in os.listdir(self.root) if name != ".lock"], [os.path.basename(path_d)])
+
+    @patch.object(media_store_module, "MIN_GRACE_PERIOD", 0)
+    @patch.object(media_store_module, "SCAN_INTERVAL", 0)
+    def test_eviction_shared_between_processes(self):
+        # 两个实例模拟共用同一目录的两个工作进程，扫描目录后淘汰时计入对方写入的文件，总大小不超过上限
+        worker_a = MediaStore(self.root, max_bytes=25, grace_period=0)
+        worker_b = MediaStore(self.root, max_bytes=25, grace_period=0)
+        self.assertEqual((len(worker_a), len(worker_b)), (0, 0))
+
+        path_a = worker_a.put(b"a" * 10, ".png")
+        time.sleep(0.01)
+        path_b = worker_b.put(b"b" * 10, ".png")
+        time.sleep(0.01)
+        path_c = worker_a.put(b"c" * 10, ".png")
+        self.assertFalse(os.path.exists(path_a))
+        self.assertTrue(os.path.exists(path_b) and os.path.exists(path_c))
+        self.assertEqual(worker_a.total_bytes, 20)  # 锁文件不计入存储
+
+    def test_grace_period(self):
+        # 保护期内使用过的文件不会被淘汰，总大小暂时超出上限
+        store = MediaStore(self.root, max_bytes=15, grace_period=60)
+        path_a = store.put(b"a" * 10, ".png")
+        path_b = store.put(b"b" * 10, ".png")
+        self.assertTrue(os.path.exists(path_a) and os.path.exists(path_b))
+        self.assertEqual(store.total_bytes, 20)
+
+        # 超过保护期后按最近最少使用淘汰
+        old = time.time() - 600
+        os.utime(path_a, (old, old))
+        fresh = MediaStore(self.root, max_bytes=15, grace_period=60)
+        fresh.put(b"c" * 5, ".png")
+        self.assertFalse(os.path.exists(path_a))
+        self.assertTrue(os.path.exists(path_b))
+
+    def test_scan_only_when_needed(self):
+        store = MediaStore(self.root, max_bytes=25, grace_period=0)
+        with patch.object(store, "_scan", wraps=store._scan) as scan:
+            # 首次使用时扫描一次，之后的写入只增量更新索引
+            for i in range(2):
+                store.put(bytes([i]) * 10, ".png")
+            self.assertEqual(scan.call_count, 1)
+            self.assertEqual(store.total_bytes, 20)
+
+            # 超出上限时在淘汰前重新扫描
+            store._last_scan -= media_store_module.RESCAN_INTERVAL
+            store.put(b"c" * 10, ".png")
+            self.assertEqual(scan.call_count, 2)
+
+    def test_minimum_grace_period(self):
+        # 保护期配置为 0 时也不会淘汰其他进程刚写入的文件
+        worker_a = MediaStore(self.root, max_bytes=15, grace_period=0)
+        worker_b = MediaStore(self.root, max_bytes=15, grace_period=0)
+        path_a = worker_a.put(b"a" * 10, ".png")
+        path_b = worker_b.put(b"b" * 10, ".png")
+        self.assertTrue(os.path.exists(path_a) and os.path.exists(path_b))
+
+    def test_configure_media_store(self):
+        class StubConfig:
+            media_store_max_mb = 2
+            media_store_grace_seconds = 30
+        max_bytes, grace_period = media_store.max_bytes, media_store.grace_period
+        try:
+            configure_media_store(StubConfig())
+            self.assertEqual((media_store.max_bytes, media_store.grace_period), (2 * 1024 * 1024, 30))
+        finally:
+            media_store.configure(max_bytes, grace_period)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import os
+import sys
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from picture_normalizer import normalize_single_picture, join_sections
+
+class TestPictureNormalizer(unittest.TestCase):
+    """
+    测试本地的单图规则：多图幻灯片按图片拆分，结构不明确的幻灯片标记为歧义。
+    """
+
+    def test_split_multi_picture_slide(self):
+        markdown = (
+            "# 多模态大模型概述\n\n"
+            "## 多模态模型架构\n"
+            "- 多模态模型的典型架构示意图\n"
+            "![图片1](images/multimodal_llm_overview/1.png)\n"
+            "- TransFormer 架构图\n"
+            "![图片2](images/multimodal_llm_overview/2.png)\n"
+            "- 注意力机制是核心\n\n"
+            "## 未来展望\n"
+            "- 多模态大模型将在人工智能领域持续发挥重要作用，推动技术创新\n"
+        )
+        title, sections = normalize_single_picture(markdown)
+        self.assertEqual(title, "多模态大模型概述")
+        self.assertFalse(any(section.ambiguous for section in sections))
+        self.assertEqual(join_sections(sections), (
+            "# 多模态大模型概述\n\n"
+            "## 多模态模型架构\n"
+            "- 多模态模型的典型架构示意图\n"
+            "![图片1](images/multimodal_llm_overview/1.png)\n\n"
+            "## TransFormer 架构图\n"
+            "- TransFormer 架构图\n"
+            "![图片2](images/multimodal_llm_overview/2.png)\n"
+            "- 注意力机制是核心\n\n"
+            "## 未来展望\n"
+            "- 多模态大模型将在人工智能领域持续发挥重要作用，推动技术创新\n"
+        ))
+
+    def test_unchanged_and_numbered_titles(self):
+        # 每张幻灯片最多一张图片时内容不变
+        markdown = "# 标题\n\n## 第一页\n- 要点\n![图片](images/1.png)\n"
+        self.assertEqual(join_sections(normalize_single_picture(markdown)[1]), markdown)
+
+        # 拆分出的部分没有一级要点时，使用 "原标题（序号）"
+        _, sections = normalize_single_picture("## 示意图\n![a](images/a.png)\n![b](images/b.png)\n")
+        self.assertEqual(join_sections(sections),
+                         "## 示意图\n![a](images/a.png)\n\n## 示意图（2）\n![b](images/b.png)\n\n")
+
+    def test_ambiguous_slides(self):
+        markdown = (
+            "## 图片位于多级要点中间\n"
+            "- 架构\n"
+            "![图片1](images/1.png)\n"
+            "  - 下级要点\n"
+            "![图片2](images/2.png)\n\n"
+            "## 含有无法识别的文本\n"
+            "一段说明文字\n"
+            "![图片3](images/3.png)\n"
+            "![图片4](images/4.png)\n\n"
+            "## 单图\n"
+            "![图片5](images/5.png)\n"
+        )
+        _, sections = normalize_single_picture(markdown)
+        self.assertEqual([section.ambiguous for section in sections], [True, True, False])
+        # 有歧义的幻灯片保留原文
+        self.assertEqual(join_sections(sections), markdown)
+
+if __name__ == "__main__":
+    unittest.main()
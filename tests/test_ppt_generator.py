@@ -1,13 +1,14 @@
 import unittest
 import os
 import sys
+from io import BytesIO
 from pptx import Presentation
 
 # 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 from data_structures import PowerPoint, Slide, SlideContent
-from ppt_generator import generate_presentation
+from ppt_generator import generate_presentation, generate_presentation_bytes
 
 class TestPPTGenerator(unittest.TestCase):
     """
@@ -106,6 +107,23 @@ class TestPPTGenerator(unittest.TestCase):
                 images = [shape for shape in slide.shapes if shape.shape_type == 13]  # 13 为图片形状类型
                 self.assertGreater(len(images), 0, f"幻灯片 {idx + 1} 应该包含图片，但未找到。")
 
+    def test_generate_presentation_to_stream(self):
+        """
+        测试将演示文稿写入二进制流和返回字节，不生成输出文件。
+        """
+        buffer = BytesIO()
+        generate_presentation(self.powerpoint_data, self.template_path, buffer)
+        self.assertFalse(os.path.exists(self.output_path))
+
+        buffer.seek(0)
+        prs = Presentation(buffer)
+        self.assertEqual(prs.core_properties.title, self.powerpoint_data.title)
+        self.assertEqual(len(prs.slides), len(self.powerpoint_data.slides))
+
+        pptx_bytes = generate_presentation_bytes(self.powerpoint_data, self.template_path)
+        prs = Presentation(BytesIO(pptx_bytes))
+        self.assertEqual(len(prs.slides), len(self.powerpoint_data.slides))
+
     def tearDown(self):
         """
         清理生成的文件。
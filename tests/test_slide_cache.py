@@ -0,0 +1,106 @@
+import unittest
+import os
+import sys
+from io import BytesIO
+from pptx import Presentation
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from data_structures import PowerPoint, Slide, SlideContent
+from ppt_generator import generate_presentation_bytes
+from slide_cache import SlideRenderCache, RenderedSlide
+
+class TestSlideRenderCache(unittest.TestCase):
+    """
+    测试 SlideRenderCache，验证增量生成时只重建修改过的幻灯片，且复用的幻灯片内容保持正确。
+    """
+
+    def setUp(self):
+        self.template_path = "templates/SimpleTemplate.pptx"
+        self.cache = SlideRenderCache()
+
+    def make_powerpoint(self, second_bullet="市场份额扩大至30%"):
+        return PowerPoint(
+            title="ChatPPT Demo",
+            slides=[
+                Slide(layout_id=1, layout_name="Title 1", content=SlideContent(title="ChatPPT Demo")),
+                Slide(
+                    layout_id=2,
+                    layout_name="Title, Content 0",
+                    content=SlideContent(
+                        title="2024 业绩概述",
+                        bullet_points=[
+                            {"text": "总收入增长15%", "level": 0},
+                            {"text": second_bullet, "level": 0}
+                        ]
+                    )
+                ),
+                Slide(
+                    layout_id=8,
+                    layout_name="Title, Content, Picture 2",
+                    content=SlideContent(
+                        title="业绩图表",
+                        bullet_points=[{"text": "OpenAI 利润不断增加", "level": 0}],
+                        image_path="images/performance_chart.png"
+                    )
+                ),
+            ]
+        )
+
+    def test_unchanged_slides_are_reused(self):
+        first = generate_presentation_bytes(self.make_powerpoint(), self.template_path, self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 3))
+
+        second = generate_presentation_bytes(self.make_powerpoint(), self.template_path, self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (3, 3))
+
+        # 复用缓存生成的演示文稿与首次生成的内容一致
+        prs1, prs2 = Presentation(BytesIO(first)), Presentation(BytesIO(second))
+        self.assertEqual(len(prs1.slides), len(prs2.slides))
+        for slide1, slide2 in zip(prs1.slides, prs2.slides):
+            self.assertEqual([shape.shape_type for shape in slide1.shapes], [shape.shape_type for shape in slide2.shapes])
+            texts1 = [shape.text_frame.text for shape in slide1.shapes if shape.has_text_frame]
+            texts2 = [shape.text_frame.text for shape in slide2.shapes if shape.has_text_frame]
+            self.assertEqual(texts1, texts2)
+
+        # 复用的图片仍然可以正常读取
+        picture = [shape for shape in prs2.slides[2].shapes if shape.shape_type == 13][0]
+        self.assertGreater(len(picture.image.blob), 0)
+
+    def test_only_changed_slide_is_rebuilt(self):
+        generate_presentation_bytes(self.make_powerpoint(), self.template_path, self.cache)
+        data = generate_presentation_bytes(self.make_powerpoint("市场份额扩大至35%"), self.template_path, self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 4))
+
+        prs = Presentation(BytesIO(data))
+        body_texts = [shape.text_frame.text for shape in prs.slides[1].shapes if shape.has_text_frame]
+        self.assertIn("市场份额扩大至35%", "\n".join(body_texts))
+
+    def test_max_entries(self):
+        cache = SlideRenderCache(max_entries=2)
+        generate_presentation_bytes(self.make_powerpoint(), self.template_path, cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_max_bytes(self):
+        # 缓存按图片和 XML 的总字节数淘汰最近最少使用的幻灯片
+        generate_presentation_bytes(self.make_powerpoint(), self.template_path, self.cache)
+        entries = list(self.cache._entries.values())
+        self.assertEqual(self.cache.total_bytes, sum(entry.size for entry in entries))
+        # 图片幻灯片的大小包括图片数据
+        self.assertGreater(entries[2].size, len(entries[2].xml) + 10000)
+
+        cache = SlideRenderCache(max_bytes=100)
+        cache.put("a", RenderedSlide(xml=b"a" * 60, size=60))
+        cache.put("b", RenderedSlide(xml=b"b" * 30, size=30))
+        cache.put("c", RenderedSlide(xml=b"c" * 30, size=30))
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual((len(cache), cache.total_bytes), (2, 60))
+
+        # 超过整个缓存上限的幻灯片不缓存
+        cache.put("d", RenderedSlide(xml=b"d" * 200, size=200))
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual((len(cache), cache.total_bytes), (2, 60))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from template_cache import TemplateCache
+from template_manager import load_template, get_layout_mapping
+
+class TestTemplateCache(unittest.TestCase):
+    """
+    测试 TemplateCache 类，验证模板克隆、布局映射和缓存失效逻辑。
+    """
+
+    def setUp(self):
+        self.template_path = "templates/SimpleTemplate.pptx"
+        self.cache = TemplateCache()
+
+    def test_clone_has_no_slides(self):
+        prs = self.cache.clone(self.template_path)
+        self.assertEqual(len(prs.slides), 0)
+        self.assertEqual(len(prs.slide_layouts), len(load_template(self.template_path).slide_layouts))
+
+    def test_clones_are_independent(self):
+        prs1 = self.cache.clone(self.template_path)
+        prs1.slides.add_slide(prs1.slide_layouts[0])
+        prs2 = self.cache.clone(self.template_path)
+        self.assertEqual(len(prs1.slides), 1)
+        self.assertEqual(len(prs2.slides), 0)
+
+    def test_layout_mapping(self):
+        expected = get_layout_mapping(load_template(self.template_path))
+        self.assertEqual(self.cache.get_layout_mapping(self.template_path), expected)
+
+    def test_layout_index(self):
+        layout_index = self.cache.get_layout_index(self.template_path)
+        layout_mapping = self.cache.get_layout_mapping(self.template_path)
+        self.assertEqual(len(layout_index), len(layout_mapping))
+
+        # "Title, Content, Picture 2" 布局：标题 idx 0，正文 idx 1，图片 idx 12
+        info = layout_index[layout_mapping["Title, Content, Picture 2"]]
+        self.assertEqual(info.title_idx, 0)
+        self.assertEqual(info.body_idx, 1)
+        self.assertEqual(info.picture.idx, 12)
+        self.assertGreater(info.picture.width, 0)
+
+        # "Title 1" 布局只有标题
+        info = layout_index[layout_mapping["Title 1"]]
+        self.assertEqual(info.title_idx, 0)
+        self.assertIsNone(info.body_idx)
+        self.assertIsNone(info.picture)
+
+    def test_reload_when_template_modified(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            tmp_template = os.path.join(tmp_dir, "template.pptx")
+            shutil.copy(self.template_path, tmp_template)
+            entry = self.cache.get_entry(tmp_template)
+            self.assertIs(self.cache.get_entry(tmp_template), entry)
+
+            # 修改模板文件的修改时间后，缓存应重新加载
+            os.utime(tmp_template, (entry.mtime + 10, entry.mtime + 10))
+            self.assertIsNot(self.cache.get_entry(tmp_template), entry)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_missing_template(self):
+        with self.assertRaises(FileNotFoundError):
+            self.cache.clone("templates/NotExist.pptx")
+
+if __name__ == "__main__":
+    unittest.main()
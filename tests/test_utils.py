@@ -0,0 +1,47 @@
+import unittest
+import os
+import sys
+import time
+import uuid
+import shutil
+import tempfile
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from utils import remove_expired_request_dirs, sanitize_filename
+
+class TestUtils(unittest.TestCase):
+    """
+    测试工具函数：文件名清理和过期请求输出目录的删除。
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_sanitize_filename(self):
+        self.assertEqual(sanitize_filename('a/b:c?'), 'a_b_c_')
+        self.assertEqual(sanitize_filename(' .. '), 'presentation')
+
+    def test_remove_expired_request_dirs(self):
+        old = time.time() - 7200
+        expired = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        recent = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        other = os.path.join(self.tmp_dir, "batch")
+        for path in (expired, recent, other):
+            os.makedirs(path)
+            with open(os.path.join(path, "演示文稿.pptx"), 'wb') as f:
+                f.write(b"pptx")
+        os.utime(expired, (old, old))
+        os.utime(other, (old, old))
+
+        # 只删除过期的请求目录，其他目录不受影响
+        self.assertEqual(remove_expired_request_dirs(self.tmp_dir, 3600), 1)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), sorted([os.path.basename(recent), "batch"]))
+        self.assertEqual(remove_expired_request_dirs(os.path.join(self.tmp_dir, "missing"), 3600), 0)
+
+if __name__ == "__main__":
+    unittest.main()